@@ -1,2 +1,17 @@
-# app/__init__.py
-from .agent import root_agent # <-- Import Relatif (la solution)
\ No newline at end of file
+"""Docu-researcher: researches documentary subjects into knowledge briefs.
+
+`root_agent` is built on first access rather than on import, so importing the
+package, e.g. for `app.config` or a CLI, does not build the agent graph.
+"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from google.adk.agents import BaseAgent
+
+
+def __getattr__(name: str) -> "BaseAgent":
+    if name == "root_agent":
+        from .agent import root_agent
+        return root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
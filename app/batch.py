@@ -0,0 +1,297 @@
+"""Headless batch runner producing briefs for many subjects.
+
+Reads subjects from a JSONL file, one object per line with a `subject` and an
+optional `id`, and runs each through `plan_generator` and `research_pipeline`
+without a human in the loop: the generated plan is approved automatically.
+Up to `--concurrency` subjects are researched at once on a single asyncio
+runner, each in sessions of its own, and every `final_documentary_brief` is
+written to `<out>/<id>.json`. Subjects whose brief already exists are skipped
+unless `--force` is given, so an interrupted batch can simply be run again.
+
+    python -m app.batch subjects.jsonl --out briefs --concurrency 8
+
+A `batch_report.json` with per-subject outcomes, briefs per hour, the p50
+and p95 per-brief latencies and, when KNOWLEDGE_BASE_SKIP_NODES is set, the
+searches and model calls the knowledge base saved is written next to the
+briefs, with the metrics of the model and search rate limiters (queue depth,
+throttle events, retries and hedge wins).
+With `--trace`, the spans of the batch are also written to a JSONL file and
+summarized.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.genai import types as genai_types
+
+from app.config import config
+from app.schemas.narrative import NarrativePlan
+from app.sub_agents.plan_generator.agent import plan_generator
+from app.sub_agents.research_pipeline.agent import research_pipeline
+from app.utils.json_stream import parse_first
+from app.utils.knowledge_base import KNOWLEDGE_BASE_STATS_KEY
+from app.utils.rate_limit import rate_limit_metrics
+from app.utils.tracing import (
+    JsonlSpanExporter,
+    MemorySpanExporter,
+    enable_tracing,
+    summary_table,
+)
+
+APP_NAME = "docu_researcher_batch"
+USER_ID = "batch"
+
+
+@dataclass
+class BatchJob:
+    """A subject to research."""
+    id: str
+    subject: str
+
+
+@dataclass
+class BatchResult:
+    """The outcome of a job."""
+    id: str
+    subject: str
+    ok: bool
+    seconds: float
+    path: str | None = None
+    error: str | None = None
+    # What seeding the brief from the knowledge base saved.
+    knowledge_base: dict[str, int] | None = None
+
+
+def slugify(text: str, max_length: int = 60) -> str:
+    """Turns a subject into a file name."""
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:max_length] or "brief"
+
+
+def read_jobs(path: str) -> list[BatchJob]:
+    """Reads the jobs of a JSONL file, skipping blank and invalid lines."""
+    jobs, ids = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.error(f"Skipping line {line_number} of {path}: {e}")
+                continue
+            subject = item.get("subject") if isinstance(item, dict) else None
+            if not subject:
+                logging.error(f"Skipping line {line_number} of {path}: no 'subject'.")
+                continue
+            job_id = base = str(item.get("id") or slugify(subject))
+            suffix = 1
+            while job_id in ids:
+                suffix += 1
+                job_id = f"{base}-{suffix}"
+            ids.add(job_id)
+            jobs.append(BatchJob(id=job_id, subject=subject))
+    return jobs
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Returns the nearest-rank `q` percentile (0-100) of the values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(results: list[BatchResult], elapsed: float) -> dict[str, Any]:
+    """Computes the throughput and latency figures of a batch."""
+    latencies = [result.seconds for result in results if result.ok]
+    avoided = [result.knowledge_base or {} for result in results]
+    summary: dict[str, Any] = {
+        "jobs": len(results),
+        "succeeded": len(latencies),
+        "failed": len(results) - len(latencies),
+        "elapsed_seconds": round(elapsed, 1),
+        "briefs_per_hour": round(len(latencies) / elapsed * 3600, 1) if elapsed else 0.0,
+        "p50_seconds": round(percentile(latencies, 50), 1),
+        "p95_seconds": round(percentile(latencies, 95), 1),
+    }
+    # Only skipped nodes avoid searches and model calls.
+    if config.knowledge_base_skip_nodes:
+        summary["searches_avoided"] = sum(stats.get("searches_avoided", 0) for stats in avoided)
+        summary["model_calls_avoided"] = sum(stats.get("model_calls_avoided", 0) for stats in avoided)
+    return summary
+
+
+class BatchRunner:
+    """
+    Researches many subjects concurrently, approving every generated plan.
+
+    The planning and research agents are shared by every job; each job runs
+    in its own session of `session_service`.
+    """
+    def __init__(
+        self,
+        out_dir: str,
+        concurrency: int = 4,
+        planner: BaseAgent = plan_generator,
+        pipeline: BaseAgent = research_pipeline,
+        session_service: BaseSessionService | None = None,
+    ):
+        self.out_dir = out_dir
+        self.concurrency = concurrency
+        self.session_service = session_service or InMemorySessionService()
+        self._planner = Runner(app_name=APP_NAME, agent=planner, session_service=self.session_service)
+        self._pipeline = Runner(app_name=APP_NAME, agent=pipeline, session_service=self.session_service)
+
+    async def run(self, jobs: list[BatchJob]) -> tuple[list[BatchResult], dict[str, Any]]:
+        """
+        Runs every job, at most `concurrency` at a time.
+
+        Returns:
+            tuple: The result of each job, in input order, and the batch summary.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def run_job(job: BatchJob) -> BatchResult:
+            nonlocal done
+            async with semaphore:
+                result = await self._run_job(job)
+            done += 1
+            status = "done" if result.ok else f"failed: {result.error}"
+            logging.info(f"[{done}/{len(jobs)}] '{job.subject}' {status} in {result.seconds:.0f}s.")
+            return result
+
+        start = time.monotonic()
+        results = await asyncio.gather(*(run_job(job) for job in jobs))
+        summary = summarize(results, time.monotonic() - start)
+        report = {
+            "summary": summary,
+            "rate_limits": rate_limit_metrics(),
+            "results": [asdict(result) for result in results],
+        }
+        with open(os.path.join(self.out_dir, "batch_report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return results, summary
+
+    async def _run_job(self, job: BatchJob) -> BatchResult:
+        start = time.monotonic()
+        try:
+            path, knowledge_base = await self._research(job)
+        except Exception as e:
+            logging.exception(f"Job '{job.id}' failed.")
+            return BatchResult(job.id, job.subject, False, time.monotonic() - start, error=str(e))
+        return BatchResult(
+            job.id, job.subject, True, time.monotonic() - start, path=path, knowledge_base=knowledge_base
+        )
+
+    async def _research(self, job: BatchJob) -> tuple[str, dict[str, int] | None]:
+        session = await self.session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, state={"research_subject": job.subject}
+        )
+
+        plan = None
+        async for event in self._planner.run_async(
+            user_id=USER_ID, session_id=session.id, new_message=_user_message(job.subject)
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                text = "".join(part.text or "" for part in event.content.parts if not part.thought)
+                plan = parse_first(NarrativePlan, text) or plan
+        # Sessions are dropped as soon as they are done with, so memory does
+        # not grow with the size of the batch.
+        await self._delete_session(session.id)
+        if plan is None:
+            raise ValueError("plan_generator did not produce a valid NarrativePlan")
+
+        # Approve the plan, as the user would by answering the planner, and
+        # research it in a session of its own.
+        session = await self.session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            state={"research_subject": job.subject, "research_plan": plan.model_dump()},
+        )
+        async for _ in self._pipeline.run_async(
+            user_id=USER_ID, session_id=session.id, new_message=_user_message("Proceed.")
+        ):
+            pass
+
+        finished = await self.session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session.id
+        )
+        await self._delete_session(session.id)
+        if finished is None or not (brief := finished.state.get("final_documentary_brief")):
+            raise ValueError("research_pipeline did not produce a final_documentary_brief")
+        path = os.path.join(self.out_dir, f"{job.id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(brief, f, indent=2, ensure_ascii=False)
+        return path, finished.state.get(KNOWLEDGE_BASE_STATS_KEY)
+
+    async def _delete_session(self, session_id: str) -> None:
+        await self.session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+
+
+def _user_message(text: str) -> genai_types.Content:
+    return genai_types.Content(role="user", parts=[genai_types.Part(text=text)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("subjects", help="JSONL file with one {\"subject\": ..., \"id\": ...} object per line.")
+    parser.add_argument("--out", default="briefs", help="Directory the briefs and the report are written to.")
+    parser.add_argument("--concurrency", type=int, default=config.batch_concurrency)
+    parser.add_argument("--force", action="store_true", help="Research subjects whose brief already exists again.")
+    parser.add_argument("--trace", help="JSONL file the spans of the batch are written to.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    jobs = read_jobs(args.subjects)
+    if not jobs:
+        parser.error(f"No subjects found in {args.subjects}.")
+    if not args.force:
+        # Resuming an interrupted batch: keep the briefs already written.
+        todo = [job for job in jobs if not os.path.exists(os.path.join(args.out, f"{job.id}.json"))]
+        if len(todo) < len(jobs):
+            logging.info(f"Skipping {len(jobs) - len(todo)} subjects whose brief already exists.")
+        jobs = todo
+        if not jobs:
+            print("Every brief already exists.")
+            return
+
+    spans = MemorySpanExporter()
+    if args.trace:
+        enable_tracing([plan_generator, research_pipeline], [JsonlSpanExporter(args.trace), spans])
+
+    _, summary = asyncio.run(BatchRunner(args.out, args.concurrency).run(jobs))
+    if args.trace:
+        print(summary_table(spans.records))
+    saved = (
+        f" The knowledge base saved {summary['searches_avoided']} searches "
+        f"and {summary['model_calls_avoided']} model calls."
+        if "searches_avoided" in summary else ""
+    )
+    print(
+        f"{summary['succeeded']}/{summary['jobs']} briefs in {summary['elapsed_seconds']}s: "
+        f"{summary['briefs_per_hour']} briefs/hour, p50 {summary['p50_seconds']}s, "
+        f"p95 {summary['p95_seconds']}s.{saved}"
+    )
+    for name, metrics in rate_limit_metrics().items():
+        print(
+            f"{name}: {metrics['calls']} calls at {metrics['rate']}/s, {metrics['throttled']} throttled, "
+            f"{metrics['retries']} retries, {metrics['hedge_wins']}/{metrics['hedges']} hedges won, "
+            f"max queue {metrics['max_queued']}."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,54 @@
 import logging
 import re
-import json
+from collections.abc import Iterator
 
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event
 from google.genai import types as genai_types
-from pydantic import ValidationError
 
 # Import our project's specific schemas
 from ..schemas.narrative import NarrativePlan
-from ..schemas.brief import ResearchStatus, NodeUpdate
+from ..config import config
+from ..schemas.brief import Feedback, ResearchStatus, NodeUpdate
+from ..utils.brief_cache import get_brief_cache
+from ..utils.brief_index import get_brief_index
+from ..utils.event_index import get_event_index
+from ..utils.json_stream import parse_first
+from ..utils.research_scheduler import ResearchSchedule
+from ..utils.saturation import (
+    RESEARCH_DELTA_KEY,
+    record_evaluation,
+    research_delta,
+    saturation_verdict,
+)
+from ..utils.source_registry import get_source_registry
+from ..tools.speculative_prefetch import speculate
+
+# Agents whose final output is a NodeUpdate JSON object.
+RESEARCH_AGENTS = ("section_researcher", "enhanced_search_executor", "unified_researcher")
 
 def save_plan_to_state_callback(callback_context: CallbackContext) -> None:
     """
     Finds the JSON string from the plan_generator's output, parses it into a
     NarrativePlan object, and saves it and the original subject to the session state.
     
-    This callback is now resilient to conversational text before the JSON.
+    This callback is resilient to conversational text and extra blocks around the JSON.
+    With `SPECULATIVE_PREFETCH=True`, the plan's searches start in the
+    background while the user reviews it.
     """
     session = callback_context._invocation_context.session
+    event_index = get_event_index(session)
     plan_saved = False
     
     # First, find the original user query from the first human event
-    for event in session.events:
-        if event.author == "user" and event.content and event.content.parts:
+    for event in event_index.events_by_author("user"):
+        if event.content and event.content.parts:
             user_query = event.content.parts[0].text
             callback_context.state["research_subject"] = user_query
             logging.info(f"Successfully saved 'research_subject': '{user_query}' to state.")
             break
 
-    for event in reversed(session.events):
+    for event in event_index.latest_function_responses("plan_generator"):
         if plan_saved:
             break
 
@@ -46,29 +66,18 @@ def save_plan_to_state_callback(callback_context: CallbackContext) -> None:
             full_output_string = response_data["result"]
 
             if isinstance(full_output_string, str):
-                # --- THE CRITICAL FIX IS HERE ---
-                # Use a regular expression to find the JSON block.
-                # This looks for a string that starts with '{' and ends with '}'.
-                # The re.DOTALL flag allows '.' to match newlines.
-                json_match = re.search(r'\{.*\}', full_output_string, re.DOTALL)
-                
-                if not json_match:
-                    logging.error(f"Could not find a JSON block in the output from 'plan_generator'.")
+                # Take the first complete top-level JSON object that is a valid
+                # plan, ignoring any conversational text or extra blocks around it.
+                plan_object = parse_first(NarrativePlan, full_output_string)
+                if plan_object is None:
+                    logging.error("Could not find a valid NarrativePlan JSON block in the output from 'plan_generator'.")
                     continue
 
-                json_string = json_match.group(0)
-                # --- END OF FIX ---
-
-                try:
-                    plan_object = NarrativePlan.model_validate_json(json_string)
-                    callback_context.state["research_plan"] = plan_object
-                    logging.info(f"Successfully parsed and saved '{type(plan_object).__name__}' to state.")
-                    plan_saved = True
-                    break
-
-                except (ValidationError, json.JSONDecodeError) as e:
-                    logging.error(f"Failed to parse JSON from plan_generator: {e}")
-                    return
+                callback_context.state["research_plan"] = plan_object
+                logging.info(f"Successfully parsed and saved '{type(plan_object).__name__}' to state.")
+                speculate(session.id, plan_object)
+                plan_saved = True
+                break
 
     if not plan_saved:
         logging.warning(
@@ -81,110 +90,100 @@ def update_brief_with_research_callback(callback_context: CallbackContext) -> No
     NodeUpdate object, and merges the data into the main documentary_brief.
     """
     session = callback_context._invocation_context.session
-    if not (brief := callback_context.state.get("documentary_brief")):
-        logging.warning("Callback ran, but 'documentary_brief' not found in state.")
+    if (cache := get_brief_cache(session, callback_context.state)) is None:
+        logging.warning("Callback ran, but no valid 'documentary_brief' found in state.")
         return
+    # The index lives on the brief object, so it is reused by later callbacks.
+    brief_index = get_brief_index(cache.brief)
+    # Cleared so a stale delta never gates the evaluation of this pass; the
+    # previous one still counts the node's empty passes in a row.
+    previous_delta = callback_context.state.get(RESEARCH_DELTA_KEY)
+    callback_context.state[RESEARCH_DELTA_KEY] = None
 
-    # Find the most recent text output from our research agents
-    for event in reversed(session.events):
-        if (event.author in ("section_researcher", "enhanced_search_executor", "unified_researcher") and
-            event.content and event.content.parts):
-            
-            # The output is in the text part of the final agent response
-            json_string = event.content.parts[0].text
-            
-            # Ensure the string is not None or empty before trying to parse it.
-            if json_string:
-                try:
-                    node_update = NodeUpdate.model_validate_json(json_string)
-
-                    # Find the matching node in the brief and update it
-                    for node in brief.knowledge_nodes:
-                        if node.node_title == node_update.node_title:
-                            # Merge sources and facts
-                            existing_urls = {s.url for s in node.top_sources}
-                            for new_source in node_update.top_sources:
-                                if new_source.url not in existing_urls:
-                                    node.top_sources.append(new_source)
-
-                            existing_facts = {f.description for f in node.fact_points}
-                            for new_fact in node_update.fact_points:
-                                if new_fact.description not in existing_facts:
-                                    node.fact_points.append(new_fact)
-
-                            node.research_status = ResearchStatus.ACTIVE
-                            
-                            logging.info(f"Successfully updated node '{node.node_title}' with {len(node_update.fact_points)} new facts.")
-                            callback_context.state["documentary_brief"] = brief
-                            return # Exit after successful update
-
-                except (ValidationError, json.JSONDecodeError, IndexError) as e:
-                    logging.debug(f"Skipping event output, not a valid JSON NodeUpdate: {e}")
-                    continue
+    # Find the most recent text output from our research agents, among the
+    # events this callback has not processed yet.
+    event_index = get_event_index(session)
+    research_events = event_index.latest_by_author(
+        RESEARCH_AGENTS,
+        after=event_index.watermark(callback_context.state, "update_brief_with_research"),
+    )
+    event_index.advance(callback_context.state, "update_brief_with_research")
+
+    for event in research_events:
+        # The output is in the text parts of the final agent response, possibly
+        # wrapped in prose or code fences.
+        node_update = parse_first(NodeUpdate, _text_chunks(event))
+        if node_update is None:
+            logging.debug(f"Skipping event output from '{event.author}', no valid JSON NodeUpdate.")
+            continue
+
+        # Merge into the matching node through the brief's indexes
+        if merge := brief_index.merge(node_update):
+            merge.node.research_status = ResearchStatus.ACTIVE
+            cache.mark_changed()
+
+            logging.info(f"Successfully updated node '{merge.node.node_title}' with {len(merge.added_facts)} new facts ({len(merge.merged_facts)} near-duplicates merged).")
+            callback_context.state.update(cache.state_delta())
+            callback_context.state[RESEARCH_DELTA_KEY] = research_delta(merge, previous_delta)
+            return # Exit after successful update
 
     logging.warning("Callback ran but could not find a valid 'NodeUpdate' JSON to process.")
 
 
+def _text_chunks(event: Event) -> Iterator[str]:
+    """Yields the text of an event's parts, skipping model thoughts."""
+    if event.content and event.content.parts:
+        for part in event.content.parts:
+            if part.text and not part.thought:
+                yield part.text
+
+
+def _grounding_metadata_in(event: Event) -> list[genai_types.GroundingMetadata]:
+    """
+    Returns the grounding metadata carried by an event, whether it comes from the
+    model's built-in search or from a cached `google_search` function response.
+    """
+    found = []
+    if event.grounding_metadata:
+        found.append(event.grounding_metadata)
+    if event.content and event.content.parts:
+        for part in event.content.parts:
+            response = part.function_response
+            if (
+                response
+                and response.name == "google_search"
+                and isinstance(response.response, dict)
+                and response.response.get("grounding_metadata")
+            ):
+                found.append(
+                    genai_types.GroundingMetadata.model_validate(
+                        response.response["grounding_metadata"]
+                    )
+                )
+    return found
+
+
 def collect_research_sources_callback(callback_context: CallbackContext) -> None:
     """Collects and organizes web-based research sources and their supported claims from agent events.
 
     This function processes the agent's `session.events` to extract web source details (URLs,
     titles, domains from `grounding_chunks`) and associated text segments with confidence scores
-    (from `grounding_supports`). The aggregated source information and a mapping of URLs to short
-    IDs are cumulatively stored in `callback_context.state`.
+    (from `grounding_supports`). Sources are registered in the session's SourceRegistry by
+    canonical URL, with their claims deduplicated and capped, and the registry is written back to
+    `callback_context.state` when it changed. Events already processed by a previous run are
+    skipped using the session's event index.
 
     Args:
         callback_context (CallbackContext): The context object providing access to the agent's
             session events and persistent state.
     """
     session = callback_context._invocation_context.session
-    url_to_short_id = callback_context.state.get("url_to_short_id", {})
-    sources = callback_context.state.get("sources", {})
-    id_counter = len(url_to_short_id) + 1
-    for event in session.events:
-        if not (event.grounding_metadata and event.grounding_metadata.grounding_chunks):
-            continue
-        chunks_info = {}
-        for idx, chunk in enumerate(event.grounding_metadata.grounding_chunks):
-            if not chunk.web:
-                continue
-            url = chunk.web.uri
-            title = (
-                chunk.web.title
-                if chunk.web.title != chunk.web.domain
-                else chunk.web.domain
-            )
-            if url not in url_to_short_id:
-                short_id = f"src-{id_counter}"
-                url_to_short_id[url] = short_id
-                sources[short_id] = {
-                    "short_id": short_id,
-                    "title": title,
-                    "url": url,
-                    "domain": chunk.web.domain,
-                    "supported_claims": [],
-                }
-                id_counter += 1
-            chunks_info[idx] = url_to_short_id[url]
-        if event.grounding_metadata.grounding_supports:
-            for support in event.grounding_metadata.grounding_supports:
-                confidence_scores = support.confidence_scores or []
-                chunk_indices = support.grounding_chunk_indices or []
-                for i, chunk_idx in enumerate(chunk_indices):
-                    if chunk_idx in chunks_info:
-                        short_id = chunks_info[chunk_idx]
-                        confidence = (
-                            confidence_scores[i] if i < len(confidence_scores) else 0.5
-                        )
-                        text_segment = support.segment.text if support.segment else ""
-                        sources[short_id]["supported_claims"].append(
-                            {
-                                "text_segment": text_segment,
-                                "confidence": confidence,
-                            }
-                        )
-    callback_context.state["url_to_short_id"] = url_to_short_id
-    callback_context.state["sources"] = sources
+    registry = get_source_registry(session, callback_context.state)
+    # Only the events appended since the last run can hold new sources.
+    for event in get_event_index(session).unseen(callback_context.state, "collect_research_sources"):
+        for grounding_metadata in _grounding_metadata_in(event):
+            registry.add_grounding(grounding_metadata)
+    callback_context.state.update(registry.state_delta())
 
 
 def citation_replacement_callback(
@@ -203,11 +202,12 @@ def citation_replacement_callback(
         genai_types.Content: The processed report with Markdown citation links.
     """
     final_report = callback_context.state.get("final_cited_report", "")
-    sources = callback_context.state.get("sources", {})
+    session = callback_context._invocation_context.session
+    registry = get_source_registry(session, callback_context.state)
 
     def tag_replacer(match: re.Match) -> str:
         short_id = match.group(1)
-        if not (source_info := sources.get(short_id)):
+        if not (source_info := registry.get(short_id)):
             logging.warning(f"Invalid citation tag found and removed: {match.group(0)}")
             return ""
         display_text = source_info.get("title", source_info.get("domain", short_id))
@@ -233,4 +233,69 @@ def display_confirmation_callback(callback_context: CallbackContext) -> genai_ty
         "Plan approved. I have now structured the research brief "
         "and am proceeding to the autonomous research phase."
     )
-    return genai_types.Content(parts=[genai_types.Part(text=confirmation_text)])
\ No newline at end of file
+    return genai_types.Content(parts=[genai_types.Part(text=confirmation_text)])
+
+def skip_completed_research_callback(callback_context: CallbackContext) -> genai_types.Content | None:
+    """
+    Skips the iterative refinement loop when every knowledge node has already
+    been researched, e.g. by the parallel research stage, or when the research
+    schedule stopped on its budget or on a low expected yield.
+    """
+    session = callback_context._invocation_context.session
+    if (cache := get_brief_cache(session, callback_context.state)) is None:
+        return None
+
+    stopped = ResearchSchedule.from_state(callback_context.state).stopped
+    if stopped is not None and stopped in ("budget", "low_yield"):
+        logging.info(f"Research schedule stopped ({stopped}). Skipping the refinement loop.")
+        return genai_types.Content(
+            parts=[genai_types.Part(text=f"Research stopped early ({stopped}); the brief keeps the facts found so far.")]
+        )
+    if all(
+        node.research_status in (ResearchStatus.SATURATED, ResearchStatus.STALLED)
+        for node in cache.brief.knowledge_nodes
+    ):
+        logging.info("All knowledge nodes are complete. Skipping the refinement loop.")
+        return genai_types.Content(
+            parts=[genai_types.Part(text="All knowledge nodes have been researched.")]
+        )
+    return None
+
+
+def saturation_gate_callback(callback_context: CallbackContext) -> genai_types.Content | None:
+    """
+    Skips `research_evaluator` when the last research pass alone settles the
+    node's status (see `saturation_verdict`).
+
+    The node is marked SATURATED or STALLED and a passing evaluation is saved
+    under `research_evaluation`, so the loop and the parallel workers move on
+    exactly as if the evaluator had graded the pass. The delta is left in
+    place for them to record the pass's yield. Every decision is counted in
+    `evaluation_stats`.
+    """
+    state = callback_context.state
+    delta = state.get(RESEARCH_DELTA_KEY)
+    if not config.saturation_gate_enabled or not delta:
+        record_evaluation(state, skipped=False)
+        return None
+
+    status = saturation_verdict(delta)
+    session = callback_context._invocation_context.session
+    if status is None or (cache := get_brief_cache(session, state)) is None:
+        record_evaluation(state, skipped=False)
+        return None
+    if (node := get_brief_index(cache.brief).get_node(delta["node_title"])) is None:
+        record_evaluation(state, skipped=False)
+        return None
+
+    node.research_status = status
+    cache.mark_changed()
+    comment = (
+        f"Node '{node.node_title}' is {status.value}: the last pass added "
+        f"{delta['new_facts']} new facts and {delta['new_sources']} new sources."
+    )
+    state.update(cache.state_delta())
+    state["research_evaluation"] = Feedback(grade="pass", comment=comment).model_dump()
+    record_evaluation(state, skipped=True)
+    logging.info(f"Skipped evaluation. {comment}")
+    return genai_types.Content(role="model", parts=[genai_types.Part(text=comment)])
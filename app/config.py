@@ -12,22 +12,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import os
 from dataclasses import dataclass
 
-import google.auth
-
 # To use AI Studio credentials:
 # 1. Create a .env file in the /app directory with:
 #    GOOGLE_GENAI_USE_VERTEXAI=FALSE
 #    GOOGLE_API_KEY=PASTE_YOUR_ACTUAL_API_KEY_HERE
 # 2. This will override the default Vertex AI configuration
-_, project_id = google.auth.default()
-os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
 os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "global")
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
 
 
+@functools.cache
+def resolve_credentials() -> None:
+    """
+    Sets GOOGLE_CLOUD_PROJECT from the application default credentials.
+
+    Credential discovery may read files and query the metadata server, so it
+    is deferred until a model client is first built, rather than paid by every
+    import of the app. It runs once, and is skipped when a project is already
+    set or Vertex AI is not used.
+    """
+    if os.environ.get("GOOGLE_CLOUD_PROJECT"):
+        return
+    if os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "").lower() not in ("true", "1"):
+        return
+    import google.auth
+
+    _, project_id = google.auth.default()
+    if project_id:
+        os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
+
+
 @dataclass
 class ResearchConfiguration:
     """Configuration for research-related models and parameters.
@@ -37,12 +55,161 @@ class ResearchConfiguration:
         worker_model (str): Model for working/generation tasks.
         quick_model (str): Model for fast and simple tasks.
         max_search_iterations (int): Maximum search iterations allowed.
+        model_cascade_enabled (bool): Start the researcher and evaluator on the
+            lite model and escalate rejected answers to stronger tiers.
+        model_budget_seconds (float): Model wall time allowed to a brief
+            before answers are no longer escalated and calls are refused.
+        model_budget_tokens (int): Model tokens allowed to a brief, likewise.
+        max_parallel_nodes (int): Maximum number of knowledge nodes researched
+            concurrently by the parallel research stage.
+        max_passes_per_node (int): Research/evaluate passes a parallel worker
+            makes on a node before marking it as stalled.
+        research_scheduler_enabled (bool): Research nodes in order of their
+            expected yield instead of plan order.
+        research_budget_seconds (float): Wall time allowed to the research
+            stages of a brief before it is finalized as is; 0 for no limit.
+        scheduler_min_yield (float): Expected new facts per pass below which
+            the scheduler stops refining a brief.
+        scheduler_prior_yield (float): Expected yield of a first pass before
+            any pass of the brief has been observed.
+        search_cache_enabled (bool): Search through the cached
+            `google_search` tool rather than the built-in Google Search tool.
+        search_backend (str): "google" for grounded Gemini searches, "local"
+            to serve results from `search_fixtures_path`.
+        search_fixtures_path (str): JSON file of results by query for the
+            local search backend.
+        search_cache_path (str): SQLite file of the search cache.
+        search_cache_ttl (int): Seconds a cached search result stays valid.
+        search_cache_max_entries (int): Cached results kept before the least
+            recently used ones are evicted.
+        rate_limit_enabled (bool): Pace, retry and hedge model and search
+            calls through rate limiters.
+        rate_limit_rps (float): Initial and maximum calls per second of a
+            limiter not listed in `rate_limits`.
+        rate_limit_min_rps (float): Rate a limiter never throttles below.
+        rate_limit_increase (float): Calls per second added to a limiter's rate
+            per second of successful calls.
+        rate_limit_burst (int): Calls a limiter lets through at once.
+        rate_limit_max_retries (int): Retries of a throttled or transient
+            failed call.
+        rate_limit_backoff (float): Base delay in seconds of the exponential
+            retry backoff.
+        rate_limits (str): Per-limiter rates, as "name=rps,name=rps".
+        hedge_enabled (bool): Send a duplicate of calls slower than their
+            limiter's p95 latency.
+        hedge_min_samples (int): Calls a limiter must have seen before it
+            hedges.
+        hedge_budget (float): Maximum share of the calls that are hedged.
+        max_parallel_searches (int): Planned queries searched concurrently by
+            the query scheduler.
+        prefetch_search_queries (bool): Search the planned queries of every
+            node once before the parallel workers start.
+        speculative_prefetch (bool): Start the planned queries in the
+            background while the user is still reviewing the plan.
+        graph_max_edges_per_fact (int): Strongest edges kept in each fact's
+            `related_fact_ids`.
+        graph_edges_to_annotate (int): Strongest edges of the brief listed in
+            `fact_links`.
+        annotate_graph_edges (bool): Have the model describe the relationship
+            of the listed edges.
+        near_duplicate_threshold (float): See `DuplicatePolicy.threshold`.
+        near_duplicate_scope (str): See `DuplicatePolicy.scope`.
+        near_duplicate_keep (str): See `DuplicatePolicy.keep`.
+        saturation_gate_enabled (bool): Settle nodes whose last pass added
+            too little without calling the evaluator model.
+        saturation_significance (int): Narrative significance a new fact must
+            exceed to count as significant for the saturation gate.
+        saturation_min_significant_facts (int): Significant new facts a pass
+            must add for the node to stay open.
+        prompt_max_known_facts (int): Known facts listed in the researcher
+            and evaluator prompts, most significant first.
+        prompt_max_new_facts (int): New facts shown to the evaluator.
+        max_claims_per_source (int): Supported claims kept per source, most
+            confident first.
+        checkpoint_enabled (bool): Checkpoint research progress and resume
+            interrupted runs.
+        checkpoint_path (str): SQLite file of the checkpoints.
+        checkpoint_ttl (int): Seconds after which a checkpoint is ignored.
+        checkpoint_resume_idle (int): Seconds without a checkpoint after which
+            another session may resume the same run.
+        batch_concurrency (int): Subjects researched at once by `app.batch`.
+        trace_path (str): JSONL file the ADK servers write their trace spans
+            to; empty to disable tracing.
+        knowledge_base_enabled (bool): Record finalized briefs in the
+            knowledge base and seed new briefs from it.
+        knowledge_base_path (str): SQLite file of the knowledge base.
+        knowledge_base_max_facts (int): Known facts seeded into a node.
+        knowledge_base_min_facts (int): Seeded facts from which a node is
+            skipped, with `knowledge_base_skip_nodes`.
+        knowledge_base_skip_nodes (bool): Mark nodes seeded with enough facts
+            as saturated instead of researching them.
     """
 
     critic_model: str = os.environ.setdefault("PRO_MODEL","gemini-2.5-pro")
     worker_model: str = os.environ.setdefault("FLASH_MODEL","gemini-2.5-flash")
     lite_model : str = os.environ.setdefault("LITE_MODEL","gemini-2.5-flash-lite-preview-06-17")
     max_search_iterations: int = 5
+    model_cascade_enabled: bool = os.environ.get("MODEL_CASCADE_ENABLED", "True").lower() == "true"
+    model_budget_seconds: float = float(os.environ.get("MODEL_BUDGET_SECONDS", "1800"))
+    model_budget_tokens: int = int(os.environ.get("MODEL_BUDGET_TOKENS", "5000000"))
+    max_parallel_nodes: int = int(os.environ.get("MAX_PARALLEL_NODES", "4"))
+    max_passes_per_node: int = int(os.environ.get("MAX_PASSES_PER_NODE", "3"))
+    research_scheduler_enabled: bool = os.environ.get("RESEARCH_SCHEDULER_ENABLED", "True").lower() == "true"
+    research_budget_seconds: float = float(os.environ.get("RESEARCH_BUDGET_SECONDS", "0"))
+    scheduler_min_yield: float = float(os.environ.get("SCHEDULER_MIN_YIELD", "1"))
+    scheduler_prior_yield: float = float(os.environ.get("SCHEDULER_PRIOR_YIELD", "10"))
+    search_cache_enabled: bool = os.environ.get("SEARCH_CACHE_ENABLED", "True").lower() == "true"
+    search_backend: str = os.environ.get("SEARCH_BACKEND", "google")
+    search_fixtures_path: str = os.environ.get("SEARCH_FIXTURES_PATH", "")
+    search_cache_path: str = os.environ.get(
+        "SEARCH_CACHE_PATH",
+        os.path.expanduser("~/.cache/docu-researcher/search_cache.sqlite"),
+    )
+    search_cache_ttl: int = int(os.environ.get("SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+    search_cache_max_entries: int = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+    rate_limit_enabled: bool = os.environ.get("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    rate_limit_rps: float = float(os.environ.get("RATE_LIMIT_RPS", "10"))
+    rate_limit_min_rps: float = float(os.environ.get("RATE_LIMIT_MIN_RPS", "0.2"))
+    rate_limit_increase: float = float(os.environ.get("RATE_LIMIT_INCREASE", "0.5"))
+    rate_limit_burst: int = int(os.environ.get("RATE_LIMIT_BURST", "10"))
+    rate_limit_max_retries: int = int(os.environ.get("RATE_LIMIT_MAX_RETRIES", "5"))
+    rate_limit_backoff: float = float(os.environ.get("RATE_LIMIT_BACKOFF", "0.5"))
+    rate_limits: str = os.environ.get("RATE_LIMITS", "")
+    hedge_enabled: bool = os.environ.get("HEDGE_ENABLED", "True").lower() == "true"
+    hedge_min_samples: int = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+    hedge_budget: float = float(os.environ.get("HEDGE_BUDGET", "0.1"))
+    max_parallel_searches: int = int(os.environ.get("MAX_PARALLEL_SEARCHES", "8"))
+    prefetch_search_queries: bool = os.environ.get("PREFETCH_SEARCH_QUERIES", "True").lower() == "true"
+    speculative_prefetch: bool = os.environ.get("SPECULATIVE_PREFETCH", "False").lower() == "true"
+    graph_max_edges_per_fact: int = int(os.environ.get("GRAPH_MAX_EDGES_PER_FACT", "5"))
+    graph_edges_to_annotate: int = int(os.environ.get("GRAPH_EDGES_TO_ANNOTATE", "25"))
+    annotate_graph_edges: bool = os.environ.get("ANNOTATE_GRAPH_EDGES", "False").lower() == "true"
+    near_duplicate_threshold: float = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.6"))
+    near_duplicate_scope: str = os.environ.get("NEAR_DUPLICATE_SCOPE", "node")
+    near_duplicate_keep: str = os.environ.get("NEAR_DUPLICATE_KEEP", "higher_significance")
+    saturation_gate_enabled: bool = os.environ.get("SATURATION_GATE_ENABLED", "True").lower() == "true"
+    saturation_significance: int = int(os.environ.get("SATURATION_SIGNIFICANCE", "5"))
+    saturation_min_significant_facts: int = int(os.environ.get("SATURATION_MIN_SIGNIFICANT_FACTS", "2"))
+    prompt_max_known_facts: int = int(os.environ.get("PROMPT_MAX_KNOWN_FACTS", "30"))
+    prompt_max_new_facts: int = int(os.environ.get("PROMPT_MAX_NEW_FACTS", "20"))
+    max_claims_per_source: int = int(os.environ.get("MAX_CLAIMS_PER_SOURCE", "20"))
+    checkpoint_enabled: bool = os.environ.get("CHECKPOINT_ENABLED", "True").lower() == "true"
+    checkpoint_path: str = os.environ.get(
+        "CHECKPOINT_PATH",
+        os.path.expanduser("~/.cache/docu-researcher/checkpoints.sqlite"),
+    )
+    checkpoint_ttl: int = int(os.environ.get("CHECKPOINT_TTL", str(7 * 24 * 3600)))
+    checkpoint_resume_idle: int = int(os.environ.get("CHECKPOINT_RESUME_IDLE", "300"))
+    batch_concurrency: int = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+    trace_path: str = os.environ.get("TRACE_PATH", "")
+    knowledge_base_enabled: bool = os.environ.get("KNOWLEDGE_BASE_ENABLED", "True").lower() == "true"
+    knowledge_base_path: str = os.environ.get(
+        "KNOWLEDGE_BASE_PATH",
+        os.path.expanduser("~/.cache/docu-researcher/knowledge_base.sqlite"),
+    )
+    knowledge_base_max_facts: int = int(os.environ.get("KNOWLEDGE_BASE_MAX_FACTS", "30"))
+    knowledge_base_min_facts: int = int(os.environ.get("KNOWLEDGE_BASE_MIN_FACTS", "8"))
+    knowledge_base_skip_nodes: bool = os.environ.get("KNOWLEDGE_BASE_SKIP_NODES", "False").lower() == "true"
 
 
 config = ResearchConfiguration()
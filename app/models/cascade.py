@@ -0,0 +1,263 @@
+"""A tiered model cascade with a per-brief latency and token budget.
+
+Agents used to be wired to a single model, so the evaluator always paid
+pro-model latency and the researcher never got a stronger model when it kept
+producing invalid `NodeUpdate` JSON. CascadeLlm is an ADK model that tries its
+tiers from the cheapest up: a tier's answer is accepted if its validator
+accepts it, and the call is escalated to the next tier otherwise.
+
+Escalation stops once the brief's ModelBudget (wall time since its first call
+and total tokens) is spent mid-call, and the tier's answer is then accepted as
+is; calls made once the budget is spent are refused with a
+`MODEL_BUDGET_EXHAUSTED` error response, and the refinement loop stops.
+Budgets are bound to the calls of a brief by the `bind_model_budget`
+before-model callback, and also record per-tier call counts and latencies,
+saved in the `model_usage` state key by the `record_model_usage` after-model
+callback.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Callable, Mapping
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from pydantic import field_validator
+
+from app.config import config
+from app.schemas.brief import Feedback, NodeUpdate
+from app.utils.json_stream import parse_first
+from app.utils.tracing import tracer
+
+# Session state key holding the model usage of the brief being researched.
+MODEL_USAGE_KEY = "model_usage"
+# Budgets of the most recent briefs, by reference_id.
+_MAX_BUDGETS = 256
+# Error code of the responses to calls made once the budget is spent.
+BUDGET_EXHAUSTED = "MODEL_BUDGET_EXHAUSTED"
+
+Validator = Callable[[str], bool]
+
+
+@dataclass
+class TierStats:
+    """Calls made to one tier of a cascade."""
+    calls: int = 0
+    rejected: int = 0
+    errors: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "mean_seconds": round(self.seconds / self.calls, 3) if self.calls else 0.0,
+            "max_seconds": round(self.max_seconds, 3),
+        }
+
+
+@dataclass
+class ModelBudget:
+    """Wall time and token spend allowed to the model calls of one brief."""
+    max_seconds: float
+    max_tokens: int
+    started_at: float = field(default_factory=time.monotonic)
+    tokens: int = 0
+    # Calls refused because the budget was spent.
+    refused: int = 0
+    tiers: dict[str, TierStats] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def exhausted(self) -> bool:
+        return self.elapsed >= self.max_seconds or self.tokens >= self.max_tokens
+
+    def record(self, tier: str, seconds: float, tokens: int, accepted: bool, error: bool = False) -> None:
+        stats = self.tiers.setdefault(tier, TierStats())
+        stats.calls += 1
+        stats.rejected += not accepted and not error
+        stats.errors += error
+        stats.tokens += tokens
+        stats.seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        self.tokens += tokens
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "elapsed_seconds": round(self.elapsed, 3),
+            "tokens": self.tokens,
+            "exhausted": self.exhausted,
+            "refused": self.refused,
+            "tiers": {tier: stats.as_dict() for tier, stats in self.tiers.items()},
+        }
+
+
+_budgets: OrderedDict[str, ModelBudget] = OrderedDict()
+_current_budget: ContextVar[ModelBudget | None] = ContextVar("model_budget", default=None)
+
+
+def get_model_budget(key: str) -> ModelBudget:
+    """Returns the budget of a brief, starting it on first use."""
+    if (budget := _budgets.get(key)) is None:
+        budget = _budgets[key] = ModelBudget(
+            max_seconds=config.model_budget_seconds, max_tokens=config.model_budget_tokens
+        )
+        while len(_budgets) > _MAX_BUDGETS:
+            _budgets.popitem(last=False)
+    return budget
+
+
+def use_model_budget(budget: ModelBudget | None) -> None:
+    """Makes the budget apply to the model calls of the current task."""
+    _current_budget.set(budget)
+
+
+def _budget_of(callback_context: CallbackContext) -> ModelBudget:
+    brief = callback_context.state.get("documentary_brief")
+    if isinstance(brief, dict):
+        key = brief.get("reference_id")
+    else:
+        key = getattr(brief, "reference_id", None)
+    return get_model_budget(key or callback_context._invocation_context.session.id)
+
+
+def bind_model_budget(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    """Before-model callback binding the brief's budget to the upcoming model call."""
+    use_model_budget(_budget_of(callback_context))
+
+
+def record_model_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+    """After-model callback saving the brief's model usage, this call included, to state."""
+    callback_context.state[MODEL_USAGE_KEY] = _budget_of(callback_context).as_dict()
+
+
+def model_budget_exhausted(state: Mapping[str, Any]) -> bool:
+    """Whether the model usage saved in `state` shows the brief's budget spent."""
+    usage = state.get(MODEL_USAGE_KEY)
+    return isinstance(usage, dict) and bool(usage.get("exhausted"))
+
+
+def _text_of(responses: list[LlmResponse]) -> str:
+    return "".join(
+        part.text
+        for response in responses if response.content and response.content.parts
+        for part in response.content.parts if part.text and not part.thought
+    )
+
+
+def _calls_tools(responses: list[LlmResponse]) -> bool:
+    return any(
+        part.function_call
+        for response in responses if response.content and response.content.parts
+        for part in response.content.parts
+    )
+
+
+def _tokens_of(responses: list[LlmResponse]) -> int:
+    return sum(
+        (response.usage_metadata.total_token_count or 0)
+        for response in responses if response.usage_metadata
+    )
+
+
+class CascadeLlm(BaseLlm):
+    """
+    Tries each tier, cheapest first, escalating while the validator rejects
+    the answer and the brief's budget allows it. Calls made once the budget
+    is spent are refused.
+
+    Tool-call turns are accepted as they are; only final answers are
+    validated. Answers are generated without streaming, since a tier's answer
+    must be complete to be validated.
+    """
+    tiers: list[BaseLlm]
+    validator: Validator | None = None
+
+    @field_validator("tiers", mode="before")
+    @classmethod
+    def _resolve_tiers(cls, tiers: list[BaseLlm | str]) -> list[BaseLlm]:
+        return [LLMRegistry.new_llm(tier) if isinstance(tier, str) else tier for tier in tiers]
+
+    def _accepts(self, responses: list[LlmResponse]) -> bool:
+        if not responses or any(response.error_code for response in responses):
+            return False
+        if _calls_tools(responses):
+            return True
+        text = _text_of(responses)
+        return self.validator(text) if self.validator else bool(text)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        budget = _current_budget.get()
+        if budget is not None and budget.exhausted:
+            budget.refused += 1
+            yield LlmResponse(error_code=BUDGET_EXHAUSTED, error_message="The brief's model budget is spent.")
+            return
+        for position, tier in enumerate(self.tiers):
+            request = llm_request.model_copy(update={"model": tier.model})
+            started = time.monotonic()
+            error = None
+            with tracer.start_as_current_span(f"tier {tier.model}") as span:
+                try:
+                    responses = [r async for r in tier.generate_content_async(request, stream=False)]
+                except Exception as e:
+                    error, responses = e, []
+                    span.set_attribute("error", str(e))
+                accepted = error is None and self._accepts(responses)
+                span.set_attribute("accepted", accepted)
+                span.set_attribute("tokens", _tokens_of(responses))
+            if budget is not None:
+                budget.record(
+                    tier.model, time.monotonic() - started, _tokens_of(responses), accepted, error=error is not None
+                )
+            # The last tier, or the budget ran out during this call.
+            final = position == len(self.tiers) - 1 or (budget is not None and budget.exhausted)
+            if error is not None:
+                if final:
+                    raise error
+                logging.warning(f"Model '{tier.model}' failed, escalating: {error}")
+                continue
+
+            if accepted or final:
+                for response in responses:
+                    yield response
+                return
+            logging.info(f"Answer of '{tier.model}' rejected, escalating to the next tier.")
+
+
+def valid_node_update(text: str) -> bool:
+    """Accepts research answers holding a NodeUpdate."""
+    return parse_first(NodeUpdate, text) is not None
+
+
+def confident_feedback(text: str) -> bool:
+    """
+    Accepts evaluations holding a Feedback that either passes the node or
+    says how to fix it; a failing grade without follow-up queries is treated
+    as a low-confidence answer.
+    """
+    feedback = parse_first(Feedback, text)
+    return feedback is not None and (feedback.grade == "pass" or bool(feedback.follow_up_queries))
+
+
+def cascade(tiers: list[str], validator: Validator) -> BaseLlm | str:
+    """
+    Returns the model for an agent: a CascadeLlm over the tiers, or only the
+    strongest tier when the cascade is disabled.
+    """
+    if not config.model_cascade_enabled:
+        return tiers[-1]
+    return CascadeLlm(model=tiers[0], tiers=[LLMRegistry.new_llm(tier) for tier in tiers], validator=validator)
@@ -0,0 +1,116 @@
+"""A local, scripted model backend for offline runs and benchmarks.
+
+FakeLlm answers every request with the text returned by its `respond`
+function, after a fixed latency, and reports a fixed token usage. It never
+makes a network call, so cascades, budgets and agents can be exercised
+deterministically without credentials.
+
+FakeEndpoint stands in for a provider's API instead: it enforces a quota,
+answering the calls above it with a 429 as Gemini does, and injects
+random latency spikes and server errors, to exercise the rate limiter.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+
+Responder = Callable[[LlmRequest], str]
+
+
+def request_text(llm_request: LlmRequest) -> str:
+    """Concatenates the text of a request's contents."""
+    return "".join(
+        part.text or ""
+        for content in llm_request.contents
+        for part in (content.parts or [])
+    )
+
+
+class FakeLlm(BaseLlm):
+    """A model answering with scripted text after a fixed latency."""
+    respond: Responder
+    latency: float = 0.0
+    tokens_per_call: int = 100
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        yield LlmResponse(
+            content=genai_types.Content(
+                role="model", parts=[genai_types.Part(text=self.respond(llm_request))]
+            ),
+            usage_metadata=genai_types.GenerateContentResponseUsageMetadata(
+                total_token_count=self.tokens_per_call
+            ),
+        )
+
+
+@dataclass
+class EndpointStats:
+    """Calls received by a FakeEndpoint."""
+    calls: int = 0
+    throttled: int = 0
+    errors: int = 0
+    slow: int = 0
+
+
+class FakeEndpoint:
+    """
+    A local API accepting `quota_rps` calls per second, with the given
+    latency, a `slow_ratio` of calls taking `slow_latency` instead, and an
+    `error_ratio` of calls failing with a 500. It also serves as a search
+    backend.
+    """
+    def __init__(
+        self,
+        quota_rps: float,
+        latency: float = 0.05,
+        slow_ratio: float = 0.0,
+        slow_latency: float = 1.0,
+        error_ratio: float = 0.0,
+        seed: int = 0,
+    ):
+        self.quota_rps = quota_rps
+        self.latency = latency
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_latency
+        self.error_ratio = error_ratio
+        self.stats = EndpointStats()
+        self._rng = random.Random(seed)
+        self._accepted: deque[float] = deque()
+
+    async def call(self) -> str:
+        self.stats.calls += 1
+        now = time.monotonic()
+        while self._accepted and self._accepted[0] <= now - 1:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.quota_rps:
+            self.stats.throttled += 1
+            raise genai_errors.ClientError(
+                429, {"error": {"code": 429, "message": "Quota exceeded.", "status": "RESOURCE_EXHAUSTED"}}
+            )
+        self._accepted.append(now)
+        slow = self._rng.random() < self.slow_ratio
+        self.stats.slow += slow
+        await asyncio.sleep(self.slow_latency if slow else self.latency * self._rng.uniform(0.5, 1.5))
+        if self._rng.random() < self.error_ratio:
+            self.stats.errors += 1
+            raise genai_errors.ServerError(
+                500, {"error": {"code": 500, "message": "Internal error.", "status": "INTERNAL"}}
+            )
+        return "ok"
+
+    async def search(self, query: str) -> dict[str, Any]:
+        return {"query": query, "summary": await self.call(), "grounding_metadata": None}
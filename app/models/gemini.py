@@ -0,0 +1,62 @@
+"""Gemini, with Google Cloud credentials resolved on the first model call.
+
+The app used to resolve its credentials when `app.config` was imported, so
+every worker process, CLI and benchmark paid credential discovery, and none
+could import the app without credentials. This Gemini class resolves them
+when its API client is first built instead, and is registered in ADK's model
+registry in place of ADK's own, so every agent naming a Gemini model uses it.
+
+Its calls also go through the rate limiter of their model (see
+`app/utils/rate_limit.py`), which paces them, retries them when throttled and
+hedges slow ones. Streamed calls are only paced, as their first responses are
+already handed out when a retry or hedge would start.
+"""
+
+from collections.abc import AsyncGenerator
+from functools import cached_property
+
+from google.adk.models import LlmRequest, LlmResponse, google_llm
+from google.adk.models.registry import LLMRegistry
+from google.genai import Client
+
+from app.config import config, resolve_credentials
+from app.utils.rate_limit import get_rate_limiter, rate_limited
+
+
+class Gemini(google_llm.Gemini):
+    """ADK's Gemini model, resolving credentials before building its clients."""
+
+    @cached_property
+    def api_client(self) -> Client:
+        resolve_credentials()
+        return super().api_client
+
+    @cached_property
+    def _live_api_client(self) -> Client:
+        resolve_credentials()
+        return super()._live_api_client
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        generate = super().generate_content_async
+        model = llm_request.model or self.model
+        if stream:
+            if config.rate_limit_enabled:
+                await get_rate_limiter(model).bucket.acquire()
+            async for response in generate(llm_request, stream=True):
+                yield response
+            return
+
+        async def attempt() -> list[LlmResponse]:
+            # Gemini may append to the contents it sends, and retries and hedges resend them.
+            request = llm_request.model_copy(update={"contents": list(llm_request.contents)})
+            return [response async for response in generate(request)]
+
+        for response in await rate_limited(model, attempt):
+            yield response
+
+
+LLMRegistry.register(Gemini)
+# Model names resolved before the registration would keep ADK's class.
+LLMRegistry.resolve.cache_clear()
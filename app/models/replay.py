@@ -0,0 +1,250 @@
+"""Records the model calls of a run and replays them without a network.
+
+RecordingLlm wraps a real model and stores every request's responses,
+grounding metadata included, in a Recording; ReplayLlm serves them back. A
+request is matched on a key built from its model, system instruction and
+contents, with run-specific values (UUIDs, dates) masked out, so a replayed
+run of the same conversation finds its answers even though its brief has a
+new reference_id. Requests that no longer match exactly, e.g. after a prompt
+change, fall back to the next unused recorded call of the same agent and model
+and are counted as misses.
+
+`wrap_models` swaps the models of a whole agent tree, cascade tiers and
+agents used as tools included, for recording or replaying ones, and returns a
+function putting the original models back. Agents are module-level
+singletons, so `models_wrapped`, `record_models` and `replay_models` are
+context managers that restore them on exit.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections import defaultdict
+from collections.abc import AsyncGenerator, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types as genai_types
+
+from .cascade import CascadeLlm
+
+# Run-specific values masked out of request keys.
+_VOLATILE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|\d{4}-\d{2}-\d{2}(?:[T ][\d:.]+(?:[+-]\d{2}:\d{2}|Z)?)?"
+)
+# Characters of the system instruction identifying the calling agent.
+_FINGERPRINT_CHARS = 200
+
+
+def _mask(text: str) -> str:
+    return _VOLATILE.sub("#", text)
+
+
+def _system_instruction(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return instruction if isinstance(instruction, str) else ""
+
+
+def _part_text(part: genai_types.Part) -> str:
+    if part.text:
+        return part.text
+    if part.function_call:
+        return f"call:{part.function_call.name}:{json.dumps(part.function_call.args, sort_keys=True, default=str)}"
+    if part.function_response:
+        response = json.dumps(part.function_response.response, sort_keys=True, default=str)
+        return f"response:{part.function_response.name}:{response}"
+    return ""
+
+
+def fingerprint(llm_request: LlmRequest) -> str:
+    """Identifies the agent and model a request comes from."""
+    return f"{llm_request.model}|{_mask(_system_instruction(llm_request)[:_FINGERPRINT_CHARS])}"
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """A stable key of a request, ignoring run-specific values."""
+    text = "\n".join(
+        f"{content.role}:{_part_text(part)}"
+        for content in llm_request.contents
+        for part in (content.parts or [])
+    )
+    payload = f"{llm_request.model}\n{_system_instruction(llm_request)}\n{text}"
+    return hashlib.sha256(_mask(payload).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RecordedCall:
+    """The responses recorded for one model request."""
+    key: str
+    fingerprint: str
+    responses: list[dict[str, Any]]
+
+
+@dataclass
+class Recording:
+    """The model calls, search results and user messages of a run."""
+    messages: list[str] = field(default_factory=list)
+    calls: list[RecordedCall] = field(default_factory=list)
+    searches: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "messages": self.messages,
+                    "calls": [call.__dict__ for call in self.calls],
+                    "searches": self.searches,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            messages=data.get("messages", []),
+            calls=[RecordedCall(**call) for call in data.get("calls", [])],
+            searches=data.get("searches", {}),
+        )
+
+
+class RecordingLlm(BaseLlm):
+    """Passes requests to a real model and records its responses."""
+    inner: BaseLlm
+    recording: Recording
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        # Keys are computed before the call, as the model may edit the request.
+        key, print_ = request_key(llm_request), fingerprint(llm_request)
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            responses.append(response.model_dump(mode="json", exclude_none=True))
+            yield response
+        self.recording.calls.append(RecordedCall(key=key, fingerprint=print_, responses=responses))
+
+
+class RecordingPlayer:
+    """Hands out the recorded calls of a Recording, each at most once."""
+    def __init__(self, recording: Recording):
+        self.hits = 0
+        self.misses = 0
+        self._by_key: dict[str, list[RecordedCall]] = defaultdict(list)
+        self._by_fingerprint: dict[str, list[RecordedCall]] = defaultdict(list)
+        self._used: set[int] = set()
+        for call in recording.calls:
+            self._by_key[call.key].append(call)
+            self._by_fingerprint[call.fingerprint].append(call)
+
+    def _take(self, calls: list[RecordedCall]) -> RecordedCall | None:
+        for call in calls:
+            if id(call) not in self._used:
+                self._used.add(id(call))
+                return call
+        return None
+
+    def take(self, llm_request: LlmRequest) -> RecordedCall:
+        """Returns the recorded call answering a request."""
+        if call := self._take(self._by_key.get(request_key(llm_request), [])):
+            self.hits += 1
+            return call
+        if call := self._take(self._by_fingerprint.get(fingerprint(llm_request), [])):
+            self.misses += 1
+            logging.warning(f"No exact recording for a '{llm_request.model}' request, replaying the next one.")
+            return call
+        raise LookupError(f"No recorded call left for a '{llm_request.model}' request.")
+
+
+class ReplayLlm(BaseLlm):
+    """Answers requests with the responses of a Recording."""
+    player: RecordingPlayer
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        for response in self.player.take(llm_request).responses:
+            yield LlmResponse.model_validate(response)
+
+
+ModelWrapper = Callable[[BaseLlm], BaseLlm]
+
+
+def wrap_models(agent: BaseAgent, wrap: ModelWrapper) -> Callable[[], None]:
+    """
+    Replaces the model of every LlmAgent under `agent`, including agents
+    used as tools, with `wrap(model)`. The tiers of a CascadeLlm are wrapped
+    one by one, so the cascade itself still runs.
+
+    Returns:
+        Callable[[], None]: Restores the models replaced.
+    """
+    seen: set[int] = set()
+    wrapped: dict[int, BaseLlm] = {}
+    undo: list[Callable[[], None]] = []
+
+    def wrap_once(model: BaseLlm) -> BaseLlm:
+        if id(model) not in wrapped:
+            wrapped[id(model)] = wrap(model)
+        return wrapped[id(model)]
+
+    def visit(agent: BaseAgent) -> None:
+        if id(agent) in seen:
+            return
+        seen.add(id(agent))
+        if isinstance(agent, LlmAgent):
+            model = agent.canonical_model
+            if isinstance(model, CascadeLlm):
+                tiers = model.tiers
+                model.tiers = [wrap_once(tier) for tier in tiers]
+                undo.append(lambda: setattr(model, "tiers", tiers))
+            else:
+                original = agent.model
+                agent.model = wrap_once(model)
+                undo.append(lambda: setattr(agent, "model", original))
+            for tool in agent.tools:
+                if isinstance(tool, AgentTool):
+                    visit(tool.agent)
+        for sub_agent in agent.sub_agents:
+            visit(sub_agent)
+
+    visit(agent)
+
+    def restore() -> None:
+        while undo:
+            undo.pop()()
+
+    return restore
+
+
+@contextmanager
+def models_wrapped(agent: BaseAgent, wrap: ModelWrapper) -> Iterator[None]:
+    """Wraps the models under `agent` (see `wrap_models`) until the block exits."""
+    restore = wrap_models(agent, wrap)
+    try:
+        yield
+    finally:
+        restore()
+
+
+@contextmanager
+def record_models(agent: BaseAgent, recording: Recording) -> Iterator[None]:
+    """Makes every model under `agent` record its calls into `recording` until the block exits."""
+    with models_wrapped(agent, lambda model: RecordingLlm(model=model.model, inner=model, recording=recording)):
+        yield
+
+
+@contextmanager
+def replay_models(agent: BaseAgent, recording: Recording) -> Iterator[RecordingPlayer]:
+    """Makes every model under `agent` answer from `recording` until the block exits."""
+    player = RecordingPlayer(recording)
+    with models_wrapped(agent, lambda model: ReplayLlm(model=model.model, player=player)):
+        yield player
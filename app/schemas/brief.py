@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Literal, List
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Literal, List
 from enum import Enum
 import datetime
 
@@ -57,6 +57,16 @@ class KnowledgeNode(BaseModel):
     top_sources: list[TopSource] = Field(default_factory=list)
     fact_points: list[FactPoint] = Field(default_factory=list)
 
+class FactLink(BaseModel):
+    """A scored edge of the knowledge graph between two related facts."""
+    source_fact_id: str
+    target_fact_id: str
+    score: float = Field(description="Strength of the connection, computed from shared entities, categories and axes.")
+    relationship: str | None = Field(
+        default=None,
+        description="An optional one-sentence description of how the two facts are connected.",
+    )
+
 class DocumentaryBrief(BaseModel):
     """The final, comprehensive JSON data file that tracks the entire research process."""
     reference_id: str = Field(description="The unique reference ID for this research task.")
@@ -65,6 +75,10 @@ class DocumentaryBrief(BaseModel):
     narrative_summary: str
     # This is now a simple, flat list of knowledge nodes.
     knowledge_nodes: list[KnowledgeNode]
+    # The strongest edges of the knowledge graph, filled in by the brief finalizer.
+    fact_links: list[FactLink] = Field(default_factory=list)
+    # Lookup indexes maintained by app.utils.brief_index; never serialized.
+    _index: Any = PrivateAttr(default=None)
 
 class NodeUpdate(BaseModel):
     """A model to hold the research results for a single KnowledgeNode."""
@@ -79,6 +93,16 @@ class SearchQuery(BaseModel):
         description="A highly specific and targeted query for web search."
     )
 
+class EdgeAnnotation(BaseModel):
+    """A description of how two linked facts relate to each other."""
+    source_fact_id: str
+    target_fact_id: str
+    relationship: str = Field(description="One sentence describing the narrative connection between the two facts.")
+
+class EdgeAnnotations(BaseModel):
+    """Model for the annotations of the strongest knowledge graph edges."""
+    annotations: list[EdgeAnnotation]
+
 class Feedback(BaseModel):
     """Model for providing evaluation feedback on research quality."""
 
@@ -0,0 +1,73 @@
+"""The ADK API server of the app, with incremental state updates on /run_sse.
+
+Serves the same API as `adk api_server`. A `/run_sse` request sent with an
+`X-State-Patches: 1` header gets the stream's events with their brief,
+`sources` and `url_to_short_id` state deltas as JSON Patch operations (see
+`app.utils.state_patch`); other clients get the events unchanged.
+
+    python -m app.server --port 8000
+"""
+
+import argparse
+import os
+
+from google.adk.cli.fast_api import get_fast_api_app
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.state_patch import StatePatcher
+
+# Request header opting a /run_sse stream into state patches.
+PATCH_HEADER = b"x-state-patches"
+
+
+class StatePatchMiddleware:
+    """ASGI middleware rewriting the SSE events of opted-in /run_sse streams."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].endswith("/run_sse")
+            or dict(scope["headers"]).get(PATCH_HEADER) != b"1"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        patcher = StatePatcher()
+        buffer = b""
+
+        async def send_patched(message: Message) -> None:
+            nonlocal buffer
+            if message["type"] == "http.response.start":
+                # The patched body has a different length.
+                headers = [(name, value) for name, value in message.get("headers", []) if name.lower() != b"content-length"]
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                *events, buffer = (buffer + message.get("body", b"")).split(b"\n\n")
+                if not message.get("more_body", False) and buffer:
+                    events.append(buffer)
+                    buffer = b""
+                body = b"".join(patcher.patch_sse(event) + b"\n\n" for event in events)
+                message = {**message, "body": body}
+            await send(message)
+
+        await self.app(scope, receive, send_patched)
+
+
+app = get_fast_api_app(
+    agents_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    allow_origins=["*"],
+    web=False,
+)
+app.add_middleware(StatePatchMiddleware)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
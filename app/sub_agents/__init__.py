@@ -1 +1,2 @@
-
+# Every agent naming a Gemini model gets the lazily authenticated one.
+from app.models import gemini  # noqa: F401
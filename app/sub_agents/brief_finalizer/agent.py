@@ -1,18 +1,121 @@
-from app.config import config
-from . import prompt
+import logging
+from collections.abc import AsyncGenerator
 
-# --- Correct ADK and GenAI imports ---
-from google.adk.agents import LlmAgent
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types as genai_types
+from pydantic import ValidationError
 
-# Import the two schemas we will be working with
-from app.schemas.brief import DocumentaryBrief
+from app.config import config
+from app.schemas.brief import DocumentaryBrief, EdgeAnnotations
+from app.utils.checkpoints import finish_checkpoint
+from app.utils.graph_linker import LinkScoring, link_facts
+from app.utils.knowledge_base import record_brief
 
+from . import prompt
 
-brief_finalizer = LlmAgent(
+# Optional model pass that only describes the strongest edges; it never sees
+# or regenerates the full brief.
+edge_annotator = LlmAgent(
     model=config.worker_model,
-    name="brief_finalizer",
-    description="Assembles the final, complete DocumentaryBrief JSON object and constructs the knowledge graph.",
+    name="edge_annotator",
+    description="Describes the narrative connection of the strongest knowledge graph edges.",
     instruction=prompt.INSTRUCTION,
-    output_schema=DocumentaryBrief,
-    output_key="final_documentary_brief",
-)
\ No newline at end of file
+    output_schema=EdgeAnnotations,
+    output_key="graph_edge_annotations",
+    # The edges to annotate are in the instruction; the conversation history
+    # would only add tokens.
+    include_contents="none",
+)
+
+
+class BriefFinalizerAgent(BaseAgent):
+    """
+    Assembles the final DocumentaryBrief: links related facts locally through
+    an inverted index, optionally asks the model to annotate the strongest
+    edges, stores the result as `final_documentary_brief`, adds its facts
+    to the knowledge base and deletes the run's checkpoint.
+    """
+    def __init__(self, name: str = "brief_finalizer", scoring: LinkScoring | None = None):
+        super().__init__(
+            name=name,
+            description="Assembles the final, complete DocumentaryBrief JSON object and constructs the knowledge graph.",
+            sub_agents=[edge_annotator],
+        )
+        self._scoring = scoring or LinkScoring(max_edges_per_fact=config.graph_max_edges_per_fact)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        brief_data = ctx.session.state.get("documentary_brief")
+        if not brief_data:
+            logging.warning(f"[{self.name}] 'documentary_brief' not found. Nothing to finalize.")
+            yield Event(author=self.name)
+            return
+
+        try:
+            brief = DocumentaryBrief.model_validate(brief_data).model_copy(deep=True)
+        except ValidationError as e:
+            logging.error(f"[{self.name}] Could not validate documentary_brief: {e}")
+            yield Event(author=self.name)
+            return
+
+        brief.fact_links = link_facts(brief, self._scoring, max_links=config.graph_edges_to_annotate)
+        logging.info(
+            f"[{self.name}] Linked facts with "
+            f"{sum(len(f.related_fact_ids) for n in brief.knowledge_nodes for f in n.fact_points)} edges."
+        )
+
+        if config.annotate_graph_edges and brief.fact_links:
+            async for event in self._annotate(ctx, brief):
+                yield event
+
+        # Later briefs on overlapping subjects start from these facts.
+        await record_brief(brief)
+        # The run is complete: running the plan again researches it afresh.
+        await finish_checkpoint(ctx.session)
+
+        yield Event(
+            author=self.name,
+            content=genai_types.Content(
+                role="model", parts=[genai_types.Part(text=brief.model_dump_json())]
+            ),
+            actions=EventActions(
+                state_delta={"final_documentary_brief": brief.model_dump(mode="json")}
+            ),
+        )
+
+    async def _annotate(self, ctx: InvocationContext, brief: DocumentaryBrief) -> AsyncGenerator[Event, None]:
+        """Runs the edge annotator on the brief's strongest edges and applies its labels."""
+        descriptions = {
+            fact.fact_id: fact.description
+            for node in brief.knowledge_nodes
+            for fact in node.fact_points
+        }
+        edges = "\n".join(
+            f"{link.source_fact_id} -> {link.target_fact_id}: "
+            f"{descriptions[link.source_fact_id]} || {descriptions[link.target_fact_id]}"
+            for link in brief.fact_links
+        )
+        yield Event(
+            author=self.name,
+            actions=EventActions(state_delta={"graph_edges_to_annotate": edges}),
+        )
+        async for event in edge_annotator.run_async(ctx):
+            yield event
+
+        try:
+            annotations = EdgeAnnotations.model_validate(
+                ctx.session.state.get("graph_edge_annotations") or {"annotations": []}
+            )
+        except ValidationError as e:
+            logging.error(f"[{self.name}] Ignoring invalid edge annotations: {e}")
+            return
+        relationships = {
+            (a.source_fact_id, a.target_fact_id): a.relationship
+            for a in annotations.annotations
+        }
+        for link in brief.fact_links:
+            link.relationship = relationships.get((link.source_fact_id, link.target_fact_id))
+
+
+brief_finalizer = BriefFinalizerAgent()
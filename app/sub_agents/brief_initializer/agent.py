@@ -0,0 +1,96 @@
+import logging
+import uuid
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from pydantic import ValidationError
+
+from app.callbacks import display_confirmation_callback
+from app.schemas.brief import DocumentaryBrief, KnowledgeNode, ResearchStatus
+from app.schemas.narrative import NarrativePlan
+from app.utils.checkpoints import CHECKPOINT_KEY, checkpoint_key, resume_checkpoint
+from app.utils.knowledge_base import KNOWLEDGE_BASE_STATS_KEY, seed_brief
+from app.utils.research_scheduler import RESEARCH_SCHEDULE_KEY, ResearchSchedule
+
+
+def build_brief(plan: NarrativePlan, subject: str) -> DocumentaryBrief:
+    """Creates the skeleton DocumentaryBrief for an approved plan, with every node pending."""
+    return DocumentaryBrief(
+        reference_id=str(uuid.uuid4()),
+        subject=subject,
+        narrative_summary=plan.narrative_summary,
+        knowledge_nodes=[
+            KnowledgeNode(
+                node_title=node.node_title,
+                rationale=node.rationale,
+                axis=node.axis,
+                research_status=ResearchStatus.PENDING,
+            )
+            for node in plan.knowledge_nodes
+        ],
+    )
+
+
+class BriefInitializerAgent(BaseAgent):
+    """
+    Initializes the `documentary_brief` from the approved `research_plan`,
+    seeded with the known facts of earlier briefs, or restores it from the
+    checkpoint of an interrupted run of the same plan.
+
+    This is a pure data transformation, so it is done directly instead of
+    through a model call: titles are copied verbatim, which keeps them
+    matching the titles researchers report in their NodeUpdates.
+    """
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        plan_data = ctx.session.state.get("research_plan")
+        if not plan_data:
+            logging.warning(f"[{self.name}] 'research_plan' not found. Cannot initialize the brief.")
+            yield Event(author=self.name)
+            return
+
+        try:
+            plan = NarrativePlan.model_validate(plan_data)
+        except ValidationError as e:
+            logging.error(f"[{self.name}] Could not validate research_plan: {e}")
+            yield Event(author=self.name)
+            return
+
+        subject = ctx.session.state.get("research_subject", "")
+        key = checkpoint_key(plan_data, subject)
+        state_delta: dict[str, Any] = {CHECKPOINT_KEY: key}
+        if checkpoint := await resume_checkpoint(key, ctx.session.id):
+            # Resume an unfinished run of the same plan: completed nodes are
+            # skipped by the research stages.
+            brief = checkpoint.brief
+            state_delta["research_evaluation"] = checkpoint.research_evaluation
+            done = sum(
+                node.research_status in (ResearchStatus.SATURATED, ResearchStatus.STALLED)
+                for node in brief.knowledge_nodes
+            )
+            logging.info(
+                f"[{self.name}] Resumed brief '{brief.reference_id}' from its checkpoint, "
+                f"with {done} of {len(brief.knowledge_nodes)} nodes complete."
+            )
+        else:
+            brief = build_brief(plan, subject)
+            # Nodes already covered by earlier briefs start from their facts.
+            stats = await seed_brief(brief, {node.node_title: node.search_queries for node in plan.knowledge_nodes})
+            state_delta[KNOWLEDGE_BASE_STATS_KEY] = stats
+            logging.info(
+                f"[{self.name}] Initialized brief '{brief.reference_id}' with {len(brief.knowledge_nodes)} nodes "
+                f"({stats['facts_seeded']} known facts seeded, {stats['nodes_skipped']} nodes already covered)."
+            )
+        state_delta["documentary_brief"] = brief.model_dump()
+        # Every run of the pipeline gets a fresh research budget.
+        state_delta[RESEARCH_SCHEDULE_KEY] = ResearchSchedule().as_dict()
+        yield Event(author=self.name, actions=EventActions(state_delta=state_delta))
+
+
+brief_initializer = BriefInitializerAgent(
+    name="brief_initializer",
+    description="Initializes the DocumentaryBrief structure from the approved research plan.",
+    after_agent_callback=display_confirmation_callback,
+)
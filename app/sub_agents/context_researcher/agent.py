@@ -1,7 +1,7 @@
 from app.config import config
 
 from google.adk.agents import LlmAgent
-from google.adk.tools import google_search
+from app.tools import search_tool
 from .prompt import INSTRUCTION
 
 context_researcher = LlmAgent(
@@ -9,5 +9,5 @@ context_researcher = LlmAgent(
     name="context_researcher",
     description="Clarifies ambiguous topics by performing a web search.",
     instruction=INSTRUCTION,
-    tools=[google_search], # This agent can use tools.
+    tools=[search_tool], # This agent can use tools.
 )
\ No newline at end of file
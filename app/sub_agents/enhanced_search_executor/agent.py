@@ -1,5 +1,5 @@
 from google.adk.agents import LlmAgent
-from google.adk.tools import google_search
+from app.tools import search_tool
 from google.adk.planners import BuiltInPlanner
 from google.genai import types as genai_types
 
@@ -16,7 +16,7 @@ enhanced_search_executor = LlmAgent(
         thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
     ),
     instruction=prompt.INSTRUCTION,
-    tools=[google_search],
+    tools=[search_tool],
     output_key="node_research_results",
     after_agent_callback=callbacks.update_brief_with_research_callback,
 )
\ No newline at end of file
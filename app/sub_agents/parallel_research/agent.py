@@ -0,0 +1,346 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.sessions import Session
+from google.genai import types as genai_types
+from pydantic import ValidationError
+
+from app.config import config
+from app.schemas.brief import DocumentaryBrief, KnowledgeNode, ResearchStatus
+from app.schemas.narrative import NarrativePlan
+from app.tools.query_scheduler import QueryScheduler
+from app.tools.search_cache import google_search
+from app.tools.speculative_prefetch import (
+    SPECULATION_STATS_KEY,
+    take_speculative_prefetch,
+)
+from app.utils.checkpoints import save_checkpoint
+from app.utils.node_context import SEARCH_RESULTS_KEY
+from app.utils.research_scheduler import RESEARCH_SCHEDULE_KEY, ResearchSchedule
+from app.utils.saturation import (
+    EVALUATION_STATS_KEY,
+    RESEARCH_DELTA_KEY,
+    add_evaluation_stats,
+)
+from app.utils.source_registry import (
+    SOURCES_KEY,
+    URL_TO_SHORT_ID_KEY,
+    SourceRegistry,
+    get_source_registry,
+)
+
+# Sentinel pushed on the event queue when a worker has finished.
+_WORKER_DONE = object()
+
+
+class ParallelResearchStage(BaseAgent):
+    """
+    Researches every pending knowledge node concurrently, under a configurable
+    concurrency limit.
+
+    Each worker runs the researcher and the evaluator against its own
+    node-scoped state slice: an isolated copy of the session whose
+    `documentary_brief` only contains the node being researched. Workers never
+    write to the shared session state; their results are merged back into the
+    `documentary_brief` in plan order once every worker has finished, so the
+    outcome does not depend on which node completes first. The sources each
+    worker collected are merged into the session's source registry in the same
+    order.
+
+    Workers start in the order of the research schedule, thinnest nodes and
+    axes first, and stop making passes once the research budget is spent,
+    leaving their node pending (see app.utils.research_scheduler).
+    """
+    def __init__(
+        self,
+        researcher: BaseAgent,
+        evaluator: BaseAgent,
+        name: str = "parallel_research_stage",
+        max_concurrency: int | None = None,
+        max_passes: int | None = None,
+    ):
+        super().__init__(name=name)
+        self._researcher = researcher
+        self._evaluator = evaluator
+        self._max_concurrency = max_concurrency or config.max_parallel_nodes
+        self._max_passes = max_passes or config.max_passes_per_node
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        brief_data = ctx.session.state.get("documentary_brief")
+        if not brief_data:
+            logging.warning(f"[{self.name}] 'documentary_brief' not found. Skipping parallel research.")
+            yield Event(author=self.name)
+            return
+
+        try:
+            brief = DocumentaryBrief.model_validate(brief_data)
+        except ValidationError as e:
+            logging.error(f"[{self.name}] Could not validate documentary_brief: {e}")
+            yield Event(author=self.name)
+            return
+
+        schedule = ResearchSchedule.from_state(ctx.session.state)
+        ranks = {node.node_title: rank for rank, (_, _, node) in enumerate(schedule.ranked(brief))}
+        # Workers queue on the semaphore in the order they are created.
+        pending = sorted(
+            (
+                index for index, node in enumerate(brief.knowledge_nodes)
+                if node.research_status == ResearchStatus.PENDING
+            ),
+            key=lambda index: ranks.get(brief.knowledge_nodes[index].node_title, len(ranks)),
+        )
+        if not pending:
+            yield Event(author=self.name)
+            return
+
+        logging.info(
+            f"[{self.name}] Researching {len(pending)} nodes with up to "
+            f"{self._max_concurrency} concurrent workers."
+        )
+        queries = _search_queries_by_title(ctx.session.state.get("research_plan"))
+        # Start the planned queries of every pending node, once per unique
+        # query and in rank order; each worker waits for its own results only.
+        scheduled = None
+        # Searches started while the user reviewed the plan are reused.
+        speculative = take_speculative_prefetch(ctx.session.id)
+        if config.search_cache_enabled and config.prefetch_search_queries:
+            titles = [brief.knowledge_nodes[index].node_title for index in pending]
+            search = speculative.search if speculative else google_search
+            scheduled = QueryScheduler(search).start({title: queries.get(title, []) for title in titles})
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        results: dict[int, KnowledgeNode] = {}
+        worker_stats: list[dict[str, int] | None] = []
+        worker_sources: dict[int, dict[str, dict]] = {}
+
+        async def worker(index: int) -> None:
+            node = brief.knowledge_nodes[index]
+            try:
+                search_results = await scheduled.results_for(node.node_title) if scheduled else []
+                async with semaphore:
+                    results[index], stats, worker_sources[index] = await self._research_node(
+                        ctx,
+                        index,
+                        node,
+                        brief,
+                        search_results,
+                        queue,
+                        schedule,
+                    )
+                    worker_stats.append(stats)
+                # Checkpoint the nodes finished so far, in plan order.
+                await save_checkpoint(ctx.session, brief.model_copy(update={
+                    "knowledge_nodes": [
+                        results.get(position, other) for position, other in enumerate(brief.knowledge_nodes)
+                    ],
+                }))
+            except Exception:
+                # The node stays pending, for the refinement loop to pick up.
+                logging.exception(
+                    f"[{self.name}] Worker for node '{node.node_title}' failed; leaving it to the refinement loop."
+                )
+            finally:
+                await queue.put(_WORKER_DONE)
+
+        tasks = [asyncio.create_task(worker(index)) for index in pending]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is _WORKER_DONE:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            if scheduled:
+                scheduled.cancel()
+            if speculative:
+                # Queries of nodes no longer pending, e.g. seeded from the knowledge base.
+                speculative.cancel()
+
+        # Merge in plan order so the resulting brief and source ids are
+        # deterministic.
+        registry = get_source_registry(ctx.session)
+        for index in sorted(results):
+            brief.knowledge_nodes[index] = results[index]
+            registry.merge(worker_sources[index])
+
+        await save_checkpoint(ctx.session, brief)
+
+        # Worker state is discarded, so carry their evaluation counts over.
+        evaluation_stats = add_evaluation_stats(
+            ctx.session.state.get(EVALUATION_STATS_KEY), *worker_stats
+        )
+        logging.info(
+            f"[{self.name}] Merged results for {len(results)} of {len(pending)} nodes "
+            f"({evaluation_stats['skipped']} evaluations skipped locally, "
+            f"{len(registry.sources)} sources)."
+        )
+        state_delta: dict[str, Any] = {
+            "documentary_brief": brief.model_dump(),
+            EVALUATION_STATS_KEY: evaluation_stats,
+            RESEARCH_SCHEDULE_KEY: schedule.as_dict(),
+            **registry.state_delta(),
+        }
+        if scheduled is not None:
+            state_delta["query_stats"] = scheduled.stats.as_dict()
+        if speculative:
+            state_delta[SPECULATION_STATS_KEY] = speculative.stats.as_dict()
+        yield Event(author=self.name, actions=EventActions(state_delta=state_delta))
+
+    async def _research_node(
+        self,
+        ctx: InvocationContext,
+        index: int,
+        node: KnowledgeNode,
+        brief: DocumentaryBrief,
+        search_results: list[dict],
+        queue: asyncio.Queue,
+        schedule: ResearchSchedule,
+    ) -> tuple[KnowledgeNode, dict[str, int] | None, dict[str, dict]]:
+        """
+        Runs research/evaluate passes for a single node in an isolated session,
+        recording each pass in the research schedule.
+
+        Returns:
+            tuple: The researched node, the worker's evaluation counters and
+                the sources it collected, by short id.
+        """
+        node_brief = brief.model_copy(
+            update={"knowledge_nodes": [node.model_copy(deep=True)]}
+        )
+        # The researcher and evaluator read their node's context from this
+        # state through app.utils.node_context.
+        worker_state: dict[str, Any] = {
+            "documentary_brief": node_brief,
+            "research_plan": ctx.session.state.get("research_plan"),
+            # The worker's own source registry, merged back by the stage.
+            SOURCES_KEY: {},
+            URL_TO_SHORT_ID_KEY: {},
+        }
+        worker_session = ctx.session.model_copy(
+            update={"state": worker_state, "events": []}
+        )
+        if search_results:
+            # Prefetched sources are registered like searched ones, so the
+            # model sees their short ids.
+            registry = get_source_registry(worker_session)
+            worker_state[SEARCH_RESULTS_KEY] = [
+                _compact_search_result(result, registry) for result in search_results
+            ]
+        branch = f"{ctx.branch}.{self.name}" if ctx.branch else self.name
+        worker_ctx = ctx.model_copy(
+            update={"session": worker_session, "branch": f"{branch}.node_{index}"}
+        )
+
+        status = ResearchStatus.STALLED
+        for _ in range(self._max_passes):
+            if schedule.over_budget:
+                # Left to a resumed run; the brief keeps what was found so far.
+                logging.info(f"[{self.name}] Research budget spent before a pass on '{node.node_title}'.")
+                status = ResearchStatus.PENDING
+                break
+            started = time.monotonic()
+            worker_session.events.append(_node_task_event(worker_ctx, node.node_title))
+            for agent in (self._researcher, self._evaluator):
+                async for event in agent.run_async(worker_ctx):
+                    _append_to_worker_session(worker_session, event)
+                    await queue.put(event)
+            delta = worker_session.state.get(RESEARCH_DELTA_KEY)
+            schedule.record_pass(node.node_title, delta["new_facts"] if delta else 0, time.monotonic() - started)
+
+            # The saturation gate may have settled the node without an evaluation.
+            gated = _node_status(worker_session)
+            if gated in (ResearchStatus.SATURATED, ResearchStatus.STALLED):
+                status = gated
+                break
+            evaluation = worker_session.state.get("research_evaluation") or {}
+            if evaluation.get("grade") == "pass":
+                status = ResearchStatus.SATURATED
+                break
+
+        researched = DocumentaryBrief.model_validate(worker_session.state["documentary_brief"])
+        result = researched.knowledge_nodes[0]
+        result.research_status = status
+        logging.info(
+            f"[{self.name}] Node '{result.node_title}' finished as "
+            f"{result.research_status.value} with {len(result.fact_points)} facts."
+        )
+        return (
+            result,
+            worker_session.state.get(EVALUATION_STATS_KEY),
+            worker_session.state.get(SOURCES_KEY) or {},
+        )
+
+
+def _node_status(session: Session) -> ResearchStatus:
+    """Returns the research status of a worker session's single node."""
+    brief = DocumentaryBrief.model_validate(session.state["documentary_brief"])
+    return brief.knowledge_nodes[0].research_status
+
+
+def _search_queries_by_title(plan_data: Any) -> dict[str, list[str]]:
+    """Maps each planned node title to its search queries."""
+    if not plan_data:
+        return {}
+    try:
+        plan = NarrativePlan.model_validate(plan_data)
+    except ValidationError:
+        return {}
+    return {node.node_title: node.search_queries for node in plan.knowledge_nodes}
+
+
+def _compact_search_result(result: dict, registry: SourceRegistry) -> dict:
+    """
+    Keeps the summary and the web sources of a google_search result,
+    registering the sources and their claims in `registry`.
+    """
+    grounding_metadata = genai_types.GroundingMetadata.model_validate(result.get("grounding_metadata") or {})
+    short_ids = registry.add_grounding(grounding_metadata)
+    chunks = grounding_metadata.grounding_chunks or []
+    return {
+        "query": result.get("query"),
+        "summary": result.get("summary", ""),
+        "sources": [
+            {"short_id": short_id, "title": web.title, "url": web.uri}
+            for idx, short_id in short_ids.items()
+            if (web := chunks[idx].web) is not None
+        ],
+    }
+
+
+def _node_task_event(ctx: InvocationContext, node_title: str) -> Event:
+    """Builds the user turn that assigns a worker its node."""
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author="user",
+        branch=ctx.branch,
+        content=genai_types.Content(
+            role="user",
+            parts=[genai_types.Part(text=f"Research the knowledge node '{node_title}'.")],
+        ),
+    )
+
+
+def _append_to_worker_session(session: Session, event: Event) -> None:
+    """
+    Mirrors what the session service does for the runner's session: applies the
+    event's state delta to the worker's slice and records it in its history.
+
+    The delta is then cleared so the shared session state is never written by
+    a worker when the runner persists the event.
+    """
+    if event.partial:
+        return
+    if event.actions and event.actions.state_delta:
+        session.state.update(event.actions.state_delta)
+        event.actions.state_delta = {}
+    session.events.append(event)
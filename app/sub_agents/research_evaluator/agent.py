@@ -2,14 +2,25 @@ from app.config import config
 
 from google.adk.agents import LlmAgent
 
+from app.callbacks import saturation_gate_callback
+from app.models.cascade import bind_model_budget, cascade, confident_feedback, record_model_usage
 from app.schemas.brief import Feedback
+from app.utils.node_context import node_instruction, scope_prompt_callback
 from . import prompt
 
 research_evaluator = LlmAgent(
-    model=config.critic_model,
+    # Starts on the lite model and only escalates, through the worker model up
+    # to the critic model, while the evaluation is invalid or fails without
+    # saying what to fix.
+    model=cascade([config.lite_model, config.worker_model, config.critic_model], confident_feedback),
     name="research_evaluator",
     description="Critiques the fact collection for a node and checks for research saturation.",
-    instruction=prompt.INSTRUCTION,
+    # Only the active node and the facts of the last pass are sent, not the brief.
+    instruction=node_instruction(prompt.INSTRUCTION, include_new_facts=True),
     output_schema=Feedback,
     output_key="research_evaluation",
+    # Settles passes that added nothing significant without a model call.
+    before_agent_callback=saturation_gate_callback,
+    before_model_callback=[bind_model_budget, scope_prompt_callback],
+    after_model_callback=record_model_usage,
 )
\ No newline at end of file
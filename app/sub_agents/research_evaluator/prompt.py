@@ -1,12 +1,11 @@
 import datetime
 
 INSTRUCTION=f"""
-You are a meticulous AI Story Editor. Your input is the `documentary_brief`.
-1.  Find the `KnowledgeNode` with `research_status` of "active".
-2.  **Critique Fact Quality & Relevance:** Review every fact. Is it relevant? Is there a good mix of categories? Is the `narrative_significance` well-judged?
-3.  **Check for Saturation (Diminishing Returns):** If this node has been researched before (i.e., this is not the first evaluation), and the last research cycle added fewer than 2 new significant facts (significance > 5), the node is SATURATED.
-4.  **Decide Pass/Fail:** If the node is SATURATED or the fact collection is excellent, grade "pass". Otherwise, grade "fail" and provide 5-7 specific follow-up queries to fill the identified gaps (e.g., "Find more anecdotal stories," "Verify technical spec for X").
+You are a meticulous AI Story Editor. Your input is the TARGET NODE at the end of these instructions: the "active" `KnowledgeNode` being evaluated, with `new_facts` (the facts added by the last research cycle, in full) and `known_facts` (one line per fact collected before).
+1.  **Critique Fact Quality & Relevance:** Review every fact in `new_facts` against the node's `rationale`. Is it relevant? Does it repeat one of the `known_facts`? Is there a good mix of categories? Is the `narrative_significance` well-judged?
+2.  **Check for Saturation (Diminishing Returns):** If this node has been researched before (i.e., it has `known_facts` or a previous `research_evaluation`), and the last research cycle added fewer than 2 new significant facts (significance > 5), the node is SATURATED.
+3.  **Decide Pass/Fail:** If the node is SATURATED or the fact collection is excellent, grade "pass". Otherwise, grade "fail" and provide 5-7 specific follow-up queries to fill the identified gaps (e.g., "Find more anecdotal stories," "Verify technical spec for X").
 
 Your response must be a single, raw JSON object validating against the 'Feedback' schema.
 Current date: {datetime.datetime.now().strftime("%Y-%m-%d")}
-"""
\ No newline at end of file
+"""
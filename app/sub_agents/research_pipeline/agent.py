@@ -1,69 +1,71 @@
 import logging
+import time
 from collections.abc import AsyncGenerator
 
 from google.adk.agents import SequentialAgent, LoopAgent, BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
-from pydantic import ValidationError
 
-from app.schemas.brief import DocumentaryBrief, ResearchStatus
-from app.sub_agents.section_planner.agent import section_planner
+from app.schemas.brief import ResearchStatus
+from app.sub_agents.brief_initializer.agent import brief_initializer
 # Import the new unified researcher
 from app.sub_agents.unified_researcher.agent import unified_researcher
 from app.sub_agents.research_evaluator.agent import research_evaluator
 from app.sub_agents.brief_finalizer.agent import brief_finalizer
+from app.sub_agents.parallel_research.agent import ParallelResearchStage
+from app.callbacks import skip_completed_research_callback
+from app.models.cascade import model_budget_exhausted
+from app.utils.brief_cache import get_brief_cache
+from app.utils.checkpoints import save_checkpoint
+from app.utils.research_scheduler import RESEARCH_SCHEDULE_KEY, ResearchSchedule
+from app.utils.saturation import RESEARCH_DELTA_KEY
 
 # --- AGENT DEFINITIONS ---
 
 class LoopConfigAgent(BaseAgent):
     """
-    Sets the max_iterations for the refinement loop dynamically based on the
-    number of knowledge nodes in the research plan.
+    Caps the passes of the refinement loop based on the number of open
+    knowledge nodes and the research budget left, and schedules the loop's
+    first node. The cap is kept in the session's research schedule, for the
+    EscalationChecker to enforce, so concurrent sessions never share it.
     """
-    def __init__(self, loop_agent: LoopAgent, name: str = "loop_config_agent"):
-        super().__init__(name=name)
-        self._loop_agent = loop_agent
-
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        brief_data = ctx.session.state.get("documentary_brief")
-        if not brief_data:
-            logging.warning(f"[{self.name}] 'documentary_brief' not found. Using default loop iterations.")
+        if (cache := get_brief_cache(ctx.session)) is None:
+            logging.warning(f"[{self.name}] No valid 'documentary_brief' found. Using default loop iterations.")
             yield Event(author=self.name)
             return
 
-        try:
-            brief = DocumentaryBrief.model_validate(brief_data)
-            num_nodes = len(brief.knowledge_nodes)
-            # Allow up to 3 passes per node as a generous buffer.
-            new_max_iterations = num_nodes * 3
-            self._loop_agent.max_iterations = new_max_iterations
-            logging.info(f"[{self.name}] Dynamically set max_iterations to {new_max_iterations} for {num_nodes} nodes.")
-        except Exception as e:
-            logging.error(f"[{self.name}] Failed to set loop iterations: {e}")
-        
-        yield Event(author=self.name)
+        # Nodes completed by the parallel research stage need no more passes.
+        num_nodes = sum(
+            node.research_status not in (ResearchStatus.SATURATED, ResearchStatus.STALLED)
+            for node in cache.brief.knowledge_nodes
+        )
+        schedule = ResearchSchedule.from_state(ctx.session.state)
+        if schedule.choose(cache.brief) is None:
+            logging.info(f"[{self.name}] Research schedule stopped ({schedule.stopped}).")
+        schedule.step_started_at = time.time()
+        schedule.start_loop(num_nodes)
+        logging.info(f"[{self.name}] Capped the refinement loop at {schedule.max_loop_passes} passes for {num_nodes} open nodes.")
+        yield Event(author=self.name, actions=EventActions(state_delta={RESEARCH_SCHEDULE_KEY: schedule.as_dict()}))
 
 
 class EscalationChecker(BaseAgent):
     """
     Checks if all research nodes are complete. If they are, it escalates to
-    stop the loop. It also updates the status of the last-evaluated node.
+    stop the loop. It also updates the status of the last-evaluated node,
+    checkpoints the brief and asks the research schedule for the next node,
+    escalating as well when the schedule stops on its budget, on a low
+    expected yield or on the loop's pass cap, or the brief's model budget is
+    spent.
     """
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        brief_data = ctx.session.state.get("documentary_brief")
         evaluation = ctx.session.state.get("research_evaluation")
 
-        if not brief_data:
-            logging.warning(f"[{self.name}] Brief not found. Cannot check for completion.")
-            yield Event(author=self.name)
-            return
-
-        try:
-            brief = DocumentaryBrief.model_validate(brief_data)
-        except ValidationError as e:
-            logging.error(f"[{self.name}] Could not validate documentary_brief: {e}")
-            yield Event(author=self.name)
+        if (cache := get_brief_cache(ctx.session)) is None:
+            logging.warning(f"[{self.name}] No valid brief found. Escalating to stop the loop.")
+            yield Event(author=self.name, actions=EventActions(escalate=True))
             return
+        brief = cache.brief
 
         # Update the status of the just-evaluated node, if there was an evaluation
         if evaluation:
@@ -71,34 +73,72 @@ class EscalationChecker(BaseAgent):
                 if node.research_status == ResearchStatus.ACTIVE:
                     if evaluation.get("grade") == "pass":
                         node.research_status = ResearchStatus.SATURATED
+                        cache.mark_changed()
                         logging.info(f"[{self.name}] Node '{node.node_title}' marked as SATURATED.")
                     else:
                         logging.info(f"[{self.name}] Node '{node.node_title}' remains ACTIVE for refinement.")
                     break
 
-        all_nodes_complete = all(
-            node.research_status in [ResearchStatus.SATURATED, ResearchStatus.STALLED]
-            for node in brief.knowledge_nodes
-        )
-
-        ctx.session.state["documentary_brief"] = brief
-
-        if all_nodes_complete:
+        schedule = ResearchSchedule.from_state(ctx.session.state)
+        delta = ctx.session.state.get(RESEARCH_DELTA_KEY)
+        if title := (delta["node_title"] if delta else schedule.next_node):
+            seconds = time.time() - schedule.step_started_at if schedule.step_started_at else None
+            schedule.record_pass(title, delta["new_facts"] if delta else 0, seconds)
+        schedule.loop_passes += 1
+
+        next_node = schedule.choose(brief)
+        if next_node is not None and schedule.loop_exhausted():
+            next_node, schedule.next_node, schedule.stopped = None, None, "iterations"
+        elif next_node is not None and model_budget_exhausted(ctx.session.state):
+            # Model calls would be refused from now on.
+            next_node, schedule.next_node, schedule.stopped = None, None, "model_budget"
+        if next_node is not None and next_node.research_status == ResearchStatus.PENDING:
+            # Switching nodes: the node under refinement waits for its turn again.
+            for node in brief.knowledge_nodes:
+                if node.research_status == ResearchStatus.ACTIVE:
+                    node.research_status = ResearchStatus.PENDING
+                    cache.mark_changed()
+                    logging.info(f"[{self.name}] Node '{node.node_title}' set back to PENDING for '{next_node.node_title}'.")
+        schedule.step_started_at = time.time()
+
+        # Checkpoint every step so an interrupted run resumes from here.
+        await save_checkpoint(ctx.session, brief, evaluation)
+        # Only a changed brief is written back, as the validated object.
+        state_delta = cache.state_delta()
+        state_delta[RESEARCH_SCHEDULE_KEY] = schedule.as_dict()
+        if next_node is not None and next_node.research_status == ResearchStatus.PENDING:
+            # The evaluation was of the previous node.
+            state_delta["research_evaluation"] = None
+
+        if schedule.stopped == "complete":
             logging.info(f"[{self.name}] All research nodes are complete. Escalating to stop loop.")
-            yield Event(author=self.name, actions=EventActions(escalate=True))
+            yield Event(author=self.name, actions=EventActions(escalate=True, state_delta=state_delta))
+        elif schedule.stopped:
+            logging.info(f"[{self.name}] Research schedule stopped ({schedule.stopped}). Escalating to finalize the brief.")
+            yield Event(author=self.name, actions=EventActions(escalate=True, state_delta=state_delta))
         else:
             logging.info(f"[{self.name}] Research nodes still pending. Loop will continue.")
-            yield Event(author=self.name)
+            yield Event(author=self.name, actions=EventActions(state_delta=state_delta))
 
-# Define the LoopAgent instance so we can pass it to the config agent.
+# The loop's pass cap is per session, set by LoopConfigAgent and enforced by
+# the EscalationChecker; max_iterations is only a safeguard.
 iterative_refinement_loop = LoopAgent(
     name="iterative_refinement_loop",
-    max_iterations=50,  # Default safeguard, overridden by LoopConfigAgent
+    max_iterations=500,
     sub_agents=[
         unified_researcher,     # Performs initial OR refinement research
         research_evaluator,     # Always evaluates the work done
         EscalationChecker(name="escalation_checker"), # Checks if we're all done
     ],
+    # Nothing left to refine when the parallel stage completed every node.
+    before_agent_callback=skip_completed_research_callback,
+)
+
+# Researches all pending nodes concurrently before the serial loop, which then
+# only picks up nodes whose parallel worker failed.
+parallel_research_stage = ParallelResearchStage(
+    researcher=unified_researcher,
+    evaluator=research_evaluator,
 )
 
 # Define the final, improved research pipeline.
@@ -106,8 +146,9 @@ research_pipeline = SequentialAgent(
     name="research_pipeline",
     description="Executes the approved research plan by initializing a brief, iteratively gathering facts, and then composing a final JSON brief.",
     sub_agents=[
-        section_planner,
-        LoopConfigAgent(loop_agent=iterative_refinement_loop),
+        brief_initializer,
+        parallel_research_stage,
+        LoopConfigAgent(name="loop_config_agent"),
         iterative_refinement_loop,
         brief_finalizer,
     ],
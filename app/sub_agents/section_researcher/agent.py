@@ -1,7 +1,7 @@
 from app.config import config
 
 from google.adk.agents import LlmAgent
-from google.adk.tools import google_search
+from app.tools import search_tool
 from google.genai import types as genai_types
 from google.adk.planners import BuiltInPlanner
 
@@ -16,7 +16,7 @@ section_researcher = LlmAgent(
         thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
     ),
     instruction=prompt.INSTRUCTION,
-    tools=[google_search],
+    tools=[search_tool],
     output_key="node_research_results",
     after_agent_callback=callbacks.update_brief_with_research_callback,
 )
\ No newline at end of file
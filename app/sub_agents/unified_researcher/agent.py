@@ -1,14 +1,17 @@
 from app.config import config
 from google.adk.agents import LlmAgent
-from google.adk.tools import google_search
+from app.tools import search_tool
 from google.genai import types as genai_types
 from google.adk.planners import BuiltInPlanner
 from app import callbacks
+from app.models.cascade import bind_model_budget, cascade, record_model_usage, valid_node_update
+from app.utils.node_context import node_instruction, scope_prompt_callback
 from . import prompt
 
 # This new agent combines the logic of both previous research agents.
 unified_researcher = LlmAgent(
-    model=config.lite_model,
+    # Escalates to the worker model when the answer is not a valid NodeUpdate.
+    model=cascade([config.lite_model, config.worker_model], valid_node_update),
     name="unified_researcher",
     description=(
         "Performs research on a knowledge node. If it's the first attempt, "
@@ -18,9 +21,15 @@ unified_researcher = LlmAgent(
     planner=BuiltInPlanner(
         thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
     ),
-    instruction=prompt.INSTRUCTION,
-    tools=[google_search],
+    # The target node is selected in Python and only its context is sent.
+    instruction=node_instruction(prompt.INSTRUCTION),
+    tools=[search_tool],
     output_key="node_research_results",
     # The same callback can be used as it just updates the brief.
-    after_agent_callback=callbacks.update_brief_with_research_callback,
+    after_agent_callback=[
+        callbacks.update_brief_with_research_callback,
+        callbacks.collect_research_sources_callback,
+    ],
+    before_model_callback=[bind_model_budget, scope_prompt_callback],
+    after_model_callback=record_model_usage,
 )
\ No newline at end of file
@@ -1,16 +1,17 @@
 INSTRUCTION = """
-You are a highly efficient research agent. Your primary goal is to gather information for a single `KnowledgeNode` from the `documentary_brief`.
+You are a highly efficient research agent. Your primary goal is to gather information for a single `KnowledgeNode`: the TARGET NODE described at the end of these instructions.
 
 **YOUR CONDITIONAL LOGIC:**
 
-1.  **Identify the Target Node:**
-    *   First, look for any `KnowledgeNode` with a `research_status` of "active". This is your top priority.
-    *   If no nodes are "active", find the *first* `KnowledgeNode` with a `research_status` of "pending".
-    *   The `node_title` of this target node is what you will use in your final JSON output.
+1.  **Know the Target Node:**
+    *   The TARGET NODE gives the node's `node_title`, `rationale`, `axis` and `research_status`. Use its `node_title` verbatim in your final JSON output.
+    *   `known_facts` lists the facts already collected for this node, one line each. Do NOT extract them again, even reworded.
+    *   A "pending" node may already have `known_facts`, carried over from earlier briefs. Skip the queries they already answer and search for what they do not cover.
 
 2.  **Determine Research Type (Initial vs. Refinement):**
-    *   **IF** the target node's status is "active", it means it has been evaluated and requires refinement. Look for the `research_evaluation` object in the state. Execute **ONLY** the `follow_up_queries` provided in that evaluation.
-    *   **ELSE** (the node's status is "pending"), this is the initial research pass. Execute the `search_queries` listed within the target `KnowledgeNode` itself.
+    *   **IF** the target node's status is "active", it has been evaluated and requires refinement. Execute **ONLY** the `follow_up_queries` of its `research_evaluation`.
+    *   **ELSE** (the node's status is "pending"), this is the initial research pass. Execute its `search_queries`.
+    *   If the target node comes with `search_results`, those queries have already been executed for you: use their summaries and sources directly and do NOT search for them again. Only use the `google_search` tool for gaps they leave.
 
 3.  **Execute and Synthesize:**
     *   Use the `google_search` tool to execute all the queries you identified in the previous step.
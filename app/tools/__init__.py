@@ -0,0 +1,12 @@
+from google.adk.tools import FunctionTool
+from google.adk.tools import google_search as builtin_google_search
+
+from app.config import config
+
+from .search_cache import google_search
+
+# The tool given to every researcher: the cached function tool by default, or
+# the model's built-in Google Search when the cache is disabled.
+search_tool = (
+    FunctionTool(google_search) if config.search_cache_enabled else builtin_google_search
+)
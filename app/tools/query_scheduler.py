@@ -0,0 +1,133 @@
+"""Runs the planned search queries of a whole brief once each.
+
+Nodes of a plan often ask for the same query, or for trivial variants of it
+("Apollo 11 landing" / "apollo 11 landing?"). The QueryScheduler normalizes
+and dedupes the queries of every node, runs each unique query once through the
+cached `google_search` tool under a concurrency limit, and fans the results
+out to every node that asked for it. `start` returns as soon as the searches
+are started, so each node's worker can await its own results and begin while
+the searches of other nodes still run. Follow-up queries issued later by the
+researchers are deduplicated by the search cache and its in-flight sharing.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import config
+
+from .search_cache import google_search, normalize_query
+
+SearchFunction = Callable[[str], Awaitable[dict[str, Any]]]
+
+
+@dataclass
+class QueryStats:
+    """Query counts of a scheduler run."""
+    requested: int = 0
+    unique: int = 0
+    failed: int = 0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Share of the requested queries that did not need their own search."""
+        return 1 - self.unique / self.requested if self.requested else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requested": self.requested,
+            "unique": self.unique,
+            "failed": self.failed,
+            "dedup_ratio": round(self.dedup_ratio, 3),
+        }
+
+
+class ScheduledQueries:
+    """The searches of a scheduler run, awaited node by node."""
+    def __init__(
+        self, tasks: dict[str, asyncio.Task[dict[str, Any] | None]], keys_by_node: dict[str, list[str]], stats: QueryStats
+    ):
+        self._tasks = tasks
+        self._keys_by_node = keys_by_node
+        self.stats = stats
+
+    async def results_for(self, title: str) -> list[dict[str, Any]]:
+        """
+        Waits for the queries of a node only, and returns their results in
+        the node's query order, without the queries that failed.
+        """
+        results = []
+        for key in self._keys_by_node.get(title, []):
+            if (result := await self._tasks[key]) is not None:
+                results.append(result)
+        return results
+
+    async def wait(self) -> dict[str, list[dict[str, Any]]]:
+        """Waits for every query and returns the results of each node."""
+        return {title: await self.results_for(title) for title in self._keys_by_node}
+
+    def cancel(self) -> None:
+        """Cancels the searches still running, e.g. once no worker needs them."""
+        for task in self._tasks.values():
+            task.cancel()
+
+
+class QueryScheduler:
+    """Runs the unique queries of several nodes with bounded concurrency."""
+    def __init__(self, search: SearchFunction = google_search, max_concurrency: int | None = None):
+        self._search = search
+        self._max_concurrency = max_concurrency or config.max_parallel_searches
+
+    def start(self, queries_by_node: dict[str, list[str]]) -> ScheduledQueries:
+        """
+        Starts every unique query of `queries_by_node` once, in the order of
+        the nodes, which is the order they run in under the concurrency limit.
+        """
+        unique: dict[str, str] = {}
+        keys_by_node: dict[str, list[str]] = {}
+        for title, queries in queries_by_node.items():
+            keys = keys_by_node[title] = []
+            for query in queries:
+                key = normalize_query(query)
+                unique.setdefault(key, query)
+                if key not in keys:
+                    keys.append(key)
+        stats = QueryStats(
+            requested=sum(len(queries) for queries in queries_by_node.values()),
+            unique=len(unique),
+        )
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def search(query: str) -> dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    return await self._search(query)
+                except Exception as e:
+                    logging.error(f"Scheduled search for '{query}' failed: {e}")
+                    stats.failed += 1
+                    return None
+
+        loop = asyncio.get_running_loop()
+        tasks = {key: loop.create_task(search(query)) for key, query in unique.items()}
+        logging.info(
+            f"Running {stats.unique} unique queries for {stats.requested} requested "
+            f"({stats.dedup_ratio:.0%} deduplicated)."
+        )
+        return ScheduledQueries(tasks, keys_by_node, stats)
+
+    async def run(
+        self, queries_by_node: dict[str, list[str]]
+    ) -> tuple[dict[str, list[dict[str, Any]]], QueryStats]:
+        """
+        Runs every unique query of `queries_by_node` once and waits for all
+        of them.
+
+        Returns:
+            tuple: The results for each node, in the node's query order and
+            without the queries that failed, and the run's QueryStats.
+        """
+        scheduled = self.start(queries_by_node)
+        return await scheduled.wait(), scheduled.stats
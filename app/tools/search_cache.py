@@ -0,0 +1,326 @@
+"""A persistent, TTL-bounded cache in front of Google Search.
+
+The built-in `google_search` tool runs inside the model call, so its results
+can never be reused. This module exposes a `google_search` function tool with
+the same name instead: every query is normalized, looked up in a local SQLite
+store and, on a miss, executed by a search backend whose answer (summary text
+and grounding metadata) is cached for `config.search_cache_ttl` seconds.
+Empty answers, e.g. from a blocked or failed grounding call, are not cached.
+The store is read and written from a worker thread, off the event loop.
+
+Two backends are available, selected with the `SEARCH_BACKEND` env var:
+    - "google" (default): a single grounded Gemini call per query.
+    - "local": serves results from a JSON fixtures file, for tests and offline
+      runs. Unknown queries return an empty result.
+
+RecordingSearchBackend wraps either one to record such a fixtures file, and
+RateLimitedSearchBackend sends the queries of the "google" backend through
+its rate limiter (see `app/utils/rate_limit.py`).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Protocol
+
+from google.genai import types as genai_types
+
+from app.config import config, resolve_credentials
+from app.utils.rate_limit import rate_limited
+from app.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from google import genai
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query so trivially different spellings, down to trailing
+    punctuation, share a cache entry. The query scheduler and the speculative
+    prefetcher dedupe queries on the same key.
+    """
+    return re.sub(r"[\s?.!,;:]+$", "", re.sub(r"\s+", " ", query).strip().lower())
+
+
+def _cache_key(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+def is_empty_result(result: dict[str, Any]) -> bool:
+    """True for a search result with neither a summary nor grounding sources."""
+    return not result.get("summary") and not result.get("grounding_metadata")
+
+
+@dataclass
+class SearchCacheStats:
+    """Counters for a SearchCache instance."""
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SearchCache:
+    """
+    An on-disk search result store keyed on normalized query text.
+
+    Entries older than `ttl_seconds` are treated as misses, and the least
+    recently used entries are evicted once the store grows past `max_entries`.
+    """
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = SearchCacheStats()
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_results ("
+            " key TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_results_accessed"
+            " ON search_results (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, query: str) -> dict[str, Any] | None:
+        """Returns the cached result for a query, or None on a miss."""
+        key = _cache_key(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM search_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM search_results WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE search_results SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats.hits += 1
+        return json.loads(payload)
+
+    def put(self, query: str, result: dict[str, Any]) -> None:
+        """Stores a result, evicting the least recently used entries if needed."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results"
+                " (key, query, payload, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (_cache_key(query), normalize_query(query), json.dumps(result), now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM search_results WHERE key IN ("
+                    " SELECT key FROM search_results ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats.evictions += overflow
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM search_results")
+            self._conn.commit()
+
+
+class SearchBackend(Protocol):
+    """Executes a single search query and returns its summary and grounding metadata."""
+    async def search(self, query: str) -> dict[str, Any]: ...
+
+
+class GroundedSearchBackend:
+    """Runs a query as a single Gemini call grounded with Google Search."""
+    def __init__(self, model: str):
+        self.model = model
+        self._client: genai.Client | None = None
+
+    async def search(self, query: str) -> dict[str, Any]:
+        if self._client is None:
+            from google import genai
+            resolve_credentials()
+            self._client = genai.Client()
+
+        response = await self._client.aio.models.generate_content(
+            model=self.model,
+            contents=query,
+            config=genai_types.GenerateContentConfig(
+                tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())]
+            ),
+        )
+        grounding_metadata = None
+        if response.candidates and response.candidates[0].grounding_metadata:
+            grounding_metadata = response.candidates[0].grounding_metadata.model_dump(
+                mode="json", exclude_none=True
+            )
+        return {
+            "query": query,
+            "summary": response.text or "",
+            "grounding_metadata": grounding_metadata,
+        }
+
+
+class LocalSearchBackend:
+    """
+    Serves search results from a JSON file mapping queries to results, each
+    with a `summary` and an optional `grounding_metadata` object.
+    """
+    def __init__(self, fixtures_path: str | None = None):
+        self.calls = 0
+        self._results: dict[str, dict[str, Any]] = {}
+        if fixtures_path and os.path.exists(fixtures_path):
+            with open(fixtures_path, encoding="utf-8") as f:
+                for query, result in json.load(f).items():
+                    self._results[normalize_query(query)] = result
+
+    def add(self, query: str, summary: str, grounding_metadata: dict[str, Any] | None = None) -> None:
+        self._results[normalize_query(query)] = {
+            "summary": summary,
+            "grounding_metadata": grounding_metadata,
+        }
+
+    async def search(self, query: str) -> dict[str, Any]:
+        self.calls += 1
+        result = self._results.get(normalize_query(query), {})
+        return {
+            "query": query,
+            "summary": result.get("summary", ""),
+            "grounding_metadata": result.get("grounding_metadata"),
+        }
+
+
+class RecordingSearchBackend:
+    """
+    Passes queries to another backend and records their results, in the
+    fixtures format read by LocalSearchBackend.
+    """
+    def __init__(self, inner: SearchBackend, results: dict[str, dict[str, Any]] | None = None):
+        self.inner = inner
+        self.results = results if results is not None else {}
+
+    async def search(self, query: str) -> dict[str, Any]:
+        result = await self.inner.search(query)
+        self.results[normalize_query(query)] = {
+            "summary": result.get("summary", ""),
+            "grounding_metadata": result.get("grounding_metadata"),
+        }
+        return result
+
+
+class RateLimitedSearchBackend:
+    """Passes queries to another backend through the rate limiter named `name`."""
+    def __init__(self, inner: SearchBackend, name: str | None = None):
+        self.inner = inner
+        self.name = name or type(inner).__name__
+
+    async def search(self, query: str) -> dict[str, Any]:
+        return await rate_limited(self.name, lambda: self.inner.search(query))
+
+
+_cache: SearchCache | None = None
+_backend: SearchBackend | None = None
+# Searches being executed, by cache key, so concurrent identical queries (e.g.
+# from parallel workers) share a single backend call.
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+def get_search_cache() -> SearchCache:
+    """Returns the process-wide search cache, opening it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(
+            config.search_cache_path,
+            ttl_seconds=config.search_cache_ttl,
+            max_entries=config.search_cache_max_entries,
+        )
+    return _cache
+
+
+def get_search_backend() -> SearchBackend:
+    """Returns the process-wide search backend selected by `config.search_backend`."""
+    global _backend
+    if _backend is None:
+        if config.search_backend == "local":
+            _backend = LocalSearchBackend(config.search_fixtures_path)
+        else:
+            _backend = RateLimitedSearchBackend(GroundedSearchBackend(config.lite_model))
+    return _backend
+
+
+def set_search_backend(backend: SearchBackend | None, cache: SearchCache | None = None) -> None:
+    """Overrides the search backend and cache, e.g. with a LocalSearchBackend in tests."""
+    global _backend, _cache
+    _backend = backend
+    if cache is not None:
+        _cache = cache
+
+
+async def google_search(query: str) -> dict[str, Any]:
+    """Searches the web with Google Search and returns a summary of the results.
+
+    Args:
+        query: A single, specific search query. Advanced operators such as
+            "exact phrase", site: and filetype: are supported.
+
+    Returns:
+        A dict with the search `summary` and the `grounding_metadata` listing
+        the web sources the summary is based on.
+    """
+    cache = get_search_cache()
+    with tracer.start_as_current_span("search google_search") as span:
+        span.set_attribute("query", query)
+        cached = await asyncio.to_thread(cache.get, query)
+        span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            result = cached
+        else:
+            key = _cache_key(query)
+            if (pending := _in_flight.get(key)) is not None:
+                span.set_attribute("shared", True)
+                return await asyncio.shield(pending)
+            pending = _in_flight[key] = asyncio.ensure_future(get_search_backend().search(query))
+            try:
+                result = await asyncio.shield(pending)
+            finally:
+                _in_flight.pop(key, None)
+            # An empty answer is retried on the next search rather than kept for the TTL.
+            if not is_empty_result(result):
+                await asyncio.to_thread(cache.put, query, result)
+    logging.debug(
+        f"Search for '{query}' ({cache.stats.hits} hits / {cache.stats.misses} misses)."
+    )
+    return result
@@ -0,0 +1,155 @@
+"""Speculative search prefetch while the user reviews the research plan.
+
+The planned queries of a plan only ran once the user approved it, so the
+minutes a user spends reading the plan were idle, and research then started
+by waiting on the very searches the plan had announced. With
+`SPECULATIVE_PREFETCH=True`, `save_plan_to_state_callback` hands every new
+plan to the session's SpeculativePrefetch, which runs the plan's unique
+queries in the background, through the cached `google_search` tool, and
+stages their results.
+
+When the plan is edited, staged and in-flight queries still in the new plan
+are kept, and the others are cancelled or discarded. On approval, the
+parallel research stage takes the session's prefetch and its QueryScheduler
+searches through it, so the staged results are promoted to the workers, and
+queries still in flight are awaited rather than sent again. Prefetches are
+kept by session id, as the session object is rebuilt for each request, for
+the `_MAX_SESSIONS` most recent sessions. What speculation saved is kept
+under `speculation_stats` in session state.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from app.config import config
+from app.schemas.narrative import NarrativePlan
+
+from .query_scheduler import SearchFunction
+from .search_cache import google_search, normalize_query
+
+# Session state key holding the speculation counters of the brief.
+SPECULATION_STATS_KEY = "speculation_stats"
+# Prefetches of the most recent sessions kept, by session id.
+_MAX_SESSIONS = 64
+
+
+@dataclass
+class SpeculationStats:
+    """Queries run while the plan was under review, and what became of them."""
+    started: int = 0
+    completed: int = 0
+    failed: int = 0
+    reused: int = 0
+    cancelled: int = 0
+    discarded: int = 0
+    promoted: int = 0
+    awaited: int = 0
+    seconds_hidden: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "seconds_hidden": round(self.seconds_hidden, 3)}
+
+
+class SpeculativePrefetch:
+    """The staged search results of one session's plan under review."""
+    def __init__(self, search: SearchFunction = google_search, max_concurrency: int | None = None):
+        self._search = search
+        self._semaphore = asyncio.Semaphore(max_concurrency or config.max_parallel_searches)
+        self.results: dict[str, dict[str, Any]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.stats = SpeculationStats()
+        self.approved = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def update(self, queries: Iterable[str]) -> None:
+        """
+        Runs the queries of a new or edited plan in the background, keeping
+        the results of queries it still has and dropping the others.
+        """
+        wanted: dict[str, str] = {}
+        for query in queries:
+            wanted.setdefault(normalize_query(query), query)
+        for key in [key for key in self._tasks if key not in wanted]:
+            self._tasks.pop(key).cancel()
+            self.stats.cancelled += 1
+        for key in [key for key in self.results if key not in wanted]:
+            del self.results[key]
+            self.stats.discarded += 1
+        for key, query in wanted.items():
+            if key in self.results or key in self._tasks:
+                self.stats.reused += 1
+                continue
+            self._tasks[key] = asyncio.get_running_loop().create_task(self._prefetch(key, query))
+            self.stats.started += 1
+
+    async def _prefetch(self, key: str, query: str) -> dict[str, Any] | None:
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                try:
+                    result = await self._search(query)
+                except Exception as e:
+                    logging.warning(f"Speculative search for '{query}' failed: {e}")
+                    self.stats.failed += 1
+                    return None
+                self.results[key] = result
+                self.stats.completed += 1
+                if not self.approved:
+                    self.stats.seconds_hidden += time.monotonic() - started
+                return result
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    async def search(self, query: str) -> dict[str, Any]:
+        """Searches for a query, answering from the staged results when possible."""
+        key = normalize_query(query)
+        if (result := self.results.get(key)) is None and (task := self._tasks.get(key)) is not None:
+            result = await asyncio.shield(task)
+            self.stats.awaited += result is not None
+        if result is None:
+            return await google_search(query)
+        self.stats.promoted += 1
+        return result
+
+    def cancel(self) -> None:
+        """Cancels the queries still in flight."""
+        for task in self._tasks.values():
+            task.cancel()
+        self.stats.cancelled += len(self._tasks)
+        self._tasks.clear()
+
+
+_prefetches: OrderedDict[str, SpeculativePrefetch] = OrderedDict()
+
+
+def speculate(session_id: str, plan: NarrativePlan) -> SpeculativePrefetch | None:
+    """Starts, or updates after an edit, the speculative prefetch of a session's plan."""
+    if not (config.speculative_prefetch and config.search_cache_enabled and config.prefetch_search_queries):
+        return None
+    if (prefetch := _prefetches.get(session_id)) is None:
+        prefetch = _prefetches[session_id] = SpeculativePrefetch()
+        while len(_prefetches) > _MAX_SESSIONS:
+            _prefetches.popitem(last=False)[1].cancel()
+    _prefetches.move_to_end(session_id)
+    prefetch.update(query for node in plan.knowledge_nodes for query in node.search_queries)
+    logging.info(
+        f"Speculatively prefetching {prefetch.in_flight} queries of the plan of session '{session_id}' "
+        f"({prefetch.stats.reused} reused, {prefetch.stats.discarded + prefetch.stats.cancelled} dropped so far)."
+    )
+    return prefetch
+
+
+def take_speculative_prefetch(session_id: str) -> SpeculativePrefetch | None:
+    """Removes and returns the prefetch of an approved plan, if one was started."""
+    if (prefetch := _prefetches.pop(session_id, None)) is not None:
+        prefetch.approved = True
+    return prefetch
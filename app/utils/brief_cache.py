@@ -0,0 +1,84 @@
+"""The validated DocumentaryBrief of a session, and whether it changed.
+
+`LoopConfigAgent`, `EscalationChecker` and the research callbacks used to
+validate `documentary_brief` from session state on every run, and
+`EscalationChecker` wrote the whole brief back as a dict on every loop
+iteration, even when no node had changed. The next reader then had to
+validate it again.
+
+The BriefCache is attached to the session object, like the EventIndex. It
+validates the state value only when it is a new one, and records whether the
+brief was changed through it. Its `state_delta` is empty when nothing changed
+and otherwise writes the validated brief object itself back, so the brief is
+neither serialized nor revalidated between loop steps.
+
+The delta always holds the whole brief: ADK merges state deltas by top-level
+key, so writing single nodes would take a state key per node, and every
+reader of `documentary_brief` would have to reassemble the brief. A session
+service persisting state serializes the whole brief on each changed step.
+"""
+
+import logging
+from collections.abc import Mapping
+from typing import Any
+
+from google.adk.sessions import Session
+from google.adk.sessions.state import State
+from pydantic import ValidationError
+
+from app.schemas.brief import DocumentaryBrief
+
+# Session state key holding the brief being researched.
+BRIEF_KEY = "documentary_brief"
+
+
+class BriefCache:
+    """A session's validated brief, and whether it changed since the last state delta."""
+    def __init__(self, brief: DocumentaryBrief, source: Any):
+        self.brief = brief
+        # The state value the brief was validated from.
+        self.source = source
+        self.changed = False
+
+    def holds(self, value: Any) -> bool:
+        """Whether `value` is the brief, or the state value it was validated from."""
+        return value is self.brief or value is self.source
+
+    def mark_changed(self) -> None:
+        """Records that the brief was changed."""
+        self.changed = True
+
+    def state_delta(self) -> dict[str, Any]:
+        """
+        Returns the state delta writing back the changes made since the last
+        call: nothing if the brief did not change, the brief object otherwise.
+        """
+        if not self.changed:
+            return {}
+        self.changed = False
+        self.source = self.brief
+        return {BRIEF_KEY: self.brief}
+
+
+def get_brief_cache(session: Session, state: Mapping | State | None = None) -> BriefCache | None:
+    """
+    Returns the brief cache of the session, validating the brief in `state`
+    (the session's state by default) only if it is not the cached one.
+
+    Returns:
+        BriefCache | None: The cache, or None if the state has no valid brief.
+    """
+    value = (session.state if state is None else state).get(BRIEF_KEY)
+    if not value:
+        return None
+    cache = session.__dict__.get("_brief_cache")
+    if cache is not None and cache.holds(value):
+        return cache
+    try:
+        brief = DocumentaryBrief.model_validate(value)
+    except ValidationError as e:
+        logging.error(f"Could not validate documentary_brief: {e}")
+        return None
+    cache = BriefCache(brief, value)
+    session.__dict__["_brief_cache"] = cache
+    return cache
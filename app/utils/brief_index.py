@@ -0,0 +1,278 @@
+"""Persistent lookup indexes over a DocumentaryBrief.
+
+Merging a NodeUpdate used to scan `knowledge_nodes` for the title and rebuild
+the URL and fact sets of the node on every call. The index built here is kept
+per brief, by reference id and node titles, for the `_MAX_BRIEFS` most recent
+briefs, and cached on the brief object (a pydantic private attribute). A brief
+re-validated from session state is a new object: its index is rebound to it
+rather than rebuilt, re-indexing only the nodes whose content changed, and
+without recomputing fingerprints or signatures. Each merge then only costs
+O(size of the update), plus the content check of its node.
+
+An entry is current while its node is the same object holding the same, or
+equal, sources and facts in the same order as when last indexed, so edits made
+to a node without going through the index are noticed. Comparing the lists
+against a snapshot is nearly free while their items are the indexed objects,
+since list equality checks identity first; merges extend the snapshot as they
+extend the node.
+
+Besides exact fingerprints, facts are indexed by MinHash signature per node and
+per brief, so paraphrases of a known fact are folded into it according to a
+DuplicatePolicy instead of being added again.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import cast
+
+from app.schemas.brief import (
+    DocumentaryBrief,
+    FactPoint,
+    KnowledgeNode,
+    NodeUpdate,
+    TopSource,
+)
+from app.utils.near_duplicates import (
+    DuplicatePolicy,
+    NearDuplicateIndex,
+    Signature,
+    band_keys,
+    fold_duplicate,
+    minhash,
+)
+from app.utils.source_registry import canonical_url
+
+# Indexes of the most recent briefs kept, by reference id and node titles.
+_MAX_BRIEFS = 64
+
+
+
+def fact_fingerprint(description: str) -> str:
+    """Fingerprints a fact description, ignoring case, punctuation and spacing."""
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", description.casefold()).split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass
+class NodeIndex:
+    """Canonical URL and fact fingerprint lookups for a single knowledge node."""
+    node: KnowledgeNode
+    position: int
+    sources: set[str] = field(default_factory=set)
+    # Fact positions in the node, by fingerprint of every wording seen.
+    facts: dict[str, int] = field(default_factory=dict)
+    # MinHash signatures of the node's facts, keyed by (node, fact) position.
+    near: NearDuplicateIndex = field(default_factory=NearDuplicateIndex)
+    # The node's sources and facts when last indexed.
+    top_sources: list[TopSource] = field(default_factory=list)
+    fact_points: list[FactPoint] = field(default_factory=list)
+
+    def has_content_of(self, node: KnowledgeNode) -> bool:
+        return node.fact_points == self.fact_points and node.top_sources == self.top_sources
+
+    def is_current(self, brief: DocumentaryBrief) -> bool:
+        return (
+            self.position < len(brief.knowledge_nodes)
+            and brief.knowledge_nodes[self.position] is self.node
+            and self.has_content_of(self.node)
+        )
+
+    def bind(self, node: KnowledgeNode) -> None:
+        """Points the entry at a node with the same content."""
+        self.node = node
+        self.top_sources = list(node.top_sources)
+        self.fact_points = list(node.fact_points)
+
+
+@dataclass
+class MergeResult:
+    """What a merge added to, or folded into, a node."""
+    node: KnowledgeNode
+    added_sources: list[TopSource]
+    added_facts: list[FactPoint]
+    # Existing facts a near-duplicate of the update was folded into.
+    merged_facts: list[FactPoint] = field(default_factory=list)
+
+
+class BriefIndex:
+    """Title, canonical URL and fact fingerprint indexes for a DocumentaryBrief."""
+    def __init__(self, brief: DocumentaryBrief, policy: DuplicatePolicy | None = None):
+        self.brief = brief
+        self.policy = policy or DuplicatePolicy.from_config()
+        self.nodes: dict[str, NodeIndex] = {}
+        # MinHash signatures of every fact of the brief, for the "brief" scope,
+        # kept alongside the signature index of each node.
+        self.near = NearDuplicateIndex()
+        # Fingerprints, and signatures with their band keys, by description,
+        # so re-indexing does not recompute them.
+        self._fingerprints: dict[str, str] = {}
+        self._signatures: dict[str, tuple[Signature, list[int]]] = {}
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.nodes = {}
+        self.near = NearDuplicateIndex()
+        for position, node in enumerate(self.brief.knowledge_nodes):
+            if node.node_title not in self.nodes:
+                self.nodes[node.node_title] = self._index_node(node, position)
+
+    def _index_node(self, node: KnowledgeNode, position: int) -> NodeIndex:
+        entry = NodeIndex(node=node, position=position)
+        entry.bind(node)
+        entry.sources.update(canonical_url(source.url) for source in node.top_sources)
+        for fact_position, fact in enumerate(node.fact_points):
+            entry.facts.setdefault(self._fingerprint(fact.description), fact_position)
+            if self.policy.threshold > 0:
+                self._index_signature(entry, (position, fact_position), fact.description)
+        return entry
+
+    def _reindex_node(self, entry: NodeIndex) -> NodeIndex:
+        """Re-indexes the node at the entry's position, after it was edited or replaced."""
+        for key in entry.near.signatures:
+            self.near.remove(key)
+        node = self.brief.knowledge_nodes[entry.position]
+        new_entry = self.nodes[node.node_title] = self._index_node(node, entry.position)
+        return new_entry
+
+    def attach(self, brief: DocumentaryBrief) -> None:
+        """
+        Rebinds the index to another object of the same brief, e.g. one
+        re-validated from session state. Nodes with the same content only
+        swap objects; the others are re-indexed.
+        """
+        self.brief = brief
+        titles = [node.node_title for node in brief.knowledge_nodes]
+        if titles != [title for title, _ in sorted(self.nodes.items(), key=lambda item: item[1].position)]:
+            self._rebuild()
+            return
+        for entry in list(self.nodes.values()):
+            node = brief.knowledge_nodes[entry.position]
+            if entry.has_content_of(node):
+                entry.bind(node)
+            else:
+                self._reindex_node(entry)
+
+    def _near_index(self, entry: NodeIndex) -> NearDuplicateIndex:
+        return self.near if self.policy.scope == "brief" else entry.near
+
+    def _index_signature(self, entry: NodeIndex, key: tuple[int, int], description: str) -> None:
+        """Adds a wording of the fact at `key`, in `entry`'s node, to the node and brief indexes."""
+        signature, bands = self._signature(description)
+        entry.near.add(key, signature, bands)
+        self.near.add(key, signature, bands)
+
+    def _fingerprint(self, description: str) -> str:
+        if (fingerprint := self._fingerprints.get(description)) is None:
+            fingerprint = self._fingerprints[description] = fact_fingerprint(description)
+        return fingerprint
+
+    def _signature(self, description: str) -> tuple[Signature, list[int]]:
+        if (sketch := self._signatures.get(description)) is None:
+            signature = minhash(description)
+            sketch = self._signatures[description] = (signature, band_keys(signature))
+        return sketch
+
+    def find_near_duplicate(self, entry: NodeIndex, description: str) -> tuple[int, int] | None:
+        """
+        Returns the (node, fact) position of the fact the description nearly
+        duplicates within the policy's scope, or None.
+        """
+        if self.policy.threshold <= 0:
+            return None
+        signature, bands = self._signature(description)
+        key = self._near_index(entry).find(signature, self.policy.threshold, bands)
+        return cast(tuple[int, int] | None, key)
+
+    def node_index(self, title: str) -> NodeIndex | None:
+        """Returns the up-to-date index of the node with the given title."""
+        entry = self.nodes.get(title)
+        if entry is not None and entry.is_current(self.brief):
+            return entry
+        if entry is not None and entry.position < len(self.brief.knowledge_nodes) \
+                and self.brief.knowledge_nodes[entry.position].node_title == title:
+            # The node was edited outside the index; re-index it alone.
+            return self._reindex_node(entry)
+        # Nodes were added, removed or reordered; re-index the brief.
+        self._rebuild()
+        return self.nodes.get(title)
+
+    def get_node(self, title: str) -> KnowledgeNode | None:
+        entry = self.node_index(title)
+        return entry.node if entry else None
+
+    def merge(self, node_update: NodeUpdate) -> MergeResult | None:
+        """
+        Merges a NodeUpdate into its node, skipping sources whose canonical URL
+        and facts whose fingerprint are already present. Facts that nearly
+        duplicate an existing one are folded into it per the DuplicatePolicy.
+
+        Returns:
+            MergeResult | None: The added sources and facts, or None if the
+            brief has no node with the update's title.
+        """
+        entry = self.node_index(node_update.node_title)
+        if entry is None:
+            return None
+
+        added_sources = []
+        for source in node_update.top_sources:
+            key = canonical_url(source.url)
+            if key not in entry.sources:
+                entry.sources.add(key)
+                entry.node.top_sources.append(source)
+                entry.top_sources.append(source)
+                added_sources.append(source)
+
+        added_facts = []
+        merged_facts = []
+        for fact in node_update.fact_points:
+            key = self._fingerprint(fact.description)
+            if key in entry.facts:
+                continue
+
+            if (near_key := self.find_near_duplicate(entry, fact.description)) is not None:
+                node_position, fact_position = near_key
+                # In the "brief" scope, the existing fact may be another node's.
+                owner = self.nodes[self.brief.knowledge_nodes[node_position].node_title]
+                existing = owner.node.fact_points[fact_position]
+                if fold_duplicate(existing, fact, self.policy):
+                    # Index the new wording too, so both variants are matched.
+                    self._index_signature(owner, near_key, existing.description)
+                owner.facts[key] = fact_position
+                merged_facts.append(existing)
+                continue
+
+            entry.facts[key] = len(entry.node.fact_points)
+            entry.node.fact_points.append(fact)
+            entry.fact_points.append(fact)
+            if self.policy.threshold > 0:
+                self._index_signature(entry, (entry.position, len(entry.node.fact_points) - 1), fact.description)
+            added_facts.append(fact)
+
+        return MergeResult(entry.node, added_sources, added_facts, merged_facts)
+
+
+_indexes: OrderedDict[tuple[str, tuple[str, ...]], BriefIndex] = OrderedDict()
+
+
+def get_brief_index(brief: DocumentaryBrief) -> BriefIndex:
+    """
+    Returns the index of the brief: the one cached on the object, or else the
+    one kept for its reference id and node titles, rebound to the object, or
+    else a new one.
+    """
+    index = brief._index
+    if index is not None and index.brief is brief:
+        return index
+    key = (brief.reference_id, tuple(node.node_title for node in brief.knowledge_nodes))
+    if (index := _indexes.get(key)) is None:
+        index = _indexes[key] = BriefIndex(brief)
+        while len(_indexes) > _MAX_BRIEFS:
+            _indexes.popitem(last=False)
+    else:
+        index.attach(brief)
+    _indexes.move_to_end(key)
+    brief._index = index
+    return index
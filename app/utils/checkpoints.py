@@ -0,0 +1,205 @@
+"""Checkpoints of the research pipeline, so an interrupted run can resume.
+
+Research state only lives in the session, so a process dying in the middle of
+the research stages used to lose every node researched so far. The brief,
+with its per-node statuses, and the last evaluation are saved to a local
+SQLite store (WAL mode) after every parallel worker and every
+`EscalationChecker` step.
+
+A checkpoint belongs to a run, identified by the approved plan and subject,
+and to the session researching it, so concurrent sessions running the same
+plan never overwrite each other. `brief_initializer` resumes the run from the
+session's own checkpoint, or else claims one another session abandoned (not
+saved for `checkpoint_resume_idle` seconds), e.g. when the process died; nodes
+already "saturated" or "stalled" are then skipped. `brief_finalizer` deletes
+the checkpoint once the brief is final, so a finished run is never resumed.
+
+SQLite calls are blocking, so the async helpers run them in a worker thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from google.adk.sessions import Session
+
+from app.config import config
+from app.schemas.brief import DocumentaryBrief
+
+# Session state key holding the checkpoint key of the brief being researched.
+CHECKPOINT_KEY = "checkpoint_key"
+
+
+def checkpoint_key(plan_data: Any, subject: str) -> str:
+    """Identifies a research run by its approved plan and subject."""
+    if hasattr(plan_data, "model_dump"):
+        plan_data = plan_data.model_dump(mode="json")
+    payload = json.dumps({"subject": subject, "plan": plan_data}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Checkpoint:
+    """The research state saved for a run."""
+    brief: DocumentaryBrief
+    research_evaluation: dict[str, Any] | None
+    saved_at: float
+
+
+class CheckpointStore:
+    """
+    An on-disk store holding the latest checkpoint of each research run, per
+    session.
+
+    Checkpoints older than `ttl_seconds` are ignored and deleted, so an old
+    run of the same plan is eventually researched afresh.
+    """
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the very last checkpoint on a power cut is acceptable.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_checkpoints ("
+            " key TEXT NOT NULL,"
+            " session_id TEXT NOT NULL,"
+            " reference_id TEXT NOT NULL,"
+            " brief TEXT NOT NULL,"
+            " evaluation TEXT,"
+            " saved_at REAL NOT NULL,"
+            " PRIMARY KEY (key, session_id))"
+        )
+        self._conn.commit()
+
+    def save(
+        self, key: str, session_id: str, brief: DocumentaryBrief, research_evaluation: dict[str, Any] | None = None
+    ) -> None:
+        """Replaces the checkpoint of a run by a session."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_checkpoints"
+                " (key, session_id, reference_id, brief, evaluation, saved_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    session_id,
+                    brief.reference_id,
+                    brief.model_dump_json(),
+                    json.dumps(research_evaluation) if research_evaluation else None,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def claim(self, key: str, session_id: str, idle_seconds: float) -> Checkpoint | None:
+        """
+        Returns the session's checkpoint of a run or, failing that, the latest
+        one of another session not saved for `idle_seconds`, which then
+        belongs to this session. Returns None if there is no such checkpoint.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM run_checkpoints WHERE key = ? AND saved_at < ?", (key, now - self.ttl_seconds)
+            )
+            row = self._conn.execute(
+                "SELECT session_id, brief, evaluation, saved_at FROM run_checkpoints"
+                " WHERE key = ? AND (session_id = ? OR saved_at <= ?)"
+                " ORDER BY session_id = ? DESC, saved_at DESC LIMIT 1",
+                (key, session_id, now - idle_seconds, session_id),
+            ).fetchone()
+            if row is not None and row[0] != session_id:
+                claimed = self._conn.execute(
+                    "UPDATE run_checkpoints SET session_id = ?, saved_at = ? WHERE key = ? AND session_id = ?",
+                    (session_id, now, key, row[0]),
+                )
+                if claimed.rowcount != 1:
+                    # Another process claimed it first.
+                    row = None
+            self._conn.commit()
+        if row is None:
+            return None
+        _, brief, evaluation, saved_at = row
+        return Checkpoint(
+            brief=DocumentaryBrief.model_validate_json(brief),
+            research_evaluation=json.loads(evaluation) if evaluation else None,
+            saved_at=saved_at,
+        )
+
+    def delete(self, key: str, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM run_checkpoints WHERE key = ? AND session_id = ?", (key, session_id))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM run_checkpoints").fetchone()
+        return count
+
+
+_store: CheckpointStore | None = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Returns the process-wide checkpoint store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = CheckpointStore(config.checkpoint_path, ttl_seconds=config.checkpoint_ttl)
+    return _store
+
+
+def set_checkpoint_store(store: CheckpointStore | None) -> None:
+    """Overrides the checkpoint store, e.g. with an in-memory one in tests."""
+    global _store
+    _store = store
+
+
+async def save_checkpoint(
+    session: Session, brief: DocumentaryBrief, research_evaluation: dict[str, Any] | None = None
+) -> None:
+    """
+    Checkpoints the brief of the session's run. Failures are logged and never
+    interrupt the research.
+    """
+    if not config.checkpoint_enabled or not (key := session.state.get(CHECKPOINT_KEY)):
+        return
+    try:
+        await asyncio.to_thread(get_checkpoint_store().save, key, session.id, brief, research_evaluation)
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Could not checkpoint brief '{brief.reference_id}': {e}")
+
+
+async def resume_checkpoint(key: str, session_id: str) -> Checkpoint | None:
+    """
+    Returns the checkpoint of an unfinished run for the session to resume, or
+    None if there is none or it cannot be read.
+    """
+    if not config.checkpoint_enabled:
+        return None
+    try:
+        return await asyncio.to_thread(
+            get_checkpoint_store().claim, key, session_id, config.checkpoint_resume_idle
+        )
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logging.error(f"Could not load checkpoint '{key}': {e}")
+        return None
+
+
+async def finish_checkpoint(session: Session) -> None:
+    """Deletes the checkpoint of the session's run, once it is complete."""
+    if not config.checkpoint_enabled or not (key := session.state.get(CHECKPOINT_KEY)):
+        return
+    try:
+        await asyncio.to_thread(get_checkpoint_store().delete, key, session.id)
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Could not delete checkpoint '{key}': {e}")
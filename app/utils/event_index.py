@@ -0,0 +1,91 @@
+"""An incremental index over `session.events` for callbacks.
+
+Callbacks used to walk the whole event history on every invocation, so the
+total callback work of a research run grew quadratically with its length. The
+EventIndex is attached to the session object and only indexes events appended
+since its last refresh. It offers lookups by author and by function-response
+name, plus per-callback watermarks (kept in session state so they persist with
+the session) so each callback only touches events it has not seen yet.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, MutableMapping
+
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.adk.sessions.state import State
+
+# Session state key holding the per-callback watermarks.
+WATERMARKS_KEY = "event_watermarks"
+
+
+class EventIndex:
+    """Positions of a session's events, grouped by author and function-response name."""
+    def __init__(self, events: list[Event]):
+        self.events = events
+        self.indexed = 0
+        self.by_author: dict[str, list[int]] = defaultdict(list)
+        self.by_function_response: dict[str, list[int]] = defaultdict(list)
+
+    def refresh(self) -> None:
+        """Indexes the events appended since the last refresh."""
+        for position in range(self.indexed, len(self.events)):
+            event = self.events[position]
+            self.by_author[event.author].append(position)
+            if event.content and event.content.parts:
+                for part in event.content.parts:
+                    if part.function_response and part.function_response.name:
+                        self.by_function_response[part.function_response.name].append(position)
+        self.indexed = len(self.events)
+
+    def events_by_author(self, author: str) -> Iterator[Event]:
+        """Events by the author, oldest first."""
+        return (self.events[p] for p in self.by_author.get(author, []))
+
+    def latest_by_author(self, authors: Iterable[str], after: int = 0) -> list[Event]:
+        """Events by any of the authors at positions >= `after`, most recent first."""
+        positions: list[int] = []
+        for author in authors:
+            author_positions = self.by_author.get(author, [])
+            positions.extend(author_positions[bisect_right(author_positions, after - 1):])
+        return [self.events[p] for p in sorted(positions, reverse=True)]
+
+    def latest_function_responses(self, name: str) -> list[Event]:
+        """Events carrying a response of the named function, most recent first."""
+        return [self.events[p] for p in reversed(self.by_function_response.get(name, []))]
+
+    def watermark(self, state: MutableMapping | State, consumer: str) -> int:
+        """Position of the first event the consumer has not seen yet."""
+        return (state.get(WATERMARKS_KEY) or {}).get(consumer, 0)
+
+    def advance(self, state: MutableMapping | State, consumer: str) -> None:
+        """Marks every indexed event as seen by the consumer."""
+        watermarks = dict(state.get(WATERMARKS_KEY) or {})
+        watermarks[consumer] = self.indexed
+        state[WATERMARKS_KEY] = watermarks
+
+    def unseen(self, state: MutableMapping | State, consumer: str) -> list[Event]:
+        """Returns the events the consumer has not seen yet and advances its watermark."""
+        events = self.events[self.watermark(state, consumer):self.indexed]
+        self.advance(state, consumer)
+        return events
+
+
+def get_event_index(session: Session) -> EventIndex:
+    """
+    Returns the session's up-to-date event index, building it on first use.
+
+    The index is rebuilt if the session's event list was replaced or shrank,
+    e.g. when the session was reloaded from its service.
+    """
+    index = session.__dict__.get("_event_index")
+    if (
+        index is None
+        or index.events is not session.events
+        or index.indexed > len(session.events)
+    ):
+        index = EventIndex(session.events)
+        session.__dict__["_event_index"] = index
+    index.refresh()
+    return index
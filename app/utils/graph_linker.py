@@ -0,0 +1,166 @@
+"""Links related facts of a DocumentaryBrief without a model call.
+
+Facts are connected through inverted indexes over their normalized
+`related_entities` and over their category and node axis, so only facts
+sharing an entity, or a category and an axis, are ever compared. Entities
+shared by a large share of the brief (usually the subject itself) are
+skipped, and a fact is only compared with the nearest facts of its category
+and axis in brief order, as those groups span much of the brief, so linking
+stays near-linear in the number of facts. Candidate edges are scored with
+LinkScoring and each fact keeps its strongest edges.
+"""
+
+import heapq
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+from app.schemas.brief import DocumentaryBrief, FactLink, FactPoint
+
+
+@dataclass
+class LinkScoring:
+    """Weights and limits used to score and keep edges between facts.
+
+    Attributes:
+        entity_weight (float): Score added per shared related entity.
+        category_weight (float): Score added when both facts share a category.
+        axis_weight (float): Score added when both facts' nodes share an axis.
+        same_node_weight (float): Score added when both facts are in the same node.
+        min_score (float): Edges scoring below this are dropped. The default
+            links facts sharing an entity, or a category and an axis within
+            the same node.
+        max_edges_per_fact (int): Strongest edges kept for each fact.
+        max_entity_share (float): Entities attached to more than this share of
+            all facts are too generic to link on and are ignored.
+        max_entity_facts (int): Absolute cap on the facts an entity may be
+            attached to before it is ignored, which bounds linking work per fact.
+        max_group_neighbours (int): Facts of the same category and axis each
+            fact is compared with, the nearest in brief order.
+    """
+    entity_weight: float = 1.0
+    category_weight: float = 0.25
+    axis_weight: float = 0.1
+    same_node_weight: float = 0.25
+    min_score: float = 0.5
+    max_edges_per_fact: int = 5
+    max_entity_share: float = 0.2
+    max_entity_facts: int = 50
+    max_group_neighbours: int = 10
+
+
+def normalize_entity(entity: str) -> str:
+    """Normalizes an entity name so spelling variants share an index entry."""
+    entity = re.sub(r"[^\w\s]", " ", entity.casefold())
+    entity = " ".join(entity.split())
+    return entity.removeprefix("the ")
+
+
+def ensure_unique_fact_ids(brief: DocumentaryBrief) -> None:
+    """Renames duplicate fact_ids, which researchers of different nodes often reuse."""
+    seen: set[str] = set()
+    for node in brief.knowledge_nodes:
+        for fact in node.fact_points:
+            if fact.fact_id in seen:
+                suffix = 2
+                while f"{fact.fact_id}-{suffix}" in seen:
+                    suffix += 1
+                fact.fact_id = f"{fact.fact_id}-{suffix}"
+            seen.add(fact.fact_id)
+
+
+def link_facts(
+    brief: DocumentaryBrief, scoring: LinkScoring | None = None, max_links: int | None = None
+) -> list[FactLink]:
+    """
+    Populates `related_fact_ids` for every fact of the brief.
+
+    Returns:
+        list[FactLink]: The `max_links` strongest edges (every edge if None),
+        strongest first, with mutual edges listed once.
+    """
+    scoring = scoring or LinkScoring()
+    ensure_unique_fact_ids(brief)
+
+    facts: list[FactPoint] = []
+    node_of: list[int] = []
+    axis_of: list[str] = []
+    for node_position, node in enumerate(brief.knowledge_nodes):
+        for fact in node.fact_points:
+            facts.append(fact)
+            node_of.append(node_position)
+            axis_of.append(node.axis)
+
+    entities_of = [
+        {normalize_entity(e) for e in fact.related_entities} - {""} for fact in facts
+    ]
+    postings: dict[str, list[int]] = defaultdict(list)
+    for position, entities in enumerate(entities_of):
+        for entity in entities:
+            postings[entity].append(position)
+    max_postings = min(
+        scoring.max_entity_facts, max(2, int(len(facts) * scoring.max_entity_share))
+    )
+    groups: dict[tuple[str, str], list[int]] = defaultdict(list)
+    rank_in_group: list[int] = []
+    for position, fact in enumerate(facts):
+        group = groups[(fact.category, axis_of[position])]
+        rank_in_group.append(len(group))
+        group.append(position)
+    half_window = scoring.max_group_neighbours // 2
+
+    edges: list[tuple[float, int, int]] = []
+    for position, fact in enumerate(facts):
+        shared: dict[int, int] = defaultdict(int)
+        for entity in entities_of[position]:
+            posting = postings[entity]
+            if len(posting) > max_postings:
+                continue
+            for other in posting:
+                if other != position:
+                    shared[other] += 1
+        group = groups[(fact.category, axis_of[position])]
+        rank = rank_in_group[position]
+        for other in group[max(0, rank - half_window):rank + half_window + 1]:
+            if other != position and other not in shared:
+                shared[other] = 0
+
+        scored = []
+        for other, count in shared.items():
+            score = count * scoring.entity_weight
+            if facts[other].category == fact.category:
+                score += scoring.category_weight
+            if axis_of[other] == axis_of[position]:
+                score += scoring.axis_weight
+            if node_of[other] == node_of[position]:
+                score += scoring.same_node_weight
+            if score >= scoring.min_score:
+                scored.append((-score, other))
+
+        kept = heapq.nsmallest(scoring.max_edges_per_fact, scored)
+        fact.related_fact_ids = [facts[other].fact_id for _, other in kept]
+        edges.extend((-negative_score, -position, -other) for negative_score, other in kept)
+
+    # Positions are negated so ties keep the brief's fact order. Mutual edges
+    # are reported once, so fetch twice as many before deduplicating.
+    if max_links is not None:
+        candidates = heapq.nlargest(2 * max_links, edges)
+    else:
+        candidates = sorted(edges, reverse=True)
+    links: list[FactLink] = []
+    seen: set[tuple[int, int]] = set()
+    for score, source, target in candidates:
+        pair = (min(source, target), max(source, target))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        links.append(
+            FactLink(
+                source_fact_id=facts[-source].fact_id,
+                target_fact_id=facts[-target].fact_id,
+                score=round(score, 3),
+            )
+        )
+        if max_links is not None and len(links) == max_links:
+            break
+    return links
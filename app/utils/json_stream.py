@@ -0,0 +1,105 @@
+"""Incremental extraction of JSON objects from model output.
+
+Model responses often wrap their JSON in prose or code fences, and sometimes
+emit several JSON blocks. JsonObjectExtractor tracks brace depth, strings and
+escapes over text fed chunk by chunk, and hands out each top-level object as
+soon as its closing brace arrives, so callers can validate it without waiting
+for (or rescanning) the rest of the response.
+"""
+
+import re
+from collections.abc import Iterable, Iterator
+from typing import TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+# Characters that matter inside an object, outside of strings.
+_STRUCTURAL = re.compile(r'[{}"]')
+# Characters that matter inside a string.
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class JsonObjectExtractor:
+    """Finds complete top-level JSON objects in text fed chunk by chunk."""
+    def __init__(self) -> None:
+        # Pieces of the object in progress from previous chunks.
+        self._pending: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list[str]:
+        """Consumes the next chunk and returns the objects it completed, in order."""
+        completed = []
+        start = 0 if self._depth else None
+        position, length = 0, len(chunk)
+        while position < length:
+            if self._escaped:
+                self._escaped = False
+                position += 1
+            elif self._in_string:
+                match = _STRING_SPECIAL.search(chunk, position)
+                if match is None:
+                    break
+                position = match.start()
+                if chunk[position] == "\\":
+                    self._escaped = True
+                else:
+                    self._in_string = False
+                position += 1
+            elif self._depth == 0:
+                position = chunk.find("{", position)
+                if position < 0:
+                    break
+                start = position
+                self._depth = 1
+                position += 1
+            else:
+                match = _STRUCTURAL.search(chunk, position)
+                if match is None:
+                    break
+                position = match.start()
+                char = chunk[position]
+                if char == '"':
+                    self._in_string = True
+                elif char == "{":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._pending.append(chunk[start:position + 1])
+                        completed.append("".join(self._pending))
+                        self._pending = []
+                        start = None
+                position += 1
+
+        if start is not None:
+            self._pending.append(chunk[start:])
+        return completed
+
+
+def iter_json_objects(chunks: str | Iterable[str]) -> Iterator[str]:
+    """Yields each complete top-level JSON object found in the text or chunks."""
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    extractor = JsonObjectExtractor()
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+
+
+def parse_first(model: type[ModelT], chunks: str | Iterable[str]) -> ModelT | None:
+    """
+    Validates the top-level JSON objects of the text against the model, in
+    order, and returns the first one that is valid.
+
+    Returns:
+        ModelT | None: The validated object, or None if no object validates.
+    """
+    for candidate in iter_json_objects(chunks):
+        try:
+            return model.model_validate_json(candidate)
+        except ValidationError:
+            continue
+    return None
@@ -0,0 +1,326 @@
+"""A persistent knowledge base of the facts of every finalized brief.
+
+Subjects overlap: the same companies, people and eras come back from brief
+to brief, yet every brief was researched from zero. `brief_finalizer` now
+adds the facts of each `final_documentary_brief` to a local SQLite store,
+indexed by entity, by canonical source URL and, through an FTS5 table, by
+text. When `brief_initializer` builds a new brief, each node is seeded with
+the known facts matching its title that agree with it, coming from a brief
+on the same subject or naming an entity in the node's title, so
+`unified_researcher` sees them among the node's known facts and only
+searches for what is missing; the evaluator still decides whether the node
+needs more research. Title words alone are too loose: a generic title such
+as "The Launch" matches facts of every subject. Only with
+`config.knowledge_base_skip_nodes` is a node marked saturated, and not
+researched at all, and only when at least `config.knowledge_base_min_facts`
+facts were seeded.
+
+What seeding saved is kept under `knowledge_base_stats` in session state:
+the nodes and facts seeded and, only when nodes may be skipped, the searches
+(the node's planned queries) and model calls (a research and an evaluation
+call) avoided by skipping them. Seeding facts does not avoid any by itself.
+
+The store is only used through `seed_brief` and `record_brief`, which run
+its queries in a worker thread, as the search cache and checkpoints do.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+from app.config import config
+from app.schemas.brief import (
+    DocumentaryBrief,
+    FactPoint,
+    KnowledgeNode,
+    NodeUpdate,
+    ResearchStatus,
+    TopSource,
+)
+from app.utils.brief_index import fact_fingerprint, get_brief_index
+from app.utils.source_registry import canonical_url
+
+# Session state key holding what seeding from the knowledge base saved.
+KNOWLEDGE_BASE_STATS_KEY = "knowledge_base_stats"
+# Model calls of the research pass a skipped node does not need: the
+# researcher's and the evaluator's.
+MODEL_CALLS_PER_PASS = 2
+# Words too common in node titles to match facts on.
+STOPWORDS = frozenset(
+    "a an and as at by for from in into of on or the to with its their his her how why what who "
+    "when where early late rise fall history story life era".split()
+)
+
+
+def title_terms(text: str) -> list[str]:
+    """The distinct lowercase words of a title worth matching facts on."""
+    terms = []
+    for word in re.findall(r"\w+", text.casefold()):
+        if word not in STOPWORDS and (len(word) > 1 or word.isdigit()) and word not in terms:
+            terms.append(word)
+    return terms
+
+
+@dataclass
+class KnownFact:
+    """A fact of an earlier brief."""
+    id: int
+    fact: FactPoint
+    subject: str
+    node_title: str
+
+
+class KnowledgeBase:
+    """
+    An on-disk store of the facts of finalized briefs, deduplicated by fact
+    fingerprint and searchable by text, entity and source URL.
+    """
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS facts ("
+            " id INTEGER PRIMARY KEY,"
+            " fingerprint TEXT NOT NULL UNIQUE,"
+            " subject TEXT NOT NULL,"
+            " node_title TEXT NOT NULL,"
+            " source_url TEXT NOT NULL,"
+            " fact TEXT NOT NULL,"
+            " added_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS facts_source_url ON facts (source_url);"
+            "CREATE TABLE IF NOT EXISTS fact_entities ("
+            " entity TEXT NOT NULL COLLATE NOCASE,"
+            " fact_id INTEGER NOT NULL,"
+            " PRIMARY KEY (entity, fact_id)) WITHOUT ROWID;"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5("
+            " node_title, description, entities, tokenize='unicode61');"
+        )
+        self._conn.commit()
+
+    def add_brief(self, brief: DocumentaryBrief) -> int:
+        """
+        Adds the facts of a brief, skipping those already known.
+
+        Returns:
+            int: The number of facts added.
+        """
+        added = 0
+        now = time.time()
+        with self._lock:
+            for node in brief.knowledge_nodes:
+                for fact in node.fact_points:
+                    fact_data = fact.model_dump(mode="json", exclude={"related_fact_ids"})
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO facts"
+                        " (fingerprint, subject, node_title, source_url, fact, added_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            fact_fingerprint(fact.description),
+                            brief.subject,
+                            node.node_title,
+                            canonical_url(fact.source_url),
+                            json.dumps(fact_data, ensure_ascii=False),
+                            now,
+                        ),
+                    )
+                    if not cursor.rowcount:
+                        continue
+                    fact_id = cursor.lastrowid
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO fact_entities (entity, fact_id) VALUES (?, ?)",
+                        [(entity, fact_id) for entity in fact.related_entities],
+                    )
+                    self._conn.execute(
+                        "INSERT INTO facts_fts (rowid, node_title, description, entities) VALUES (?, ?, ?, ?)",
+                        (fact_id, node.node_title, fact.description, " ".join(fact.related_entities)),
+                    )
+                    added += 1
+            self._conn.commit()
+        return added
+
+    def _facts(self, sql: str, parameters: tuple) -> list[KnownFact]:
+        with self._lock:
+            rows = self._conn.execute(sql, parameters).fetchall()
+        return [
+            KnownFact(id, FactPoint.model_validate_json(fact), subject, node_title)
+            for id, fact, subject, node_title in rows
+        ]
+
+    def search(self, terms: list[str], limit: int) -> list[KnownFact]:
+        """Returns the facts matching any of the terms, best first; titles weigh most."""
+        if not terms:
+            return []
+        query = " OR ".join(f'"{term}"' for term in terms)
+        return self._facts(
+            "SELECT f.id, f.fact, f.subject, f.node_title FROM facts_fts"
+            " JOIN facts f ON f.id = facts_fts.rowid"
+            " WHERE facts_fts MATCH ? ORDER BY bm25(facts_fts, 10.0, 1.0, 2.0) LIMIT ?",
+            (query, limit),
+        )
+
+    def by_entity(self, entity: str, limit: int = 100) -> list[KnownFact]:
+        """Returns the facts related to an entity, ignoring case."""
+        return self._facts(
+            "SELECT f.id, f.fact, f.subject, f.node_title FROM fact_entities e"
+            " JOIN facts f ON f.id = e.fact_id WHERE e.entity = ? LIMIT ?",
+            (entity, limit),
+        )
+
+    def by_source(self, url: str, limit: int = 100) -> list[KnownFact]:
+        """Returns the facts taken from the page at `url`."""
+        return self._facts(
+            "SELECT id, fact, subject, node_title FROM facts WHERE source_url = ? LIMIT ?",
+            (canonical_url(url), limit),
+        )
+
+    def matching_facts(
+        self, node: KnowledgeNode, limit: int, accept: Callable[[KnownFact], bool] | None = None
+    ) -> list[KnownFact]:
+        """
+        Returns the known facts of a node: facts whose node title, text or
+        entities contain at least half of the words of the node's title, and
+        that `accept` accepts, if given.
+        """
+        terms = title_terms(node.node_title)
+        matches = []
+        # Candidates beyond `limit` may be filtered out below.
+        for known in self.search(terms, limit * 4):
+            words = set(title_terms(f"{known.node_title} {known.fact.description} {' '.join(known.fact.related_entities)}"))
+            if 2 * sum(term in words for term in terms) >= len(terms) and (accept is None or accept(known)):
+                matches.append(known)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()
+        return count
+
+
+def agrees_with(known: KnownFact, brief: DocumentaryBrief, node: KnowledgeNode) -> bool:
+    """
+    Whether a known fact is about the node beyond sharing words of its title:
+    it comes from a brief on the same subject, or one of its entities is
+    named in the node's title.
+    """
+    if title_terms(known.subject) == title_terms(brief.subject):
+        return True
+    node_terms = set(title_terms(node.node_title))
+    return any(
+        set(entity_terms) <= node_terms
+        for entity in known.fact.related_entities
+        if (entity_terms := title_terms(entity))
+    )
+
+
+def seed_node(knowledge_base: KnowledgeBase, brief: DocumentaryBrief, node: KnowledgeNode) -> tuple[int, bool]:
+    """
+    Merges the known facts of a node that agree with it into it, with their
+    sources. With `config.knowledge_base_skip_nodes`, marks it saturated when
+    enough of them were merged.
+
+    Returns:
+        tuple[int, bool]: The number of facts seeded, and whether the node
+        was marked saturated.
+    """
+    known = knowledge_base.matching_facts(
+        node, config.knowledge_base_max_facts, lambda item: agrees_with(item, brief, node)
+    )
+    if not known:
+        return 0, False
+    facts: list[FactPoint] = []
+    sources: dict[str, TopSource] = {}
+    for item in known:
+        # Ids are only unique within a brief.
+        facts.append(item.fact.model_copy(update={"fact_id": f"kb_{item.id}", "related_fact_ids": []}))
+        sources.setdefault(
+            canonical_url(item.fact.source_url),
+            TopSource(
+                url=item.fact.source_url,
+                title=urlsplit(item.fact.source_url).netloc or item.fact.source_url,
+                rationale=f"Source of known facts from the brief on '{item.subject}'.",
+            ),
+        )
+    merge = get_brief_index(brief).merge(
+        NodeUpdate(node_title=node.node_title, top_sources=list(sources.values()), fact_points=facts)
+    )
+    if merge is None:
+        return 0, False
+    skipped = config.knowledge_base_skip_nodes and len(known) >= config.knowledge_base_min_facts
+    if skipped:
+        node.research_status = ResearchStatus.SATURATED
+    return len(merge.added_facts), skipped
+
+
+_knowledge_base: KnowledgeBase | None = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Returns the process-wide knowledge base, opening it on first use."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase(config.knowledge_base_path)
+    return _knowledge_base
+
+
+def set_knowledge_base(knowledge_base: KnowledgeBase | None) -> None:
+    """Overrides the knowledge base, e.g. with an in-memory one in tests."""
+    global _knowledge_base
+    _knowledge_base = knowledge_base
+
+
+async def seed_brief(brief: DocumentaryBrief, search_queries: dict[str, list[str]]) -> dict[str, Any]:
+    """
+    Seeds the pending nodes of a new brief with known facts. Failures are
+    logged and leave the brief as it was built.
+
+    Returns:
+        dict: The `knowledge_base_stats` of the brief.
+    """
+    stats = {"nodes_seeded": 0, "nodes_skipped": 0, "facts_seeded": 0}
+    if config.knowledge_base_skip_nodes:
+        stats.update(searches_avoided=0, model_calls_avoided=0)
+    if not config.knowledge_base_enabled:
+        return stats
+    try:
+        knowledge_base = await asyncio.to_thread(get_knowledge_base)
+        for node in brief.knowledge_nodes:
+            if node.research_status != ResearchStatus.PENDING:
+                continue
+            seeded, skipped = await asyncio.to_thread(seed_node, knowledge_base, brief, node)
+            if not seeded:
+                continue
+            stats["nodes_seeded"] += 1
+            stats["facts_seeded"] += seeded
+            if skipped:
+                stats["nodes_skipped"] += 1
+                stats["searches_avoided"] += len(search_queries.get(node.node_title, []))
+                stats["model_calls_avoided"] += MODEL_CALLS_PER_PASS
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Could not seed brief '{brief.reference_id}' from the knowledge base: {e}")
+    return stats
+
+
+async def record_brief(brief: DocumentaryBrief) -> None:
+    """Adds the facts of a finalized brief to the knowledge base. Failures are logged."""
+    if not config.knowledge_base_enabled:
+        return
+    try:
+        added = await asyncio.to_thread(lambda: get_knowledge_base().add_brief(brief))
+    except (sqlite3.Error, OSError) as e:
+        logging.error(f"Could not add brief '{brief.reference_id}' to the knowledge base: {e}")
+        return
+    logging.info(f"Added {added} new facts of brief '{brief.reference_id}' to the knowledge base.")
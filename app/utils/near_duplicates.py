@@ -0,0 +1,216 @@
+"""Near-duplicate fact detection with shingled MinHash and LSH banding.
+
+Each fact description is reduced to a set of word shingles and summarized by a
+MinHash signature, whose agreement rate with another signature estimates the
+Jaccard similarity of the two shingle sets. Signatures are split into bands
+and bucketed (locality-sensitive hashing), so looking up the near duplicates
+of a fact only compares it with facts sharing at least one band bucket instead
+of every fact already collected.
+
+Signatures use one-permutation hashing: each shingle is hashed once and kept
+as the minimum of one of NUM_PERMUTATIONS bins, instead of being hashed once per
+permutation. Tokens are hashed with blake2b, memoized per token, and bigrams
+combine the hashes of their tokens, so signatures and band keys are the same
+in every process and can be compared across workers and restarts.
+"""
+
+import functools
+import hashlib
+import operator
+import re
+from collections.abc import Hashable
+from dataclasses import dataclass
+from itertools import pairwise
+from typing import Literal, cast, get_args
+
+from app.config import config
+from app.schemas.brief import FactPoint
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+
+_BIN_BITS = NUM_PERMUTATIONS.bit_length() - 1
+_HASH_MASK = (1 << 64) - 1
+# Upper bound of a bin value; also the offset added to values borrowed by
+# empty bins, so they never collide with a genuine minimum.
+_EMPTY = 1 << (64 - _BIN_BITS)
+_TOKEN = re.compile(r"\w+")
+_VALUE_MASK = _EMPTY - 1
+# Odd 64-bit multiplier combining the two token hashes of a bigram; the high
+# bits of the product, which pick the bin, depend on every bit of both.
+_PAIR = 0x9E3779B97F4A7C15
+
+Signature = tuple[int, ...]
+Scope = Literal["node", "brief"]
+Keep = Literal["higher_significance", "existing"]
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def shingle_hashes(text: str) -> set[int]:
+    """Returns the stable 64-bit hashes of the word unigrams and bigrams of the normalized text."""
+    hashes = [_token_hash(token) for token in _TOKEN.findall(text.casefold())]
+    return {*hashes, *[((a * _PAIR ^ b) * _PAIR) & _HASH_MASK for a, b in pairwise(hashes)]}
+
+
+def minhash(text: str) -> Signature:
+    """Computes the MinHash signature of a text's shingles."""
+    bins = [_EMPTY] * NUM_PERMUTATIONS
+    for h in shingle_hashes(text):
+        b, value = h >> (64 - _BIN_BITS), h & _VALUE_MASK
+        if value < bins[b]:
+            bins[b] = value
+
+    # Short texts leave bins empty; each borrows the value of the next filled
+    # bin (rotation densification) so any two signatures stay comparable.
+    filled = [b for b in range(NUM_PERMUTATIONS) if bins[b] < _EMPTY]
+    if filled and len(filled) < NUM_PERMUTATIONS:
+        dense = bins[:]
+        nearest = filled[0] + NUM_PERMUTATIONS
+        for b in range(NUM_PERMUTATIONS - 1, -1, -1):
+            if bins[b] < _EMPTY:
+                nearest = b
+            else:
+                dense[b] = bins[nearest % NUM_PERMUTATIONS] + (nearest - b) * _EMPTY
+        bins = dense
+    return tuple(bins)
+
+
+def band_keys(signature: Signature) -> list[int]:
+    """Returns the LSH bucket keys of a signature, one per band."""
+    # Rows are strided rather than contiguous: neighbouring bins share
+    # borrowed values after densification, which would correlate a band.
+    # Tuples of ints hash the same in every process.
+    return [hash((band, signature[band::BANDS])) for band in range(BANDS)]
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimates the Jaccard similarity of the texts behind two signatures."""
+    return sum(map(operator.eq, a, b)) / NUM_PERMUTATIONS
+
+
+class NearDuplicateIndex:
+    """
+    An LSH index of MinHash signatures, keyed by arbitrary hashable keys.
+    Adding a key again indexes another wording of it: the key is matched by
+    any of its signatures until it is removed.
+    """
+    def __init__(self) -> None:
+        self.signatures: dict[Hashable, list[Signature]] = {}
+        # Band hash -> key, or list of keys once several signatures share the
+        # bucket. Most buckets hold a single key, and not allocating a tuple
+        # and a list for each keeps large indexes cheap for the GC.
+        self._buckets: dict[int, Hashable | list[Hashable]] = {}
+        # Band hashes each key is bucketed under, over all its signatures.
+        self._bands: dict[Hashable, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, key: Hashable, signature: Signature, bands: list[int] | None = None) -> None:
+        """Indexes a signature, with its `band_keys` when already computed."""
+        signatures = self.signatures.setdefault(key, [])
+        if signature in signatures:
+            return
+        signatures.append(signature)
+        indexed = self._bands.setdefault(key, set())
+        for bucket in bands or band_keys(signature):
+            if bucket in indexed:
+                continue
+            indexed.add(bucket)
+            current = self._buckets.get(bucket)
+            if current is None:
+                self._buckets[bucket] = key
+            elif isinstance(current, list):
+                current.append(key)
+            else:
+                self._buckets[bucket] = [current, key]
+
+    def remove(self, key: Hashable) -> None:
+        """Removes every signature of the key from the index."""
+        self.signatures.pop(key, None)
+        for bucket in self._bands.pop(key, ()):
+            current = self._buckets.get(bucket)
+            if isinstance(current, list):
+                if key in current:
+                    current.remove(key)
+                if len(current) == 1:
+                    self._buckets[bucket] = current[0]
+            elif current == key:
+                del self._buckets[bucket]
+
+    def find(self, signature: Signature, threshold: float, bands: list[int] | None = None) -> Hashable | None:
+        """Returns the key of the most similar indexed signature at or above the threshold."""
+        best_key, best_similarity = None, threshold
+        seen: set[Hashable] = set()
+        for bucket in bands or band_keys(signature):
+            keys = self._buckets.get(bucket)
+            if keys is None:
+                continue
+            for key in keys if isinstance(keys, list) else (keys,):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = max(similarity(signature, indexed) for indexed in self.signatures[key])
+                if score >= best_similarity:
+                    best_key, best_similarity = key, score
+        return best_key
+
+
+@dataclass
+class DuplicatePolicy:
+    """How near-duplicate facts are detected and merged.
+
+    Attributes:
+        threshold (float): Estimated Jaccard similarity from which two facts
+            are duplicates. 0 disables near-duplicate detection.
+        scope (str): "node" compares a fact with its own node's facts only,
+            "brief" with every fact of the brief.
+        keep (str): "higher_significance" keeps the content of the fact with
+            the higher narrative_significance, "existing" always keeps the
+            fact already in the brief.
+        union_entities (bool): Merge the related_entities of both facts.
+    """
+    threshold: float = 0.6
+    scope: Scope = "node"
+    keep: Keep = "higher_significance"
+    union_entities: bool = True
+
+    def __post_init__(self) -> None:
+        if self.scope not in get_args(Scope):
+            raise ValueError(f"Unknown near-duplicate scope '{self.scope}', expected one of {get_args(Scope)}.")
+        if self.keep not in get_args(Keep):
+            raise ValueError(f"Unknown near-duplicate policy '{self.keep}', expected one of {get_args(Keep)}.")
+
+    @classmethod
+    def from_config(cls) -> "DuplicatePolicy":
+        """The policy set by the NEAR_DUPLICATE_* env vars, validated."""
+        return cls(
+            threshold=config.near_duplicate_threshold,
+            scope=cast(Scope, config.near_duplicate_scope),
+            keep=cast(Keep, config.near_duplicate_keep),
+        )
+
+
+def fold_duplicate(existing: FactPoint, duplicate: FactPoint, policy: DuplicatePolicy) -> bool:
+    """
+    Folds a near-duplicate fact into the existing one, in place, so the
+    existing fact keeps its fact_id and position.
+
+    Returns:
+        bool: Whether the existing fact's content was replaced by the duplicate's.
+    """
+    replaced = (
+        policy.keep == "higher_significance"
+        and duplicate.narrative_significance > existing.narrative_significance
+    )
+    entities = [*existing.related_entities, *duplicate.related_entities]
+    if replaced:
+        for name in ("description", "category", "narrative_significance", "visual_suggestion", "source_url"):
+            setattr(existing, name, getattr(duplicate, name))
+    if policy.union_entities:
+        existing.related_entities = list(dict.fromkeys(entities))
+    return replaced
@@ -0,0 +1,193 @@
+"""Node-scoped prompt context for the researcher and the evaluator.
+
+Both agents used to receive the whole `documentary_brief` (and the full
+conversation history) and had to find their target node themselves, so every
+call grew with all the facts collected so far. Here the target node is
+selected in Python and only what the call needs is injected: the node's
+rationale and queries, a capped digest of its known facts, the facts added by
+the last research pass and, for a node under refinement, the evaluation.
+
+`scope_prompt_callback` also trims the request history to the agent's own
+tool-call turn and logs the prompt size of every call, keeping running
+per-agent figures in the `prompt_metrics` state key.
+"""
+
+import json
+import logging
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import LlmRequest
+from google.adk.sessions.state import State
+from google.genai import types as genai_types
+from pydantic import ValidationError
+
+from app.config import config
+from app.schemas.brief import DocumentaryBrief, FactPoint, KnowledgeNode, ResearchStatus
+from app.schemas.narrative import NarrativePlan
+from app.utils.research_scheduler import scheduled_node
+from app.utils.saturation import RESEARCH_DELTA_KEY
+
+# Session state key holding prefetched search results for the target node.
+SEARCH_RESULTS_KEY = "search_results"
+# Session state key holding the per-agent prompt size figures.
+PROMPT_METRICS_KEY = "prompt_metrics"
+# Characters of a known fact's description shown in its digest line.
+_DIGEST_CHARS = 120
+
+
+def select_target_node(brief: DocumentaryBrief, scheduled: str | None = None) -> KnowledgeNode | None:
+    """
+    Returns the open node the research schedule picked, or else the "active"
+    node, or else the first "pending" one.
+    """
+    pending = None
+    for node in brief.knowledge_nodes:
+        if node.node_title == scheduled and node.research_status in (ResearchStatus.PENDING, ResearchStatus.ACTIVE):
+            return node
+    for node in brief.knowledge_nodes:
+        if node.research_status == ResearchStatus.ACTIVE:
+            return node
+        if pending is None and node.research_status == ResearchStatus.PENDING:
+            pending = node
+    return pending
+
+
+def fact_digest(fact: FactPoint) -> str:
+    """A one-line, truncated stand-in for a fact the model must not repeat."""
+    description = fact.description
+    if len(description) > _DIGEST_CHARS:
+        description = description[:_DIGEST_CHARS - 3].rstrip() + "..."
+    return f"{fact.fact_id}: {description}"
+
+
+def _search_queries(state: Mapping | State, title: str) -> list[str]:
+    try:
+        plan = NarrativePlan.model_validate(state.get("research_plan"))
+    except ValidationError:
+        return []
+    for node in plan.knowledge_nodes:
+        if node.node_title == title:
+            return node.search_queries
+    return []
+
+
+def _last_pass_facts(state: Mapping | State, node: KnowledgeNode) -> list[FactPoint]:
+    """The facts the last research pass added to the node (capped)."""
+    delta = state.get(RESEARCH_DELTA_KEY) or {}
+    if delta.get("node_title") == node.node_title:
+        count = delta.get("new_facts", 0)
+    else:
+        count = config.prompt_max_new_facts
+    count = min(count, config.prompt_max_new_facts)
+    return node.fact_points[-count:] if count else []
+
+
+def node_context(state: Mapping | State, include_new_facts: bool = False) -> dict[str, Any] | None:
+    """
+    Builds the node-scoped context of the next researcher or evaluator call.
+
+    Returns:
+        dict | None: The context, or None if no node is left to research.
+    """
+    try:
+        brief = DocumentaryBrief.model_validate(state.get("documentary_brief"))
+    except ValidationError:
+        return None
+    if (node := select_target_node(brief, scheduled_node(state))) is None:
+        return None
+
+    new_facts = _last_pass_facts(state, node) if include_new_facts else []
+    new_ids = {id(fact) for fact in new_facts}
+    known = [fact for fact in node.fact_points if id(fact) not in new_ids]
+    # Keep the most significant facts when the digest has to be capped.
+    known = sorted(known, key=lambda fact: -fact.narrative_significance)[:config.prompt_max_known_facts]
+
+    context: dict[str, Any] = {
+        "subject": brief.subject,
+        "node_title": node.node_title,
+        "rationale": node.rationale,
+        "axis": node.axis,
+        "research_status": node.research_status.value,
+        "search_queries": _search_queries(state, node.node_title),
+        "fact_count": len(node.fact_points),
+        "source_count": len(node.top_sources),
+        "known_facts": [fact_digest(fact) for fact in known],
+    }
+    if include_new_facts:
+        context["new_facts"] = [fact.model_dump(mode="json") for fact in new_facts]
+    if node.research_status == ResearchStatus.ACTIVE and (evaluation := state.get("research_evaluation")):
+        context["research_evaluation"] = {
+            "comment": evaluation.get("comment"),
+            "follow_up_queries": evaluation.get("follow_up_queries"),
+        }
+    if results := state.get(SEARCH_RESULTS_KEY):
+        context["search_results"] = results
+    return context
+
+
+def node_instruction(prompt: str, include_new_facts: bool = False) -> Callable[[ReadonlyContext], str]:
+    """
+    Returns an instruction provider appending the target node's context to
+    the prompt, instead of letting the model search the whole brief for it.
+    """
+    def provider(ctx: ReadonlyContext) -> str:
+        context = node_context(ctx.state, include_new_facts)
+        if context is None:
+            return prompt + "\n\nTARGET NODE: none, every node has been researched."
+        return prompt + "\n\nTARGET NODE:\n" + json.dumps(context, ensure_ascii=False, indent=1)
+    return provider
+
+
+def _content_chars(content: genai_types.Content) -> int:
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response:
+            chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return chars
+
+
+def _is_tool_turn(content: genai_types.Content) -> bool:
+    return any(part.function_call or part.function_response for part in content.parts or [])
+
+
+def scope_prompt_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    """
+    Before-model callback keeping only the agent's own tool-call turn in the
+    request history, since the instruction already carries the node's
+    context, and logging the resulting prompt size.
+    """
+    contents = llm_request.contents
+    turn_start = len(contents)
+    while turn_start and _is_tool_turn(contents[turn_start - 1]):
+        turn_start -= 1
+    task = genai_types.Content(
+        role="user", parts=[genai_types.Part(text="Work on the TARGET NODE described in your instructions.")]
+    )
+    llm_request.contents = [task, *contents[turn_start:]]
+
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    instruction_chars = len(system_instruction) if isinstance(system_instruction, str) else 0
+    history_chars = sum(_content_chars(content) for content in llm_request.contents)
+    total = instruction_chars + history_chars
+    agent = callback_context.agent_name
+    logging.info(
+        f"[{agent}] Prompt of {total} chars (~{total // 4} tokens): {instruction_chars} "
+        f"instruction, {history_chars} history in {len(llm_request.contents)} contents "
+        f"(trimmed {turn_start} earlier contents)."
+    )
+
+    metrics = dict(callback_context.state.get(PROMPT_METRICS_KEY) or {})
+    figures = dict(metrics.get(agent) or {"calls": 0, "total_chars": 0, "max_chars": 0})
+    figures["calls"] += 1
+    figures["total_chars"] += total
+    figures["max_chars"] = max(figures["max_chars"], total)
+    figures["last_chars"] = total
+    metrics[agent] = figures
+    callback_context.state[PROMPT_METRICS_KEY] = metrics
@@ -0,0 +1,262 @@
+"""Client-side rate limiting, retries and hedged requests for model and search calls.
+
+Briefs researched concurrently (batch runs, parallel workers) shared provider
+quotas with no coordination: every call was sent as soon as it was made, a
+429 failed the agent that got it, and one slow call held up the serial loop
+waiting on it. Calls now go through a RateLimiter per model tier (the model
+name) and per search backend, shared by every brief of the process:
+
+- A token bucket paces the calls. Its rate follows AIMD: each successful
+  call raises it towards `config.rate_limit_rps` by about
+  `config.rate_limit_increase` calls per second each second, and a throttled
+  call (429, or 503 "unavailable") halves it, down to
+  `config.rate_limit_min_rps`; calls that took their token before the last
+  decrease do not halve it again. Bursts shrink with the rate.
+- Throttled and transient server errors are retried up to
+  `config.rate_limit_max_retries` times, after an exponential backoff with
+  full jitter, each retry taking a token again.
+- A call still running after the p95 latency of the limiter's recent calls is
+  hedged: a duplicate is sent if a token is free right away and hedges stay
+  under `config.hedge_budget` of the calls, and the first answer wins.
+
+`RATE_LIMITS="gemini-2.5-pro=2,GroundedSearchBackend=5"` overrides the rate
+of individual limiters. `rate_limit_metrics()` returns, per limiter, the
+current rate, queue depth, throttle events, retries, hedges and hedge wins;
+batch runs save them in their report and traced calls carry them as span
+attributes.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+
+from opentelemetry import trace
+
+from app.config import config
+
+T = TypeVar("T")
+
+# HTTP statuses of calls refused for quota or load, which lower the rate.
+THROTTLE_CODES = frozenset({429, 503})
+# HTTP statuses worth retrying.
+RETRY_CODES = THROTTLE_CODES | {500, 502, 504}
+# Latencies kept per limiter to compute the hedging threshold.
+LATENCY_WINDOW = 200
+
+
+def status_of(error: BaseException) -> int | None:
+    """The HTTP status of a failed call, from google-genai and httpx errors alike."""
+    code = getattr(error, "code", None)
+    if not isinstance(code, int):
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+class TokenBucket:
+    """
+    A token bucket of `burst` tokens refilled at `rate` tokens per second,
+    kept as the time the next token is due (the GCRA formulation), so calls
+    reserve their token at once and then sleep until it is due.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._due = 0.0
+
+    def _reserve(self, blocking: bool) -> float | None:
+        now = time.monotonic()
+        with self._lock:
+            due = max(self._due, now)
+            start = max(now, due - (self.burst - 1) / self.rate)
+            if start > now and not blocking:
+                return None
+            self._due = due + 1 / self.rate
+        return start - now
+
+    async def acquire(self) -> float:
+        """Takes a token, waiting for it if needed; returns the seconds waited."""
+        # Never None: a blocking reservation always gets a token.
+        wait = self._reserve(blocking=True) or 0.0
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        """Takes a token only if one is available right away."""
+        return self._reserve(blocking=False) is not None
+
+
+@dataclass
+class RateLimitStats:
+    """Counters of a RateLimiter."""
+    calls: int = 0
+    failures: int = 0
+    throttled: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    queued_seconds: float = 0.0
+
+
+class RateLimiter:
+    """Paces, retries and hedges the calls of one model tier or search backend."""
+    def __init__(self, name: str, rate: float):
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = min(config.rate_limit_min_rps, rate)
+        self.bucket = TokenBucket(rate, config.rate_limit_burst)
+        self.stats = RateLimitStats()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._decreased_at = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def _set_rate(self, rate: float) -> None:
+        self.bucket.rate = rate
+        # Bursts shrink with the rate, or a lowered rate would still burst
+        # past the quota.
+        self.bucket.burst = max(1, round(config.rate_limit_burst * rate / self.max_rate))
+
+    def hedge_delay(self) -> float | None:
+        """The p95 latency of recent calls, or None until enough were made."""
+        if not config.hedge_enabled or len(self._latencies) < config.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95)]
+
+    def _succeeded(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+        # About `rate_limit_increase` more calls per second, each second.
+        self._set_rate(min(self.max_rate, self.rate + config.rate_limit_increase / self.rate))
+
+    def _throttled(self, queued_at: float) -> None:
+        self.stats.throttled += 1
+        # Calls that took their token before the last decrease were paced at
+        # the old rate.
+        if queued_at < self._decreased_at:
+            return
+        self._decreased_at = time.monotonic()
+        self._set_rate(max(self.min_rate, self.rate / 2))
+        logging.warning(f"Calls to '{self.name}' throttled, lowering the rate to {self.rate:.2f}/s.")
+
+    async def _take_token(self) -> float:
+        self.stats.queued += 1
+        self.stats.max_queued = max(self.stats.max_queued, self.stats.queued)
+        try:
+            waited = await self.bucket.acquire()
+        finally:
+            self.stats.queued -= 1
+        self.stats.queued_seconds += waited
+        return waited
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        tasks = [asyncio.ensure_future(attempt())]
+        span = trace.get_current_span()
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.stats.hedges < config.hedge_budget * self.stats.calls and self.bucket.try_acquire():
+                    self.stats.hedges += 1
+                    span.set_attribute("hedged", True)
+                    tasks.append(asyncio.ensure_future(attempt()))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.stats.hedge_wins += 1
+                            span.set_attribute("hedge_won", True)
+                        return task.result()
+            raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `attempt`, a function starting the call, once a token is free,
+        retrying it on throttled and transient errors and hedging it when slow.
+        """
+        self.stats.calls += 1
+        span = trace.get_current_span()
+        retries, queued_seconds = 0, 0.0
+        while True:
+            queued_at = time.monotonic()
+            queued_seconds += await self._take_token()
+            span.set_attribute("queued_seconds", round(queued_seconds, 3))
+            started = time.monotonic()
+            try:
+                result = await self._hedged(attempt)
+            except Exception as e:
+                status = status_of(e)
+                if status in THROTTLE_CODES:
+                    self._throttled(queued_at)
+                if status not in RETRY_CODES or retries == config.rate_limit_max_retries:
+                    self.stats.failures += 1
+                    raise
+                retries += 1
+                self.stats.retries += 1
+                span.set_attribute("retries", retries)
+                await asyncio.sleep(random.uniform(0, min(30.0, config.rate_limit_backoff * 2 ** retries)))
+                continue
+            self._succeeded(time.monotonic() - started)
+            return result
+
+    def metrics(self) -> dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            **asdict(self.stats),
+            "queued_seconds": round(self.stats.queued_seconds, 3),
+            "rate": round(self.rate, 3),
+            "hedge_after_seconds": round(delay, 3) if delay is not None else None,
+        }
+
+
+def _rate_overrides() -> dict[str, float]:
+    overrides = {}
+    for item in config.rate_limits.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            overrides[name.strip()] = float(rate)
+    return overrides
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Returns the process-wide rate limiter of a model or search backend."""
+    if (limiter := _limiters.get(name)) is None:
+        limiter = _limiters[name] = RateLimiter(name, _rate_overrides().get(name, config.rate_limit_rps))
+    return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Forgets every limiter, with its rate and metrics, e.g. between benchmark runs."""
+    _limiters.clear()
+
+
+def rate_limit_metrics() -> dict[str, dict[str, Any]]:
+    """Returns the metrics of every limiter, by name."""
+    return {name: limiter.metrics() for name, limiter in _limiters.items()}
+
+
+async def rate_limited(name: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    """Runs a call through the named limiter, or directly when rate limiting is disabled."""
+    if not config.rate_limit_enabled:
+        return await attempt()
+    return await get_rate_limiter(name).call(attempt)
@@ -0,0 +1,193 @@
+"""Priority-driven scheduling of research passes under a wall-clock budget.
+
+The refinement loop researched nodes in plan order, with up to three passes
+each, so a brief cut short ended with the first axes saturated and the last
+ones untouched. The ResearchSchedule, kept under `research_schedule` in
+session state, picks the next node instead, by the expected marginal value
+of one more pass on it:
+
+- its expected yield: the facts its last pass added, decayed along the
+  facts-per-pass yield curve observed on every node of the brief so far
+  (blended with `DEFAULT_DECAY` while the curve has few samples), or the mean
+  first-pass yield, or `config.scheduler_prior_yield`, for a node not
+  researched yet,
+- weighted down as the node, and the average node of its axis, gather facts,
+  so thin nodes and axes come first.
+
+Every node gets a first pass. Research stops early once no open node is
+expected to yield `config.scheduler_min_yield` facts or more from another
+pass, or once `config.research_budget_seconds` of wall time is spent. The brief is valid
+after every pass, so a stopped run goes straight to `brief_finalizer` with
+the facts found so far; the nodes it did not finish stay open and are
+researched when the run is resumed from its checkpoint.
+
+The refinement loop's iteration cap is part of the schedule too, so each
+session has its own: `LoopConfigAgent` sets `max_loop_passes` and the
+`EscalationChecker` stops the loop once that many passes have run.
+"""
+
+import math
+import time
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from google.adk.sessions.state import State
+
+from app.config import config
+from app.schemas.brief import DocumentaryBrief, KnowledgeNode, ResearchStatus
+
+# Session state key holding the schedule of the brief being researched.
+RESEARCH_SCHEDULE_KEY = "research_schedule"
+# Facts at which a node, or the average node of an axis, is worth half as much.
+FACT_SCALE = 10
+# Yield ratio of consecutive passes assumed until the curve has been observed.
+DEFAULT_DECAY = 0.5
+OPEN_STATUSES = (ResearchStatus.PENDING, ResearchStatus.ACTIVE)
+
+
+def _coverage_weight(facts: float) -> float:
+    return FACT_SCALE / (FACT_SCALE + facts)
+
+
+@dataclass
+class ResearchSchedule:
+    """The research passes of a brief so far, and the node to research next."""
+    started_at: float = field(default_factory=time.time)
+    budget_seconds: float = field(default_factory=lambda: config.research_budget_seconds)
+    # New facts of each pass, by node title.
+    passes: dict[str, list[int]] = field(default_factory=dict)
+    timed_passes: int = 0
+    pass_seconds: float = 0.0
+    next_node: str | None = None
+    # When the refinement loop's current pass started.
+    step_started_at: float | None = None
+    # Passes run by the refinement loop, and the most it may run.
+    loop_passes: int = 0
+    max_loop_passes: int | None = None
+    stopped: str | None = None
+
+    @classmethod
+    def from_state(cls, state: Mapping | State) -> "ResearchSchedule":
+        data = state.get(RESEARCH_SCHEDULE_KEY)
+        return cls(**data) if isinstance(data, dict) else cls()
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def remaining_seconds(self) -> float:
+        if self.budget_seconds <= 0:
+            return math.inf
+        return self.budget_seconds - (time.time() - self.started_at)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.remaining_seconds <= 0
+
+    def record_pass(self, title: str, new_facts: int, seconds: float | None = None) -> None:
+        """Records the facts a research pass added to a node, and how long it took."""
+        self.passes.setdefault(title, []).append(new_facts)
+        if seconds is not None:
+            self.timed_passes += 1
+            self.pass_seconds += seconds
+
+    def yield_curve(self) -> list[tuple[float, int]]:
+        """The mean new facts, and the passes sampled, of the first, second, ... pass over every node."""
+        totals: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        for yields in self.passes.values():
+            for position, new_facts in enumerate(yields):
+                totals[position][0] += new_facts
+                totals[position][1] += 1
+        return [(totals[position][0] / totals[position][1], totals[position][1]) for position in range(len(totals))]
+
+    def expected_yield(self, title: str, curve: list[tuple[float, int]] | None = None) -> float:
+        """The new facts one more pass on the node is expected to add."""
+        curve = self.yield_curve() if curve is None else curve
+        yields = self.passes.get(title)
+        if not yields:
+            return curve[0][0] if curve else config.scheduler_prior_yield
+        done = len(yields)
+        decay = DEFAULT_DECAY
+        if done < len(curve) and curve[done - 1][0] > 0:
+            # One sample counts as much as the default.
+            observed, samples = min(curve[done][0] / curve[done - 1][0], 1.0), curve[done][1]
+            decay = (observed * samples + DEFAULT_DECAY) / (samples + 1)
+        return yields[-1] * decay
+
+    def ranked(self, brief: DocumentaryBrief) -> list[tuple[float, float, KnowledgeNode]]:
+        """
+        Returns the open nodes with their marginal value and expected yield,
+        most valuable first, in plan order when the scheduler is disabled.
+        """
+        curve = self.yield_curve()
+        axis_facts: dict[str, list[int]] = defaultdict(list)
+        for node in brief.knowledge_nodes:
+            axis_facts[node.axis].append(len(node.fact_points))
+        candidates = []
+        for node in brief.knowledge_nodes:
+            if node.research_status not in OPEN_STATUSES:
+                continue
+            expected = self.expected_yield(node.node_title, curve)
+            facts = axis_facts[node.axis]
+            value = expected * _coverage_weight(len(node.fact_points)) * _coverage_weight(sum(facts) / len(facts))
+            candidates.append((value, expected, node))
+        if config.research_scheduler_enabled:
+            candidates.sort(key=lambda candidate: -candidate[0])
+        return candidates
+
+    def choose(self, brief: DocumentaryBrief) -> KnowledgeNode | None:
+        """
+        Picks the node to research next. Returns None, with the reason in
+        `stopped`, when every node is complete, the budget is spent, or no
+        node is expected to yield enough.
+        """
+        self.next_node = None
+        candidates = self.ranked(brief)
+        if not candidates:
+            self.stopped = "complete"
+            return None
+        if self.over_budget:
+            self.stopped = "budget"
+            return None
+        if config.research_scheduler_enabled:
+            candidates = [
+                candidate for candidate in candidates
+                if candidate[1] >= config.scheduler_min_yield or candidate[2].node_title not in self.passes
+            ]
+            if not candidates:
+                self.stopped = "low_yield"
+                return None
+        else:
+            # As before: the node under refinement, or else the first pending one.
+            candidates.sort(key=lambda candidate: candidate[2].research_status != ResearchStatus.ACTIVE)
+        self.stopped = None
+        node = candidates[0][2]
+        self.next_node = node.node_title
+        return node
+
+    def iterations(self, open_nodes: int) -> int:
+        """
+        The refinement loop's iteration cap: `max_passes_per_node` passes per
+        open node, or fewer when the budget left only allows fewer passes at
+        the mean pass duration observed so far.
+        """
+        iterations = open_nodes * config.max_passes_per_node
+        if self.timed_passes and not math.isinf(remaining := self.remaining_seconds):
+            iterations = min(iterations, math.ceil(remaining / (self.pass_seconds / self.timed_passes)))
+        return max(iterations, 1)
+
+    def start_loop(self, open_nodes: int) -> None:
+        """Caps the refinement loop about to run at `iterations(open_nodes)` passes."""
+        self.loop_passes = 0
+        self.max_loop_passes = self.iterations(open_nodes)
+
+    def loop_exhausted(self) -> bool:
+        return self.max_loop_passes is not None and self.loop_passes >= self.max_loop_passes
+
+
+def scheduled_node(state: Mapping | State) -> str | None:
+    """The title of the node the schedule in `state` picked, if any."""
+    schedule = state.get(RESEARCH_SCHEDULE_KEY)
+    return schedule.get("next_node") if isinstance(schedule, dict) else None
@@ -0,0 +1,99 @@
+"""Local saturation checks that stand in for `research_evaluator` calls.
+
+The evaluator runs on the critic model after every research pass, including
+passes that added nothing new, which its prompt then simply declares
+saturated. Each merge records the delta it made to its node (new facts, new
+sources and their significance histogram) in session state, and
+`saturation_verdict` applies the evaluator's diminishing-returns rule to it
+locally. A node with no facts yet is only stalled after
+`EMPTY_PASSES_TO_STALL` empty passes in a row, so a single unlucky pass
+still gets the evaluator's follow-up queries. Evaluations avoided this way
+are counted in `evaluation_stats`.
+"""
+
+from collections.abc import MutableMapping
+from typing import Any
+
+from google.adk.sessions.state import State
+
+from app.config import config
+from app.schemas.brief import ResearchStatus
+from app.utils.brief_index import MergeResult
+
+# Session state key holding the delta of the last research merge.
+RESEARCH_DELTA_KEY = "research_delta"
+# Session state key holding the evaluated/skipped evaluation counters.
+EVALUATION_STATS_KEY = "evaluation_stats"
+# Empty passes in a row after which a node without facts is stalled.
+EMPTY_PASSES_TO_STALL = 2
+
+
+def research_delta(merge: MergeResult, previous: dict[str, Any] | None = None) -> dict[str, Any]:
+    """
+    Summarizes what a merge changed in its node, as JSON-safe data, counting
+    empty passes in a row from the `previous` delta.
+    """
+    histogram: dict[str, int] = {}
+    for fact in merge.added_facts:
+        key = str(fact.narrative_significance)
+        histogram[key] = histogram.get(key, 0) + 1
+    empty_passes = 0
+    if not merge.added_facts and not merge.added_sources:
+        empty_passes = 1
+        if previous and previous["node_title"] == merge.node.node_title:
+            empty_passes += previous.get("empty_passes", 0)
+    return {
+        "node_title": merge.node.node_title,
+        "new_facts": len(merge.added_facts),
+        "new_sources": len(merge.added_sources),
+        "merged_facts": len(merge.merged_facts),
+        "facts_before": len(merge.node.fact_points) - len(merge.added_facts),
+        "significance_histogram": histogram,
+        "empty_passes": empty_passes,
+    }
+
+
+def significant_facts(delta: dict[str, Any]) -> int:
+    """Counts the new facts above the configured significance threshold."""
+    return sum(
+        count for significance, count in delta["significance_histogram"].items()
+        if int(significance) > config.saturation_significance
+    )
+
+
+def saturation_verdict(delta: dict[str, Any]) -> ResearchStatus | None:
+    """
+    Decides a node's status from the delta of its last research pass.
+
+    Returns:
+        ResearchStatus | None: STALLED if the last `EMPTY_PASSES_TO_STALL`
+        passes found nothing for a node that still has no facts, SATURATED
+        if the pass added nothing new to a node with facts or fewer
+        significant facts than `config.saturation_min_significant_facts`;
+        None if the evaluator is needed to judge the pass.
+    """
+    if delta["new_facts"] == 0 and delta["new_sources"] == 0:
+        if delta["facts_before"]:
+            return ResearchStatus.SATURATED
+        if delta.get("empty_passes", 1) >= EMPTY_PASSES_TO_STALL:
+            return ResearchStatus.STALLED
+        return None
+    if delta["facts_before"] and significant_facts(delta) < config.saturation_min_significant_facts:
+        return ResearchStatus.SATURATED
+    return None
+
+
+def record_evaluation(state: MutableMapping | State, skipped: bool) -> None:
+    """Counts an evaluation as run by the model or skipped locally."""
+    stats = dict(state.get(EVALUATION_STATS_KEY) or {"evaluated": 0, "skipped": 0})
+    stats["skipped" if skipped else "evaluated"] += 1
+    state[EVALUATION_STATS_KEY] = stats
+
+
+def add_evaluation_stats(*stats: dict[str, int] | None) -> dict[str, int]:
+    """Sums evaluation counters, e.g. those of the parallel research workers."""
+    total = {"evaluated": 0, "skipped": 0}
+    for counters in stats:
+        for key, count in (counters or {}).items():
+            total[key] = total.get(key, 0) + count
+    return total
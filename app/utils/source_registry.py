@@ -0,0 +1,255 @@
+"""The web sources of a session, keyed by canonical URL.
+
+`collect_research_sources_callback` assigned short ids to raw grounding URIs,
+so the same page reached with tracking parameters, over http and https, with
+a trailing slash or through a redirect link got several ids, and every
+grounding support it met was appended to the source's `supported_claims`
+again, without bound.
+
+The SourceRegistry is attached to the session object, like the EventIndex
+and the BriefCache, and wraps the `sources` and `url_to_short_id` state
+values. `url_to_short_id` is keyed by canonical URL, so looking a source up
+by URL or by short id is a dict access, and the claims of a source are
+deduplicated by text and capped at `config.max_claims_per_source`, keeping
+the most confident ones. `canonical_url` is also what the brief index
+dedupes `TopSource`s of node updates by.
+
+`collect_research_sources_callback` runs after `unified_researcher`. Parallel
+workers collect the sources of their node, prefetched search results
+included, in a registry of their own, merged into the session's in plan
+order once every worker has finished.
+`citation_replacement_callback` reads the registry too, but is not attached
+to any agent: no agent of the pipeline writes the `final_cited_report` it
+rewrites.
+"""
+
+import functools
+import re
+from collections.abc import Mapping
+from operator import itemgetter
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from google.adk.sessions import Session
+from google.adk.sessions.state import State
+from google.genai import types as genai_types
+
+from app.config import config
+
+SOURCES_KEY = "sources"
+URL_TO_SHORT_ID_KEY = "url_to_short_id"
+
+# Query parameters that only track the visitor.
+TRACKING_PARAMS = re.compile(
+    r"^(utm_\w+|gclid|gclsrc|dclid|fbclid|msclkid|mc_cid|mc_eid|igshid|_ga|_gl|_hsenc|_hsmi|ref_src|ref_url|spm)$",
+    re.IGNORECASE,
+)
+# Redirect links, by host and path, and the parameters holding their target.
+REDIRECTS = {
+    ("google.com", "/url"): ("url", "q"),
+    ("l.facebook.com", "/l.php"): ("u",),
+    ("lm.facebook.com", "/l.php"): ("u",),
+}
+DEFAULT_PORTS = {":80", ":443"}
+# Nested redirect links followed at most.
+MAX_REDIRECTS = 3
+
+
+# Search results link the same URLs again and again.
+@functools.lru_cache(maxsize=65536)
+def canonical_url(url: str) -> str:
+    """
+    Returns the URL identifying the same page as `url`: redirect links are
+    followed to their target, http becomes https, the host is lowercased
+    without `www.` or a default port, tracking parameters are dropped and the
+    others sorted, and the fragment and trailing slash are removed.
+    """
+    for hops in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower()
+        for port in DEFAULT_PORTS:
+            host = host.removesuffix(port)
+        host = host.removeprefix("www.")
+        path = parts.path.rstrip("/")
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        target_params = REDIRECTS.get((host, path))
+        target = next(
+            (value for name, value in query if name in (target_params or ()) and value.lower().startswith(("http://", "https://"))),
+            None,
+        )
+        # Past the last redirect followed, the URL reached is canonicalized
+        # as it is.
+        if target is None or hops == MAX_REDIRECTS:
+            break
+        url = target
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    query = sorted((name, value) for name, value in query if not TRACKING_PARAMS.match(name))
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class SourceRegistry:
+    """A session's sources, with short ids by canonical URL and deduplicated claims."""
+    def __init__(self, sources: dict[str, dict], url_to_short_id: dict[str, str], max_claims: int):
+        self.sources = sources
+        self.url_to_short_id = url_to_short_id
+        self.max_claims = max_claims
+        self.changed = False
+        # Claims of each source by text, to deduplicate them.
+        self._claims: dict[str, dict[str, dict]] = {}
+        # Lowest confidence kept by each full source, when known.
+        self._floors: dict[str, float] = {}
+        self._next_id = 1
+        self._reindex()
+
+    def _reindex(self) -> None:
+        for short_id in [*self.sources, *self.url_to_short_id.values()]:
+            if (number := short_id.removeprefix("src-")).isdigit():
+                self._next_id = max(self._next_id, int(number) + 1)
+        # States written before the registry are keyed by raw URL; the first
+        # short id of a canonical URL is kept.
+        by_canonical: dict[str, str] = {}
+        for url, short_id in self.url_to_short_id.items():
+            by_canonical.setdefault(canonical_url(url), short_id)
+        if by_canonical != self.url_to_short_id:
+            self.url_to_short_id.clear()
+            self.url_to_short_id.update(by_canonical)
+            self.changed = True
+        for short_id, source in self.sources.items():
+            claims = self._claims[short_id] = {}
+            for claim in source.get("supported_claims", []):
+                claims.setdefault(claim["text_segment"], claim)
+            if len(claims) != len(source.get("supported_claims", [])):
+                source["supported_claims"] = list(claims.values())
+                self.changed = True
+
+    def holds(self, state: Mapping | State) -> bool:
+        """Whether the state's sources are the ones wrapped by the registry."""
+        return state.get(SOURCES_KEY) is self.sources and state.get(URL_TO_SHORT_ID_KEY) is self.url_to_short_id
+
+    def lookup(self, url: str) -> dict | None:
+        """Returns the source of the page at `url`, or None."""
+        short_id = self.url_to_short_id.get(canonical_url(url))
+        return self.sources.get(short_id) if short_id else None
+
+    def get(self, short_id: str) -> dict | None:
+        """Returns the source with the given short id, or None."""
+        return self.sources.get(short_id)
+
+    def register(self, url: str, title: str | None, domain: str | None) -> str:
+        """Returns the short id of the page at `url`, adding it as a new source if needed."""
+        key = canonical_url(url)
+        if (short_id := self.url_to_short_id.get(key)) is not None:
+            return short_id
+        short_id = f"src-{self._next_id}"
+        self._next_id += 1
+        self.url_to_short_id[key] = short_id
+        self.sources[short_id] = {
+            "short_id": short_id,
+            "title": title,
+            "url": url,
+            "domain": domain,
+            "supported_claims": [],
+        }
+        self._claims[short_id] = {}
+        self.changed = True
+        return short_id
+
+    def add_claim(self, short_id: str, text: str, confidence: float) -> None:
+        """
+        Records a claim the source supports. A known claim keeps its highest
+        confidence; a source with `max_claims` claims only takes a new one in
+        place of a less confident one.
+        """
+        claims = self._claims[short_id]
+        if (claim := claims.get(text)) is not None:
+            if confidence > claim["confidence"]:
+                claim["confidence"] = confidence
+                self.changed = True
+            return
+        supported = self.sources[short_id]["supported_claims"]
+        claim = {"text_segment": text, "confidence": confidence}
+        if len(supported) < self.max_claims:
+            supported.append(claim)
+        else:
+            # A full source only rescans its claims for one more confident
+            # than the weakest it kept.
+            if confidence <= self._floors.get(short_id, -1.0):
+                return
+            if not supported:
+                return
+            weakest = min(supported, key=itemgetter("confidence"))
+            if weakest["confidence"] >= confidence:
+                self._floors[short_id] = weakest["confidence"]
+                return
+            del claims[weakest["text_segment"]]
+            supported[supported.index(weakest)] = claim
+            self._floors.pop(short_id, None)
+        claims[text] = claim
+        self.changed = True
+
+    def add_grounding(self, grounding_metadata: genai_types.GroundingMetadata) -> dict[int, str]:
+        """
+        Registers the web sources of grounding metadata and the claims they
+        support; returns the short id of each web chunk, by chunk index.
+        """
+        short_ids = {}
+        for idx, chunk in enumerate(grounding_metadata.grounding_chunks or []):
+            if not chunk.web or not chunk.web.uri:
+                continue
+            title = (
+                chunk.web.title
+                if chunk.web.title != chunk.web.domain
+                else chunk.web.domain
+            )
+            short_ids[idx] = self.register(chunk.web.uri, title, chunk.web.domain)
+        for support in grounding_metadata.grounding_supports or []:
+            confidence_scores = support.confidence_scores or []
+            chunk_indices = support.grounding_chunk_indices or []
+            text_segment = (support.segment.text or "") if support.segment else ""
+            for i, chunk_idx in enumerate(chunk_indices):
+                if chunk_idx in short_ids:
+                    confidence = (
+                        confidence_scores[i] if i < len(confidence_scores) else 0.5
+                    )
+                    self.add_claim(short_ids[chunk_idx], text_segment, confidence)
+        return short_ids
+
+    def merge(self, sources: Mapping[str, dict]) -> None:
+        """
+        Registers the sources of another registry, e.g. a parallel worker's,
+        with their claims. They get this registry's short ids.
+        """
+        for source in sources.values():
+            short_id = self.register(source["url"], source.get("title"), source.get("domain"))
+            for claim in source.get("supported_claims", []):
+                self.add_claim(short_id, claim["text_segment"], claim["confidence"])
+
+    def state_delta(self) -> dict[str, Any]:
+        """Returns the state delta writing the registry back, or nothing if it did not change."""
+        if not self.changed:
+            return {}
+        self.changed = False
+        return {SOURCES_KEY: self.sources, URL_TO_SHORT_ID_KEY: self.url_to_short_id}
+
+
+def get_source_registry(session: Session, state: Mapping | State | None = None) -> SourceRegistry:
+    """
+    Returns the source registry of the session, re-indexing the sources in
+    `state` (the session's state by default) only if they are not the
+    registry's own.
+    """
+    state = session.state if state is None else state
+    registry = session.__dict__.get("_source_registry")
+    if registry is None or not registry.holds(state):
+        # Empty dicts already in the state are wrapped too, so registering
+        # a source writes it to the state.
+        sources, url_to_short_id = state.get(SOURCES_KEY), state.get(URL_TO_SHORT_ID_KEY)
+        registry = SourceRegistry(
+            sources if sources is not None else {},
+            url_to_short_id if url_to_short_id is not None else {},
+            config.max_claims_per_source,
+        )
+        session.__dict__["_source_registry"] = registry
+    return registry
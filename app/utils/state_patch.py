@@ -0,0 +1,160 @@
+"""Incremental state updates (JSON Patch) for the SSE stream of a run.
+
+Every write of the brief, `sources` or `url_to_short_id` puts the whole
+object in the event's `stateDelta`, so the frontend received, and parsed,
+the full brief again with every event that changed it. A StatePatcher keeps
+the values last sent on a stream and replaces those keys of each event's
+`stateDelta` with an `actions.statePatch`:
+
+    {"seq": 12, "ops": [
+        {"op": "add", "path": "/documentary_brief/knowledge_nodes/3/fact_points/-", "value": {...}},
+        {"op": "replace", "path": "/documentary_brief/knowledge_nodes/3/research_status", "value": "active"}]}
+
+Operations follow RFC 6902 and apply, in order, to the state the client has
+built from the previous patches of the stream. The first write of a key on a
+stream adds the whole value, so a client reconnecting with a new stream gets
+a full snapshot; `final_documentary_brief` is first sent as a "copy" of the
+brief being researched plus the changes the finalizer made to it. `seq`
+numbers the patches of a stream from 0, so a client that misses one can
+fetch the session's full state instead, queuing the patches received
+meanwhile and then applying only those of events the fetched session does
+not hold yet.
+"""
+
+import copy
+import json
+from typing import Any
+
+# State keys sent as patches rather than whole values.
+PATCHED_KEYS = ("documentary_brief", "final_documentary_brief", "sources", "url_to_short_id")
+# Keys first sent as a copy of another key plus the differences from it.
+COPIED_FROM = {"final_documentary_brief": "documentary_brief"}
+
+
+def _pointer(path: str, token: str | int) -> str:
+    return f"{path}/{str(token).replace('~', '~0').replace('/', '~1')}"
+
+
+def _same(old: Any, new: Any) -> bool:
+    # `True == 1`, but a boolean replaced by a number must still be sent.
+    return type(old) is type(new) and old == new
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """
+    Returns the JSON Patch operations turning `old` into `new`. Lists are
+    compared position by position, so items appended to a list become "add"
+    operations on `path/-`; an empty list is replaced whole.
+    """
+    ops: list[dict[str, Any]] = []
+    _diff(old, new, path, ops)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: str, ops: list[dict[str, Any]]) -> None:
+    if _same(old, new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, _pointer(path, key), ops)
+            else:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+    elif isinstance(old, list) and isinstance(new, list) and old:
+        common = min(len(old), len(new))
+        for position in range(common):
+            _diff(old[position], new[position], _pointer(path, position), ops)
+        for value in new[common:]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+        for position in reversed(range(common, len(old))):
+            ops.append({"op": "remove", "path": _pointer(path, position)})
+    else:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _resolve(doc: Any, pointer: str) -> Any:
+    for token in pointer.split("/")[1:]:
+        doc = doc[int(token)] if isinstance(doc, list) else doc[_unescape(token)]
+    return doc
+
+
+def apply_patch(doc: dict[str, Any], ops: list[dict[str, Any]]) -> dict[str, Any]:
+    """Applies the add, remove, replace and copy operations of a patch to `doc`, in place."""
+    for op in ops:
+        if op["op"] == "copy":
+            op = {"op": "add", "path": op["path"], "value": copy.deepcopy(_resolve(doc, op["from"]))}
+        parent, _, last = op["path"].rpartition("/")
+        target = _resolve(doc, parent)
+        last = _unescape(last)
+        if isinstance(target, list):
+            if op["op"] == "remove":
+                del target[int(last)]
+            elif last == "-":
+                target.append(op["value"])
+            elif op["op"] == "add":
+                target.insert(int(last), op["value"])
+            else:
+                target[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return doc
+
+
+class StatePatcher:
+    """Turns the state deltas of one stream's events into numbered patches."""
+    def __init__(self, keys: tuple[str, ...] = PATCHED_KEYS):
+        self.keys = keys
+        self.seq = 0
+        self._sent: dict[str, Any] = {}
+
+    def patch_event(self, event: dict[str, Any]) -> dict[str, Any]:
+        """Moves the patched keys of a serialized event's stateDelta into a statePatch."""
+        delta = (event.get("actions") or {}).get("stateDelta")
+        if not delta:
+            return event
+        ops: list[dict[str, Any]] = []
+        for key in self.keys:
+            if key not in delta:
+                continue
+            value = delta.pop(key)
+            path = _pointer("", key)
+            if key in self._sent:
+                key_ops = json_patch(self._sent[key], value, path)
+                # A rewrite of most of the value is cheaper to send whole.
+                if len(key_ops) > 1 and len(json.dumps(key_ops)) > len(json.dumps(value)):
+                    key_ops = [{"op": "replace", "path": path, "value": value}]
+            elif (base := COPIED_FROM.get(key)) in self._sent:
+                key_ops = [{"op": "copy", "from": _pointer("", base), "path": path}]
+                key_ops += json_patch(self._sent[base], value, path)
+                if len(json.dumps(key_ops)) > len(json.dumps(value)):
+                    key_ops = [{"op": "add", "path": path, "value": value}]
+            else:
+                key_ops = [{"op": "add", "path": path, "value": value}]
+            ops.extend(key_ops)
+            self._sent[key] = value
+        if ops:
+            event["actions"]["statePatch"] = {"seq": self.seq, "ops": ops}
+            self.seq += 1
+        return event
+
+    def patch_sse(self, message: bytes) -> bytes:
+        """Patches one `data: {...}` SSE message; other messages are left as they are."""
+        if not message.startswith(b"data: "):
+            return message
+        try:
+            event = json.loads(message[6:])
+        except ValueError:
+            return message
+        if not isinstance(event, dict) or not (event.get("actions") or {}).get("stateDelta"):
+            return message
+        event = self.patch_event(event)
+        return b"data: " + json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
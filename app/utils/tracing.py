@@ -0,0 +1,375 @@
+"""Per-agent tracing of research runs, with pluggable exporters.
+
+ADK already opens OpenTelemetry spans around every agent run (`agent_run
+[name]`), model call (`call_llm`) and tool call (`execute_tool name`). This
+module adds spans for callbacks, searches and cascade tiers, turns every
+finished span into a flat SpanRecord, and hands the records to exporters:
+
+- agent spans carry the JSON size of the state deltas their events wrote,
+- model spans carry the model name and token counts,
+- search spans tell whether the search cache answered,
+- callback spans carry the size of the state delta the callback wrote,
+- model calls and searches made through a rate limiter carry the seconds
+  they queued and, when it happened, their retries and hedges.
+
+JsonlSpanExporter writes one record per line, and `summary_table` shows
+where the time of a run went, per agent, model, tool and callback.
+Tracing is off unless `enable_tracing` is called (`TRACE_PATH` for the ADK
+servers, `--trace` for the batch runner); with no tracer provider installed
+the spans cost next to nothing.
+
+    python -m app.utils.tracing trace.jsonl
+"""
+
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import weakref
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from typing import Any, Protocol
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.agent_tool import AgentTool
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from pydantic import BaseModel
+
+tracer = trace.get_tracer("docu_researcher")
+
+# Callback attributes of ADK agents that are wrapped with callback spans.
+_CALLBACK_ATTRIBUTES = (
+    "before_agent_callback",
+    "after_agent_callback",
+    "before_model_callback",
+    "after_model_callback",
+    "before_tool_callback",
+    "after_tool_callback",
+)
+
+
+@dataclass
+class SpanRecord:
+    """A finished span: an agent run, model call, tool call, search or callback."""
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: str
+    name: str
+    start: float
+    seconds: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class SpanExporter(Protocol):
+    """Receives the records of finished spans."""
+    def export(self, records: list[SpanRecord]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class JsonlSpanExporter:
+    """Appends every record to a JSONL file."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, records: list[SpanRecord]) -> None:
+        with self._lock:
+            for record in records:
+                self._file.write(json.dumps(asdict(record), default=str) + "\n")
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class MemorySpanExporter:
+    """Keeps every record in memory, for tests and run summaries."""
+    def __init__(self) -> None:
+        self.records: list[SpanRecord] = []
+
+    def export(self, records: list[SpanRecord]) -> None:
+        self.records.extend(records)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _kind_and_name(span_name: str) -> tuple[str, str]:
+    if span_name.startswith("agent_run ["):
+        return "agent", span_name[len("agent_run ["):-1]
+    if span_name == "call_llm":
+        return "model", span_name
+    if span_name.startswith("execute_tool "):
+        return "tool", span_name[len("execute_tool "):]
+    kind, _, name = span_name.partition(" ")
+    return kind, name or kind
+
+
+def _usage(response_json: str) -> dict[str, int]:
+    try:
+        usage = json.loads(response_json).get("usage_metadata") or {}
+    except (ValueError, AttributeError):
+        return {}
+    return {
+        "prompt_tokens": usage.get("prompt_token_count") or 0,
+        "output_tokens": usage.get("candidates_token_count") or 0,
+        "tokens": usage.get("total_token_count") or 0,
+    }
+
+
+def to_record(span: ReadableSpan) -> SpanRecord:
+    """Converts a finished OpenTelemetry span into a SpanRecord."""
+    kind, name = _kind_and_name(span.name)
+    attributes = dict(span.attributes or {})
+    if kind == "model":
+        # ADK stores the full request and response; only keep their figures.
+        attributes.pop("gcp.vertex.agent.llm_request", None)
+        attributes.update(_usage(str(attributes.pop("gcp.vertex.agent.llm_response", "{}"))))
+        attributes["model"] = attributes.get("gen_ai.request.model")
+    attributes = {
+        key: value for key, value in attributes.items()
+        if not key.startswith(("gcp.vertex.agent.", "gen_ai."))
+    }
+    return SpanRecord(
+        trace_id=format(span.context.trace_id, "032x"),
+        span_id=format(span.context.span_id, "016x"),
+        parent_id=format(span.parent.span_id, "016x") if span.parent else None,
+        kind=kind,
+        name=name,
+        start=(span.start_time or 0) / 1e9,
+        seconds=((span.end_time or 0) - (span.start_time or 0)) / 1e9,
+        attributes=attributes,
+    )
+
+
+class RecordProcessor(SpanProcessor):
+    """Hands every finished span to the exporters as a SpanRecord."""
+    def __init__(self, exporters: Iterable[SpanExporter]):
+        self.exporters = list(exporters)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        record = to_record(span)
+        for exporter in self.exporters:
+            try:
+                exporter.export([record])
+            except Exception as e:
+                logging.error(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+    def shutdown(self) -> None:
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+def json_size(value: Any) -> int:
+    """The size in bytes of a state value once serialized."""
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    return len(json.dumps(value, default=str))
+
+
+def _delta_size(delta: dict[str, Any]) -> int:
+    return sum(json_size(value) for value in delta.values())
+
+
+# Callbacks that already open their span, so instrumenting twice is a no-op.
+_traced: weakref.WeakSet[Callable[..., Any]] = weakref.WeakSet()
+
+
+def _traced_callback(callback: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a callback in a span carrying the size of the state delta it wrote."""
+    if callback in _traced:
+        return callback
+    span_name = f"callback {getattr(callback, '__name__', type(callback).__name__)}"
+
+    def record_delta(span: trace.Span, kwargs: dict[str, Any]) -> None:
+        context = kwargs.get("callback_context") or kwargs.get("tool_context")
+        if isinstance(context, CallbackContext):
+            delta = context._event_actions.state_delta
+            span.set_attribute("state_keys", sorted(delta))
+            span.set_attribute("state_delta_bytes", _delta_size(delta))
+
+    traced: Callable[..., Any]
+    if inspect.iscoroutinefunction(callback):
+        @functools.wraps(callback)
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            with tracer.start_as_current_span(span_name) as span:
+                result = await callback(*args, **kwargs)
+                record_delta(span, kwargs)
+                return result
+    else:
+        @functools.wraps(callback)
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            with tracer.start_as_current_span(span_name) as span:
+                result = callback(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    return result
+                record_delta(span, kwargs)
+                return result
+    _traced.add(traced)
+    return traced
+
+
+def _start_agent_span(callback_context: CallbackContext) -> None:
+    """Notes where the agent's events start in the session history."""
+    session = callback_context._invocation_context.session
+    trace.get_current_span().set_attribute("first_event", len(session.events))
+
+
+def _end_agent_span(callback_context: CallbackContext) -> None:
+    """Records the size of the state deltas the agent's events wrote."""
+    span = trace.get_current_span()
+    session = callback_context._invocation_context.session
+    first = getattr(span, "attributes", {}).get("first_event", len(session.events))
+    span.set_attribute(
+        "state_delta_bytes",
+        sum(_delta_size(event.actions.state_delta) for event in session.events[first:] if event.actions),
+    )
+    span.set_attribute("events", len(session.events) - first)
+
+
+_traced.update((_start_agent_span, _end_agent_span))
+
+
+def instrument(agent: BaseAgent) -> None:
+    """
+    Wraps every callback of the agents under `agent`, including agents used as
+    tools, in callback spans, and makes agent spans record state deltas.
+    """
+    seen: set[int] = set()
+
+    def visit(agent: BaseAgent) -> None:
+        if id(agent) in seen:
+            return
+        seen.add(id(agent))
+        for attribute in _CALLBACK_ATTRIBUTES:
+            if not hasattr(agent, attribute):
+                continue
+            callbacks = getattr(agent, attribute)
+            if callbacks is None:
+                callbacks = []
+            elif not isinstance(callbacks, list):
+                callbacks = [callbacks]
+            callbacks = [_traced_callback(callback) for callback in callbacks]
+            if attribute == "before_agent_callback" and _start_agent_span not in callbacks:
+                callbacks.insert(0, _start_agent_span)
+            if attribute == "after_agent_callback" and _end_agent_span not in callbacks:
+                callbacks.append(_end_agent_span)
+            setattr(agent, attribute, callbacks or None)
+        if isinstance(agent, LlmAgent):
+            for tool in agent.tools:
+                if isinstance(tool, AgentTool):
+                    visit(tool.agent)
+        for sub_agent in agent.sub_agents:
+            visit(sub_agent)
+
+    visit(agent)
+
+
+def enable_tracing(agents: Iterable[BaseAgent], exporters: Iterable[SpanExporter]) -> RecordProcessor:
+    """
+    Instruments the agents and sends the records of every span to the
+    exporters, installing an OpenTelemetry tracer provider if there is none.
+    """
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        trace.set_tracer_provider(provider)
+    processor = RecordProcessor(exporters)
+    provider.add_span_processor(processor)
+    for agent in agents:
+        instrument(agent)
+    return processor
+
+
+@dataclass
+class SummaryRow:
+    """The totals of one agent, model, tool or callback in a run."""
+    kind: str
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    tokens: int = 0
+    searches: int = 0
+    state_delta_bytes: int = 0
+
+
+def summarize(records: list[SpanRecord]) -> list[SummaryRow]:
+    """
+    Totals the records per agent, model, tool and callback. Model rows are
+    named after the agent making the calls, and search counts are attributed
+    to the agent that ran them. Rows are sorted by total time.
+    """
+    by_id = {record.span_id: record for record in records}
+
+    def agent_of(record: SpanRecord) -> str:
+        parent = by_id.get(record.parent_id or "")
+        while parent is not None and parent.kind != "agent":
+            parent = by_id.get(parent.parent_id or "")
+        return parent.name if parent is not None else "?"
+
+    rows: dict[tuple[str, str], SummaryRow] = {}
+    searches: dict[str, int] = defaultdict(int)
+    for record in records:
+        name = agent_of(record) if record.kind in ("model", "tier") else record.name
+        if record.kind == "tier":
+            name = f"{name} [{record.name}]"
+        row = rows.setdefault((record.kind, name), SummaryRow(record.kind, name))
+        row.calls += 1
+        row.seconds += record.seconds
+        row.max_seconds = max(row.max_seconds, record.seconds)
+        if record.kind == "model":
+            row.tokens += record.attributes.get("tokens", 0)
+        row.state_delta_bytes += record.attributes.get("state_delta_bytes", 0)
+        if record.kind == "search":
+            searches[agent_of(record)] += 1
+    for agent, count in searches.items():
+        if agent_row := rows.get(("agent", agent)):
+            agent_row.searches += count
+    return sorted(rows.values(), key=lambda row: -row.seconds)
+
+
+def summary_table(records: list[SpanRecord]) -> str:
+    """Formats the summary of a run's records as a text table."""
+    lines = [
+        f"{'kind':<10} {'name':<45} {'calls':>6} {'total s':>9} {'max s':>8} "
+        f"{'tokens':>9} {'searches':>8} {'state KB':>9}"
+    ]
+    for row in summarize(records):
+        lines.append(
+            f"{row.kind:<10} {row.name[:45]:<45} {row.calls:>6} {row.seconds:>9.3f} "
+            f"{row.max_seconds:>8.3f} {row.tokens:>9} {row.searches:>8} "
+            f"{row.state_delta_bytes / 1024:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def read_records(path: str) -> list[SpanRecord]:
+    """Reads the records written by a JsonlSpanExporter."""
+    with open(path, encoding="utf-8") as f:
+        return [SpanRecord(**json.loads(line)) for line in f if line.strip()]
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m app.utils.tracing trace.jsonl")
+    by_trace: dict[str, list[SpanRecord]] = defaultdict(list)
+    for record in read_records(sys.argv[1]):
+        by_trace[record.trace_id].append(record)
+    for trace_id, records in by_trace.items():
+        print(f"Trace {trace_id} ({len(records)} spans)")
+        print(summary_table(records))
+        print()
+
+
+if __name__ == "__main__":
+    main()
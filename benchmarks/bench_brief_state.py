@@ -0,0 +1,88 @@
+"""Measures the brief validation and serialization cost of a refinement loop step.
+
+Each step of `iterative_refinement_loop` reads the brief three times: the
+research callback merges into a node, the saturation gate may settle it, and
+`EscalationChecker` updates its status. Before the brief cache, each read
+validated `documentary_brief` from state and `EscalationChecker` wrote it back
+as a dict, so the next step validated the whole brief again. With the cache,
+the validated brief is kept per session and only written back, whole and as
+the same object, when a node changed.
+
+    python -m benchmarks.bench_brief_state --facts-per-node 10 100 1000
+
+Checkpoint writes are not included; they serialize the brief either way.
+"""
+
+import argparse
+import time
+
+from google.adk.sessions import Session
+
+from app.schemas.brief import DocumentaryBrief, ResearchStatus
+from app.utils.brief_cache import BRIEF_KEY, get_brief_cache
+
+from .synthetic import make_brief
+
+
+def legacy_step(state: dict, step: int) -> None:
+    """The brief accesses of a loop step before the brief cache."""
+    # Research callback: merges into the node and stores the object.
+    brief = DocumentaryBrief.model_validate(state[BRIEF_KEY])
+    node = brief.knowledge_nodes[step % len(brief.knowledge_nodes)]
+    node.research_status = ResearchStatus.ACTIVE
+    state[BRIEF_KEY] = brief
+    # Saturation gate.
+    brief = DocumentaryBrief.model_validate(state[BRIEF_KEY])
+    # EscalationChecker: grades every third pass and always writes a dict back.
+    brief = DocumentaryBrief.model_validate(state[BRIEF_KEY])
+    if step % 3 == 0:
+        brief.knowledge_nodes[step % len(brief.knowledge_nodes)].research_status = ResearchStatus.SATURATED
+    state[BRIEF_KEY] = brief.model_dump()
+
+
+def cached_step(session: Session, step: int) -> None:
+    """The same accesses through the session's brief cache."""
+    cache = get_brief_cache(session)
+    assert cache is not None
+    node = cache.brief.knowledge_nodes[step % len(cache.brief.knowledge_nodes)]
+    node.research_status = ResearchStatus.ACTIVE
+    cache.mark_changed()
+    session.state.update(cache.state_delta())
+    get_brief_cache(session)
+    cache = get_brief_cache(session)
+    assert cache is not None
+    if step % 3 == 0:
+        node.research_status = ResearchStatus.SATURATED
+        cache.mark_changed()
+    session.state.update(cache.state_delta())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facts-per-node", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'facts':>8} {'legacy ms/step':>15} {'cached ms/step':>15}")
+    for facts_per_node in args.facts_per_node:
+        data = make_brief(args.nodes, facts_per_node).model_dump()
+
+        state = {BRIEF_KEY: data}
+        start = time.perf_counter()
+        for step in range(args.steps):
+            legacy_step(state, step)
+        legacy = (time.perf_counter() - start) / args.steps
+
+        # Starts from a dict too, as left by the parallel research stage.
+        session = Session(id="bench", app_name="bench", user_id="bench", state={BRIEF_KEY: data})
+        start = time.perf_counter()
+        for step in range(args.steps):
+            cached_step(session, step)
+        cached = (time.perf_counter() - start) / args.steps
+
+        print(f"{args.nodes * facts_per_node:>8} {legacy * 1e3:>15.2f} {cached * 1e3:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmarks the model cascade against local fake models.
+
+A cheap tier answers with an invalid NodeUpdate `--invalid-ratio` of the time
+and a strong tier always answers correctly but is slower and costlier.
+Compares sending every call to the strong tier with the cascade, and reports
+per-tier calls, latencies and tokens.
+
+    python -m benchmarks.bench_cascade --calls 200 --invalid-ratio 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from google.adk.models import LlmRequest
+from google.genai import types as genai_types
+
+from app.models.cascade import (
+    CascadeLlm,
+    ModelBudget,
+    use_model_budget,
+    valid_node_update,
+)
+from app.models.fake import FakeLlm
+
+VALID = json.dumps({"node_title": "Node", "top_sources": [], "fact_points": []})
+
+
+def make_tiers(args: argparse.Namespace) -> tuple[FakeLlm, FakeLlm]:
+    rng = random.Random(args.seed)
+    cheap = FakeLlm(
+        model="fake-lite",
+        respond=lambda request: "Sorry, no JSON." if rng.random() < args.invalid_ratio else VALID,
+        latency=args.cheap_latency,
+        tokens_per_call=1000,
+    )
+    strong = FakeLlm(
+        model="fake-pro", respond=lambda request: VALID, latency=args.strong_latency, tokens_per_call=1000
+    )
+    return cheap, strong
+
+
+async def run(name: str, model: CascadeLlm, budget: ModelBudget, args: argparse.Namespace) -> None:
+    use_model_budget(budget)
+    request = LlmRequest(contents=[genai_types.Content(role="user", parts=[genai_types.Part(text="go")])])
+    semaphore = asyncio.Semaphore(args.concurrency)
+    valid = 0
+
+    async def call() -> None:
+        nonlocal valid
+        async with semaphore:
+            responses = [r async for r in model.generate_content_async(request)]
+        content = responses[-1].content
+        valid += bool(content and content.parts and valid_node_update(content.parts[0].text or ""))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(args.calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<8} {elapsed:>7.2f} s  {valid}/{args.calls} valid")
+    for tier, stats in budget.as_dict()["tiers"].items():
+        print(f"         {tier:<10} {json.dumps(stats)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--invalid-ratio", type=float, default=0.2)
+    parser.add_argument("--cheap-latency", type=float, default=0.02)
+    parser.add_argument("--strong-latency", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _, strong = make_tiers(args)
+    await run("strong", CascadeLlm(model=strong.model, tiers=[strong]), ModelBudget(3600, 10**9), args)
+    cheap, strong = make_tiers(args)
+    cascade = CascadeLlm(model=cheap.model, tiers=[cheap, strong], validator=valid_node_update)
+    await run("cascade", cascade, ModelBudget(3600, 10**9), args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Benchmarks near-duplicate detection while merging paraphrased research.
+
+Merges updates where `--paraphrase-ratio` of the facts reword a fact already in
+the brief, with near-duplicate detection off (exact fingerprints only) and on,
+and reports how many facts each run added and how long merges took.
+
+    python -m benchmarks.bench_dedup --nodes 20 --facts-per-node 500
+"""
+
+import argparse
+import random
+import time
+
+from app.schemas.brief import DocumentaryBrief, NodeUpdate
+from app.utils.brief_index import BriefIndex
+from app.utils.near_duplicates import DuplicatePolicy
+
+from .synthetic import make_brief, make_fact, paraphrase
+
+
+def make_paraphrased_updates(
+    brief: DocumentaryBrief, count: int, facts_per_update: int, ratio: float, seed: int = 1
+) -> list[NodeUpdate]:
+    rng = random.Random(seed)
+    updates = []
+    for u in range(count):
+        node_pos = rng.randrange(len(brief.knowledge_nodes))
+        node = brief.knowledge_nodes[node_pos]
+        facts = [
+            paraphrase(rng, rng.choice(node.fact_points)) if rng.random() < ratio
+            else make_fact(rng, node_pos, 10**6 + u * facts_per_update + n)
+            for n in range(facts_per_update)
+        ]
+        updates.append(NodeUpdate(node_title=node.node_title, top_sources=[], fact_points=facts))
+    return updates
+
+
+def run(name: str, policy: DuplicatePolicy, args: argparse.Namespace) -> None:
+    brief = make_brief(args.nodes, args.facts_per_node)
+    updates = make_paraphrased_updates(brief, args.updates, args.facts_per_update, args.paraphrase_ratio)
+    start = time.perf_counter()
+    index = BriefIndex(brief, policy)
+    built = time.perf_counter() - start
+
+    added = merged = 0
+    start = time.perf_counter()
+    for update in updates:
+        # Updates target existing nodes, so every merge has a result.
+        result = index.merge(update)
+        assert result is not None
+        added += len(result.added_facts)
+        merged += len(result.merged_facts)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<10} index {built * 1e3:>8.1f} ms  {elapsed / len(updates) * 1e6:>8.1f} us/merge"
+        f"  {added:>6,} facts added  {merged:>6,} folded"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--facts-per-node", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--facts-per-update", type=int, default=8)
+    parser.add_argument("--paraphrase-ratio", type=float, default=0.3)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    print(
+        f"{args.nodes} nodes x {args.facts_per_node} facts, {args.updates} updates of"
+        f" {args.facts_per_update} facts, {args.paraphrase_ratio:.0%} paraphrased"
+    )
+    run("exact", DuplicatePolicy(threshold=0), args)
+    run("node", DuplicatePolicy(threshold=args.threshold, scope="node"), args)
+    run("brief", DuplicatePolicy(threshold=args.threshold, scope="brief"), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmarks callback cost as the session event log grows.
+
+Simulates a research run that appends a researcher output, a search response
+and an evaluation per step and runs the brief and source callbacks after each
+step. With the event index, per-callback cost should stay flat as the log
+grows to tens of thousands of events; the legacy full scans grow linearly.
+
+    python -m benchmarks.bench_events --events 30000
+    python -m benchmarks.bench_events --events 4500 --report-every 1500 --legacy
+
+The legacy scans are quadratic over a run, so keep --events small with --legacy.
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+from typing import cast
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types as genai_types
+
+from app import callbacks
+from app.schemas.brief import NodeUpdate
+
+from .synthetic import make_brief, make_updates
+
+
+def make_step_events(update: NodeUpdate, step: int) -> list[Event]:
+    grounding = {
+        "grounding_chunks": [
+            {"web": {"uri": f"https://example.com/{step}/{i}", "title": f"Page {i}", "domain": "example.com"}}
+            for i in range(3)
+        ],
+        "grounding_supports": [
+            {"segment": {"text": f"claim {step}"}, "grounding_chunk_indices": [0, 1], "confidence_scores": [0.9, 0.7]}
+        ],
+    }
+    return [
+        Event(
+            author="unified_researcher",
+            content=genai_types.Content(
+                role="user",
+                parts=[
+                    genai_types.Part(
+                        function_response=genai_types.FunctionResponse(
+                            name="google_search", response={"summary": "...", "grounding_metadata": grounding}
+                        )
+                    )
+                ],
+            ),
+        ),
+        Event(
+            author="unified_researcher",
+            content=genai_types.Content(role="model", parts=[genai_types.Part(text=update.model_dump_json())]),
+        ),
+        Event(
+            author="research_evaluator",
+            content=genai_types.Content(role="model", parts=[genai_types.Part(text='{"grade": "fail", "comment": "..."}')]),
+        ),
+    ]
+
+
+def legacy_scan(session: Session) -> None:
+    """The event walks the callbacks made before the event index existed."""
+    for event in reversed(session.events):
+        if event.author in callbacks.RESEARCH_AGENTS and event.content and event.content.parts:
+            if event.content.parts[0].text:
+                break
+    for event in session.events:
+        callbacks._grounding_metadata_in(event)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=30000)
+    parser.add_argument("--report-every", type=int, default=5000)
+    parser.add_argument("--legacy", action="store_true", help="Also time the legacy full scans.")
+    args = parser.parse_args()
+
+    brief = make_brief(nodes=20, facts_per_node=5)
+    steps = args.events // 3
+    updates = make_updates(brief, steps, facts_per_update=2)
+    session = Session(id="bench", app_name="bench", user_id="bench", state={"documentary_brief": brief})
+    context = cast(
+        CallbackContext, SimpleNamespace(_invocation_context=SimpleNamespace(session=session), state=session.state)
+    )
+
+    print(f"{'events':>8} {'indexed us/step':>16}" + (f" {'legacy us/step':>15}" if args.legacy else ""))
+    indexed_total = legacy_total = 0.0
+    window = 0
+    for step, update in enumerate(updates):
+        session.events.extend(make_step_events(update, step))
+
+        start = time.perf_counter()
+        callbacks.update_brief_with_research_callback(context)
+        callbacks.collect_research_sources_callback(context)
+        indexed_total += time.perf_counter() - start
+
+        if args.legacy:
+            start = time.perf_counter()
+            legacy_scan(session)
+            legacy_total += time.perf_counter() - start
+
+        window += 1
+        if len(session.events) % args.report_every < 3 and window > 1:
+            line = f"{len(session.events):>8} {indexed_total / window * 1e6:>16.1f}"
+            if args.legacy:
+                line += f" {legacy_total / window * 1e6:>15.1f}"
+            print(line)
+            indexed_total = legacy_total = 0.0
+            window = 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Benchmarks local knowledge graph linking on large synthetic briefs.
+
+    python -m benchmarks.bench_graph --facts 1000 10000 50000
+"""
+
+import argparse
+import time
+
+from app.utils.graph_linker import LinkScoring, link_facts
+
+from .synthetic import make_brief
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--max-edges-per-fact", type=int, default=5)
+    args = parser.parse_args()
+
+    scoring = LinkScoring(max_edges_per_fact=args.max_edges_per_fact)
+    print(f"{'facts':>8} {'seconds':>9} {'us/fact':>9} {'edges':>9}")
+    for total in args.facts:
+        brief = make_brief(args.nodes, total // args.nodes)
+        start = time.perf_counter()
+        link_facts(brief, scoring, max_links=25)
+        elapsed = time.perf_counter() - start
+        edges = sum(len(f.related_fact_ids) for n in brief.knowledge_nodes for f in n.fact_points)
+        print(f"{total:>8} {elapsed:>9.3f} {elapsed / total * 1e6:>9.1f} {edges:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measures the searches and model calls the knowledge base saves on repeat subjects.
+
+Researches a synthetic subject with scripted local models through the batch
+runner, then researches it again, and then a subject whose plan has twice
+as many nodes, half of them covered by the first subject, under another
+subject name. Every run gets a
+fresh search cache and checkpoint store, and all of them share one in-memory
+knowledge base, filled by the briefs finalized before it. Nodes are only
+seeded by default; `--skip-nodes` also skips the nodes the knowledge base
+covers, as KNOWLEDGE_BASE_SKIP_NODES=True does.
+
+    python -m benchmarks.bench_knowledge_base --nodes 12 --facts-per-node 30 --skip-nodes
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from app.batch import BatchJob, BatchRunner
+from app.config import config
+from app.models.fake import FakeLlm
+from app.models.replay import models_wrapped
+from app.sub_agents.plan_generator.agent import plan_generator
+from app.sub_agents.research_pipeline.agent import research_pipeline
+from app.utils.knowledge_base import KnowledgeBase, set_knowledge_base
+
+from .bench_pipeline import use_fresh_stores
+from .synthetic import SyntheticResponder, make_search_backend
+
+
+async def research(args: argparse.Namespace, nodes: int, subject: str, knowledge_base: KnowledgeBase) -> list:
+    responder = SyntheticResponder(nodes, max(args.facts_per_node // args.passes, 1), args.passes)
+    # Named like a Gemini model, as built-in tools check the model name.
+    model = FakeLlm(model="gemini-synthetic", respond=responder)
+    backend = make_search_backend(responder.plan)
+    use_fresh_stores(backend)
+    set_knowledge_base(knowledge_base)
+    with models_wrapped(plan_generator, lambda _: model), models_wrapped(research_pipeline, lambda _: model):
+        results, _ = await BatchRunner(tempfile.mkdtemp(prefix="bench_knowledge_base_"), 1).run(
+            [BatchJob(id="subject", subject=subject)]
+        )
+    stats = results[0].knowledge_base or {}
+    return [
+        nodes,
+        model.calls,
+        backend.calls,
+        stats.get("facts_seeded", 0),
+        stats.get("nodes_skipped", 0),
+        stats.get("searches_avoided", 0),
+        stats.get("model_calls_avoided", 0),
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    config.knowledge_base_skip_nodes = args.skip_nodes
+    knowledge_base = KnowledgeBase(":memory:")
+    columns = ["nodes", "model calls", "searches", "facts seeded", "nodes skipped", "searches saved", "calls saved"]
+    print(f"{'':<8}" + "".join(f"{column:>15}" for column in columns))
+    runs = [
+        ("first", args.nodes, "Synthetic subject"),
+        ("repeat", args.nodes, "Synthetic subject"),
+        ("overlap", args.nodes * 2, "Synthetic subject, extended"),
+    ]
+    for name, nodes, subject in runs:
+        figures = await research(args, nodes, subject, knowledge_base)
+        print(f"{name:<8}" + "".join(f"{figure:>15}" for figure in figures))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=12)
+    parser.add_argument("--facts-per-node", type=int, default=30)
+    parser.add_argument("--passes", type=int, default=2, help="Research passes per node.")
+    parser.add_argument("--skip-nodes", action="store_true", help="Skip the nodes the knowledge base covers.")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
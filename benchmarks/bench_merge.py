@@ -0,0 +1,80 @@
+"""Benchmarks merging NodeUpdates into large briefs.
+
+Compares the original merge (title scan plus URL and fact sets rebuilt on every
+call) with the persistent BriefIndex, matching exact fingerprints only and with
+near-duplicate folding. For the index, also reports the first build and the
+cost of rebinding it to the brief re-validated from its dump, as happens when
+the brief is read back from session state.
+
+    python -m benchmarks.bench_merge --nodes 20 --facts-per-node 2500
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from app.schemas.brief import DocumentaryBrief, NodeUpdate
+from app.utils.brief_index import BriefIndex
+from app.utils.near_duplicates import DuplicatePolicy
+
+from .synthetic import make_brief, make_updates
+
+
+def legacy_merge(brief: DocumentaryBrief, node_update: NodeUpdate) -> None:
+    for node in brief.knowledge_nodes:
+        if node.node_title == node_update.node_title:
+            existing_urls = {s.url for s in node.top_sources}
+            for new_source in node_update.top_sources:
+                if new_source.url not in existing_urls:
+                    node.top_sources.append(new_source)
+            existing_facts = {f.description for f in node.fact_points}
+            for new_fact in node_update.fact_points:
+                if new_fact.description not in existing_facts:
+                    node.fact_points.append(new_fact)
+            return
+
+
+def run(name: str, args: argparse.Namespace, policy: DuplicatePolicy | None = None) -> float:
+    brief = make_brief(args.nodes, args.facts_per_node)
+    updates = make_updates(brief, args.updates, args.facts_per_update)
+    merge: Callable[[NodeUpdate], object] = lambda update: legacy_merge(brief, update)  # noqa: E731
+    if policy is not None:
+        start = time.perf_counter()
+        index = BriefIndex(brief, policy)
+        print(f"{name:<14} index built once in {(time.perf_counter() - start) * 1e3:.1f} ms")
+        merge = index.merge
+    start = time.perf_counter()
+    for update in updates:
+        merge(update)
+    elapsed = time.perf_counter() - start
+    total_facts = sum(len(n.fact_points) for n in brief.knowledge_nodes)
+    print(
+        f"{name:<14} {len(updates) / elapsed:>12,.0f} merges/s"
+        f" {elapsed / len(updates) * 1e6:>10.1f} us/merge  ({total_facts:,} facts after merge)"
+    )
+    if policy is not None:
+        reloaded = DocumentaryBrief.model_validate(brief.model_dump())
+        start = time.perf_counter()
+        index.attach(reloaded)
+        print(f"{name:<14} rebound to the re-validated brief in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--facts-per-node", type=int, default=2500)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--facts-per-update", type=int, default=8)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    print(f"{args.nodes} nodes x {args.facts_per_node} facts, {args.updates} updates of {args.facts_per_update} facts")
+    legacy = run("legacy", args)
+    exact = run("indexed exact", args, DuplicatePolicy(threshold=0))
+    near = run("indexed near", args, DuplicatePolicy(threshold=args.threshold))
+    print(f"speedup  exact {legacy / exact:.2f}x  near {legacy / near:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Benchmarks the pipeline's own overhead without Gemini or Google Search.
+
+Three modes:
+    record      Runs a live conversation through an agent (`root_agent` by
+                default) and records every model response, grounding metadata
+                included, and every search result.
+    replay      Replays a recording deterministically, with no network, so the
+                measured time is the cost of callbacks, validation, merging
+                and orchestration alone.
+    synthetic   Plans and researches synthetic subjects of configurable size
+                (nodes, facts per node) with scripted local models, through the
+                batch runner.
+
+    python -m benchmarks.bench_pipeline record --message "The Apollo 11 landing" --message "Proceed." --out apollo.json
+    python -m benchmarks.bench_pipeline replay apollo.json --repeat 5
+    python -m benchmarks.bench_pipeline synthetic --nodes 20 --facts-per-node 200 --subjects 4
+
+`--history results.jsonl` appends each run's figures with the current git
+commit, to track them across commits.
+"""
+
+import argparse
+import asyncio
+import datetime
+import importlib
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import InMemoryRunner
+from google.genai import types as genai_types
+
+from app.config import config
+from app.models.fake import FakeLlm
+from app.models.replay import Recording, models_wrapped, record_models, replay_models
+from app.tools.search_cache import (
+    LocalSearchBackend,
+    RecordingSearchBackend,
+    SearchBackend,
+    SearchCache,
+    get_search_backend,
+    set_search_backend,
+)
+from app.utils.checkpoints import CheckpointStore, set_checkpoint_store
+from app.utils.knowledge_base import KnowledgeBase, set_knowledge_base
+
+from .synthetic import SyntheticResponder, make_search_backend
+
+
+def load_agent(path: str) -> BaseAgent:
+    """Imports an agent given as `module:attribute`."""
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute or "root_agent")
+
+
+def use_fresh_stores(backend: SearchBackend) -> None:
+    """
+    Routes searches to `backend` through an empty in-memory cache, and keeps
+    checkpoints and the knowledge base in memory, so no run is served from an
+    earlier one.
+    """
+    set_search_backend(
+        backend, SearchCache(":memory:", config.search_cache_ttl, config.search_cache_max_entries)
+    )
+    set_checkpoint_store(CheckpointStore(":memory:", config.checkpoint_ttl))
+    set_knowledge_base(KnowledgeBase(":memory:"))
+
+
+async def run_conversation(agent: BaseAgent, messages: list[str]) -> dict[str, Any]:
+    """Sends the user messages to the agent in a new session, one turn each."""
+    runner = InMemoryRunner(agent=agent, app_name="bench")
+    session = await runner.session_service.create_session(app_name="bench", user_id="bench")
+    events = 0
+    start = time.perf_counter()
+    for message in messages:
+        content = genai_types.Content(role="user", parts=[genai_types.Part(text=message)])
+        async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=content):
+            events += 1
+    seconds = time.perf_counter() - start
+    finished = await runner.session_service.get_session(app_name="bench", user_id="bench", session_id=session.id)
+    return {
+        "seconds": seconds,
+        "events": events,
+        "brief": finished is not None and finished.state.get("final_documentary_brief") is not None,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(mode: str, runs: list[dict[str, Any]], extra: dict[str, Any], args: argparse.Namespace) -> None:
+    seconds = [run["seconds"] for run in runs]
+    figures = {
+        "mode": mode,
+        "runs": len(runs),
+        "mean_seconds": round(statistics.mean(seconds), 4),
+        "min_seconds": round(min(seconds), 4),
+        **extra,
+    }
+    print(json.dumps(figures))
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "commit": git_commit(),
+                "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("func", "history")},
+                **figures,
+            }) + "\n")
+
+
+async def record(args: argparse.Namespace) -> None:
+    agent = load_agent(args.agent)
+    recording = Recording(messages=args.message)
+    use_fresh_stores(RecordingSearchBackend(get_search_backend(), recording.searches))
+    with record_models(agent, recording):
+        run = await run_conversation(agent, recording.messages)
+    recording.save(args.out)
+    print(
+        f"Recorded {len(recording.calls)} model calls and {len(recording.searches)} searches "
+        f"in {run['seconds']:.1f}s to {args.out}."
+    )
+
+
+async def replay(args: argparse.Namespace) -> None:
+    recording = Recording.load(args.recording)
+    agent = load_agent(args.agent)
+    runs, hits, misses = [], 0, 0
+    for _ in range(args.repeat):
+        # Each run gets its own player and stores, so runs are identical.
+        search = LocalSearchBackend()
+        for query, result in recording.searches.items():
+            search.add(query, result.get("summary", ""), result.get("grounding_metadata"))
+        use_fresh_stores(search)
+        with replay_models(agent, recording) as player:
+            runs.append(await run_conversation(agent, recording.messages))
+        hits, misses = player.hits, player.misses
+    report("replay", runs, {
+        "events": runs[-1]["events"],
+        "brief": runs[-1]["brief"],
+        "model_hits": hits,
+        "model_misses": misses,
+    }, args)
+
+
+async def synthetic(args: argparse.Namespace) -> None:
+    from app.batch import BatchJob, BatchRunner
+    from app.sub_agents.plan_generator.agent import plan_generator
+    from app.sub_agents.research_pipeline.agent import research_pipeline
+
+    responder = SyntheticResponder(args.nodes, max(args.facts_per_node // args.passes, 1), args.passes)
+    # Named like a Gemini model, as built-in tools check the model name.
+    model = FakeLlm(model="gemini-synthetic", respond=responder, latency=args.latency)
+    use_fresh_stores(make_search_backend(responder.plan))
+    runner = BatchRunner(tempfile.mkdtemp(prefix="bench_pipeline_"), args.concurrency)
+
+    jobs = [BatchJob(id=f"subject-{n}", subject=f"Synthetic subject {n}") for n in range(args.subjects)]
+    with models_wrapped(plan_generator, lambda _: model), models_wrapped(research_pipeline, lambda _: model):
+        start = time.perf_counter()
+        results, summary = await runner.run(jobs)
+        elapsed = time.perf_counter() - start
+    runs = [{"seconds": result.seconds} for result in results]
+    report("synthetic", runs, {
+        "elapsed_seconds": round(elapsed, 3),
+        "failed": summary["failed"],
+        "model_calls": model.calls,
+        "facts_per_brief": args.nodes * args.facts_per_node,
+    }, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", help="JSONL file the figures of the run are appended to.")
+    modes = parser.add_subparsers(required=True)
+
+    record_parser = modes.add_parser("record", help="Record a live conversation.")
+    record_parser.add_argument("--message", action="append", required=True, help="A user turn; repeat for each turn.")
+    record_parser.add_argument("--out", required=True)
+    record_parser.add_argument("--agent", default="app.agent:root_agent")
+    record_parser.set_defaults(func=record)
+
+    replay_parser = modes.add_parser("replay", help="Replay a recorded conversation.")
+    replay_parser.add_argument("recording")
+    replay_parser.add_argument("--repeat", type=int, default=3)
+    replay_parser.add_argument("--agent", default="app.agent:root_agent")
+    replay_parser.set_defaults(func=replay)
+
+    synthetic_parser = modes.add_parser("synthetic", help="Research synthetic subjects.")
+    synthetic_parser.add_argument("--subjects", type=int, default=4)
+    synthetic_parser.add_argument("--nodes", type=int, default=12)
+    synthetic_parser.add_argument("--facts-per-node", type=int, default=30)
+    synthetic_parser.add_argument("--passes", type=int, default=2, help="Research passes per node.")
+    synthetic_parser.add_argument("--concurrency", type=int, default=4)
+    synthetic_parser.add_argument("--latency", type=float, default=0.0, help="Seconds per model call.")
+    synthetic_parser.set_defaults(func=synthetic)
+
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
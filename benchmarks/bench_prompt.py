@@ -0,0 +1,55 @@
+"""Compares researcher and evaluator prompt sizes as the brief grows.
+
+The legacy prompts carried the whole `documentary_brief`; the node-scoped
+prompts only carry the target node's context.
+
+    python -m benchmarks.bench_prompt --facts-per-node 10 100 1000
+"""
+
+import argparse
+import json
+from types import SimpleNamespace
+from typing import cast
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from app.schemas.brief import ResearchStatus
+from app.sub_agents.research_evaluator.prompt import (
+    INSTRUCTION as EVALUATOR_INSTRUCTION,
+)
+from app.sub_agents.unified_researcher.prompt import (
+    INSTRUCTION as RESEARCHER_INSTRUCTION,
+)
+from app.utils.node_context import node_instruction
+from app.utils.saturation import RESEARCH_DELTA_KEY
+
+from .synthetic import make_brief
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facts-per-node", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--nodes", type=int, default=20)
+    args = parser.parse_args()
+
+    researcher = node_instruction(RESEARCHER_INSTRUCTION)
+    evaluator = node_instruction(EVALUATOR_INSTRUCTION, include_new_facts=True)
+    print(f"{'facts':>8} {'legacy chars':>13} {'researcher':>11} {'evaluator':>10}")
+    for facts_per_node in args.facts_per_node:
+        brief = make_brief(args.nodes, facts_per_node)
+        brief.knowledge_nodes[0].research_status = ResearchStatus.ACTIVE
+        brief_json = json.dumps(brief.model_dump(mode="json"), ensure_ascii=False)
+        ctx = cast(ReadonlyContext, SimpleNamespace(state={
+            "documentary_brief": brief,
+            "research_evaluation": {"grade": "fail", "comment": "More anecdotes.", "follow_up_queries": []},
+            RESEARCH_DELTA_KEY: {"node_title": "Node 0", "new_facts": min(facts_per_node, 5)},
+        }))
+        legacy = len(RESEARCHER_INSTRUCTION) + len(brief_json)
+        print(
+            f"{args.nodes * facts_per_node:>8} {legacy:>13} "
+            f"{len(researcher(ctx)):>11} {len(evaluator(ctx)):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmarks the rate limiter against local fake endpoints with a quota.
+
+`--clients` concurrent loops, standing in for briefs researched at once, each
+make `--calls` model calls, each followed by a search, against two
+FakeEndpoints accepting `--quota` calls per second, with latency spikes and
+server errors. Compares sending the calls directly, as before, with the rate
+limiter with and without hedging, and reports failures, latencies, the 429s
+the endpoints answered and the limiters' metrics.
+
+    python -m benchmarks.bench_rate_limit --clients 16 --calls 15 --quota 6
+"""
+
+import argparse
+import asyncio
+import functools
+import time
+from collections.abc import Awaitable, Callable
+
+from app.batch import percentile
+from app.config import config
+from app.models.fake import FakeEndpoint
+from app.tools.search_cache import RateLimitedSearchBackend
+from app.utils.rate_limit import rate_limit_metrics, rate_limited, reset_rate_limiters
+
+
+def make_endpoint(args: argparse.Namespace, seed: int) -> FakeEndpoint:
+    return FakeEndpoint(
+        args.quota,
+        latency=args.latency,
+        slow_ratio=args.slow_ratio,
+        slow_latency=args.slow_latency,
+        error_ratio=args.error_ratio,
+        seed=seed,
+    )
+
+
+async def run(name: str, args: argparse.Namespace) -> None:
+    reset_rate_limiters()
+    config.rate_limit_enabled = name != "direct"
+    config.hedge_enabled = name == "limited"
+    model, search = make_endpoint(args, 1), make_endpoint(args, 2)
+    backend = RateLimitedSearchBackend(search, "fake-search")
+    latencies: list[float] = []
+    failed = 0
+
+    async def timed(call: Callable[[], Awaitable[object]]) -> None:
+        nonlocal failed
+        started = time.monotonic()
+        try:
+            await call()
+        except Exception:
+            failed += 1
+            return
+        latencies.append(time.monotonic() - started)
+
+    async def client(number: int) -> None:
+        for call in range(args.calls):
+            await timed(functools.partial(rate_limited, "fake-model", model.call))
+            await timed(functools.partial(backend.search, f"query {number}-{call}"))
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(number) for number in range(args.clients)))
+    elapsed = time.monotonic() - started
+    metrics = rate_limit_metrics().values()
+    print(
+        f"{name:<18} {len(latencies):>6} {failed:>6} {elapsed:>8.1f} "
+        f"{percentile(latencies, 50):>7.2f} {percentile(latencies, 95):>7.2f} {percentile(latencies, 99):>7.2f} "
+        f"{model.stats.throttled + search.stats.throttled:>6} "
+        f"{sum(m['retries'] for m in metrics):>8} {sum(m['hedges'] for m in metrics):>7} "
+        f"{sum(m['hedge_wins'] for m in metrics):>5} {max((m['max_queued'] for m in metrics), default=0):>6}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    print(
+        f"{args.clients} clients x {args.calls} model calls and searches, quota {args.quota}/s per endpoint, "
+        f"limiter rate {config.rate_limit_rps}/s"
+    )
+    print(
+        f"{'':<18} {'ok':>6} {'failed':>6} {'wall s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+        f"{'429s':>6} {'retries':>8} {'hedges':>7} {'wins':>5} {'queue':>6}"
+    )
+    for name in ("direct", "limited, no hedge", "limited"):
+        await run(name, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=15, help="Model calls, and searches, per client.")
+    parser.add_argument("--quota", type=float, default=6, help="Calls per second each endpoint accepts.")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--slow-ratio", type=float, default=0.03)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--error-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Simulates the refinement loop under a pass budget, in plan order and with
+the research scheduler.
+
+Each node of a synthetic brief hides its own yield curve: a first pass adds
+between 1 and `--max-yield` facts, and every further pass a random fraction
+(0.2 to 0.8) of the previous one. A pass adding no fact saturates the node
+and a node is stalled after `max_passes_per_node` passes, as the saturation
+gate and the evaluator would. The loop runs until `--budget` passes are
+spent, or until the schedule stops, and reports the facts found, the facts of
+the thinnest axis, the nodes left untouched and the passes spent, averaged
+over `--trials` briefs, with the budget and without one.
+
+    python -m benchmarks.bench_scheduler --nodes 24 --budget 30 --trials 20
+"""
+
+import argparse
+import random
+import statistics
+
+from app.config import config
+from app.schemas.brief import DocumentaryBrief, ResearchStatus
+from app.utils.research_scheduler import ResearchSchedule
+
+from .synthetic import make_brief, make_fact
+
+
+def simulate(brief: DocumentaryBrief, curves: dict[str, tuple[int, float]], budget: int | None) -> dict[str, float]:
+    rng = random.Random(0)
+    schedule = ResearchSchedule(budget_seconds=0)
+    nodes = {node.node_title: (index, node) for index, node in enumerate(brief.knowledge_nodes)}
+    spent = 0
+    while budget is None or spent < budget:
+        if (node := schedule.choose(brief)) is None:
+            break
+        index, _ = nodes[node.node_title]
+        first, decay = curves[node.node_title]
+        done = len(schedule.passes.get(node.node_title, []))
+        new_facts = int(first * decay ** done)
+        node.fact_points.extend(make_fact(rng, index, len(node.fact_points)) for _ in range(new_facts))
+        schedule.record_pass(node.node_title, new_facts)
+        spent += 1
+        # The node under refinement, as update_brief_with_research leaves it.
+        for other in brief.knowledge_nodes:
+            if other.research_status == ResearchStatus.ACTIVE:
+                other.research_status = ResearchStatus.PENDING
+        if new_facts == 0:
+            node.research_status = ResearchStatus.SATURATED
+        elif done + 1 >= config.max_passes_per_node:
+            node.research_status = ResearchStatus.STALLED
+        else:
+            node.research_status = ResearchStatus.ACTIVE
+    axes: dict[str, int] = {}
+    for node in brief.knowledge_nodes:
+        axes[node.axis] = axes.get(node.axis, 0) + len(node.fact_points)
+    return {
+        "facts": sum(axes.values()),
+        "thinnest_axis": min(axes.values()),
+        "untouched": sum(node.node_title not in schedule.passes for node in brief.knowledge_nodes),
+        "passes": spent,
+    }
+
+
+def run(name: str, args: argparse.Namespace, budget: int | None) -> None:
+    config.research_scheduler_enabled = name == "scheduler"
+    results = []
+    for trial in range(args.trials):
+        rng = random.Random(trial)
+        brief = make_brief(args.nodes, 0, seed=trial)
+        curves = {
+            node.node_title: (rng.randint(1, args.max_yield), rng.uniform(0.2, 0.8))
+            for node in brief.knowledge_nodes
+        }
+        results.append(simulate(brief, curves, budget))
+    means = {key: statistics.mean(result[key] for result in results) for key in results[0]}
+    print(
+        f"{name:<12} {budget if budget is not None else '-':>7} {means['facts']:>7.1f} "
+        f"{means['thinnest_axis']:>9.1f} {means['untouched']:>10.1f} {means['passes']:>7.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=24)
+    parser.add_argument("--budget", type=int, default=30, help="Research passes allowed.")
+    parser.add_argument("--max-yield", type=int, default=15, help="Most facts a first pass adds.")
+    parser.add_argument("--trials", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'':<12} {'budget':>7} {'facts':>7} {'thin axis':>9} {'untouched':>10} {'passes':>7}")
+    for budget in (args.budget, None):
+        for name in ("plan order", "scheduler"):
+            run(name, args, budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Benchmarks source collection on runs with tens of thousands of grounding chunks.
+
+Simulates search responses whose grounding chunks point at a pool of pages
+through URL variants (tracking parameters, http, `www.`, trailing slashes and
+redirect links) and whose supports repeat claims, and runs
+`collect_research_sources_callback` after each step. The legacy collection,
+keyed by raw URL and appending every claim, is timed on the same events.
+
+    python -m benchmarks.bench_sources --chunks 50000 --pages 2000
+"""
+
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import cast
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types as genai_types
+
+from app import callbacks
+
+
+def variant(rng: random.Random, page: int) -> str:
+    """A URL of the page, as a search result may link it."""
+    url = f"{rng.choice(['https', 'http'])}://{rng.choice(['', 'www.'])}site{page % 50}.org/article/{page}"
+    url += rng.choice(["", "/"])
+    if rng.random() < 0.3:
+        url += f"?utm_source=search&utm_campaign={rng.randrange(100)}"
+    if rng.random() < 0.1:
+        url = f"https://www.google.com/url?q={url}&sa=D"
+    return url
+
+
+def make_search_event(rng: random.Random, pages: int, chunks: int, claims: list[str]) -> Event:
+    chosen = [rng.randrange(pages) for _ in range(chunks)]
+    grounding = {
+        "grounding_chunks": [
+            {"web": {"uri": variant(rng, page), "title": f"Article {page}", "domain": f"site{page % 50}.org"}}
+            for page in chosen
+        ],
+        "grounding_supports": [
+            {
+                "segment": {"text": rng.choice(claims)},
+                "grounding_chunk_indices": [index, (index + 1) % chunks],
+                "confidence_scores": [round(rng.random(), 2), round(rng.random(), 2)],
+            }
+            for index in range(chunks)
+        ],
+    }
+    return Event(
+        author="unified_researcher",
+        content=genai_types.Content(
+            role="user",
+            parts=[
+                genai_types.Part(
+                    function_response=genai_types.FunctionResponse(
+                        name="google_search", response={"summary": "...", "grounding_metadata": grounding}
+                    )
+                )
+            ],
+        ),
+    )
+
+
+def legacy_collect(state: dict, events: list[Event]) -> None:
+    """Source collection before the source registry."""
+    url_to_short_id = state.get("url_to_short_id", {})
+    sources = state.get("sources", {})
+    id_counter = len(url_to_short_id) + 1
+    for event in events:
+        for grounding_metadata in callbacks._grounding_metadata_in(event):
+            chunks_info = {}
+            for idx, chunk in enumerate(grounding_metadata.grounding_chunks or []):
+                if not chunk.web or not chunk.web.uri:
+                    continue
+                url = chunk.web.uri
+                if url not in url_to_short_id:
+                    short_id = f"src-{id_counter}"
+                    url_to_short_id[url] = short_id
+                    sources[short_id] = {"short_id": short_id, "title": chunk.web.title, "url": url,
+                                         "domain": chunk.web.domain, "supported_claims": []}
+                    id_counter += 1
+                chunks_info[idx] = url_to_short_id[url]
+            for support in grounding_metadata.grounding_supports or []:
+                scores = support.confidence_scores or []
+                for i, chunk_idx in enumerate(support.grounding_chunk_indices or []):
+                    if chunk_idx in chunks_info:
+                        sources[chunks_info[chunk_idx]]["supported_claims"].append(
+                            {"text_segment": support.segment and support.segment.text, "confidence": scores[i] if i < len(scores) else 0.5}
+                        )
+    state["url_to_short_id"] = url_to_short_id
+    state["sources"] = sources
+
+
+def figures(state: dict, seconds: float) -> str:
+    sources = state.get("sources", {})
+    claims = sum(len(source["supported_claims"]) for source in sources.values())
+    size = len(json.dumps(sources)) + len(json.dumps(state.get("url_to_short_id", {})))
+    return f"{seconds:>8.2f} {len(sources):>8} {claims:>9} {size / 2**20:>9.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50000, help="Grounding chunks over the whole run.")
+    parser.add_argument("--chunks-per-search", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=2000, help="Distinct pages the chunks point at.")
+    parser.add_argument("--claims", type=int, default=500, help="Distinct claim texts.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    claims = [f"Claim {n} about the subject." for n in range(args.claims)]
+    steps = [
+        make_search_event(rng, args.pages, args.chunks_per_search, claims)
+        for _ in range(args.chunks // args.chunks_per_search)
+    ]
+
+    session = Session(id="bench", app_name="bench", user_id="bench", state={})
+    context = cast(
+        CallbackContext, SimpleNamespace(_invocation_context=SimpleNamespace(session=session), state=session.state)
+    )
+    start = time.perf_counter()
+    for event in steps:
+        session.events.append(event)
+        callbacks.collect_research_sources_callback(context)
+    registry_seconds = time.perf_counter() - start
+
+    legacy_state: dict = {}
+    start = time.perf_counter()
+    for event in steps:
+        legacy_collect(legacy_state, [event])
+    legacy_seconds = time.perf_counter() - start
+
+    print(f"{len(steps)} searches, {args.chunks} chunks over {args.pages} pages")
+    print(f"{'':<10} {'seconds':>8} {'sources':>8} {'claims':>9} {'state MB':>9}")
+    print(f"{'legacy':<10} {figures(legacy_state, legacy_seconds)}")
+    print(f"{'registry':<10} {figures(session.state, registry_seconds)}")
+
+
+if __name__ == "__main__":
+    main()
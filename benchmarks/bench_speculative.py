@@ -0,0 +1,108 @@
+"""Measures the research latency speculative prefetch hides behind plan review.
+
+Runs the planned queries of a synthetic plan the way the parallel research
+stage does on approval, against a local search backend answering after
+`--search-latency` seconds: without speculation, after `--review` seconds of
+speculative prefetch, and after a review during which half of the plan's
+nodes were replaced. Reports the searches sent and the seconds from approval
+until every node had its search results.
+
+    python -m benchmarks.bench_speculative --nodes 12 --review 5 --search-latency 1.5
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from app.config import config
+from app.schemas.narrative import KnowledgeNodePlan, NarrativePlan
+from app.tools.query_scheduler import QueryScheduler
+from app.tools.search_cache import LocalSearchBackend, google_search
+from app.tools.speculative_prefetch import speculate, take_speculative_prefetch
+
+from .bench_pipeline import use_fresh_stores
+from .synthetic import make_plan, make_search_backend
+
+
+class SlowSearchBackend:
+    """Answers from another backend after a fixed latency, like a grounded search."""
+    def __init__(self, inner: LocalSearchBackend, latency: float):
+        self.inner = inner
+        self.latency = latency
+
+    async def search(self, query: str) -> dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return await self.inner.search(query)
+
+
+def edit_plan(plan: NarrativePlan) -> NarrativePlan:
+    """Replaces the second half of the plan's nodes, as a user asking for changes would."""
+    nodes = list(plan.knowledge_nodes)
+    for i in range(len(nodes) // 2, len(nodes)):
+        nodes[i] = KnowledgeNodePlan(
+            node_title=f"Edited node {i}",
+            rationale="Node asked for by the user",
+            axis=nodes[i].axis,
+            search_queries=[f"Edited node {i} query {n}" for n in range(len(nodes[i].search_queries))],
+        )
+    return plan.model_copy(update={"knowledge_nodes": nodes})
+
+
+async def research(name: str, args: argparse.Namespace) -> None:
+    plan = make_plan(args.nodes, args.queries_per_node)
+    edited = edit_plan(plan)
+    backend = make_search_backend(plan)
+    for node in edited.knowledge_nodes:
+        for query in node.search_queries:
+            backend.add(query, f"Summary of the results for '{query}'.")
+    use_fresh_stores(SlowSearchBackend(backend, args.search_latency))
+
+    session_id = f"bench-{name}"
+    if name == "speculative":
+        speculate(session_id, plan)
+        await asyncio.sleep(args.review)
+    elif name == "edited":
+        speculate(session_id, plan)
+        await asyncio.sleep(args.review / 2)
+        plan = edited
+        speculate(session_id, plan)
+        await asyncio.sleep(args.review / 2)
+
+    # Approval: the parallel research stage runs the plan's queries.
+    started = time.monotonic()
+    speculative = take_speculative_prefetch(session_id)
+    search = speculative.search if speculative else google_search
+    _, query_stats = await QueryScheduler(search).run(
+        {node.node_title: node.search_queries for node in plan.knowledge_nodes}
+    )
+    if speculative:
+        speculative.cancel()
+    waited = time.monotonic() - started
+    stats = speculative.stats if speculative else None
+    print(
+        f"{name:<12} {query_stats.unique:>8} {backend.calls:>9} {waited:>9.2f} "
+        f"{stats.promoted if stats else 0:>9} {stats.reused if stats else 0:>7} "
+        f"{stats.discarded + stats.cancelled if stats else 0:>8}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    config.speculative_prefetch = True
+    print(f"{'':<12} {'queries':>8} {'searches':>9} {'waited s':>9} {'promoted':>9} {'reused':>7} {'dropped':>8}")
+    for name in ("baseline", "speculative", "edited"):
+        await research(name, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=12)
+    parser.add_argument("--queries-per-node", type=int, default=4)
+    parser.add_argument("--review", type=float, default=5.0, help="Seconds the user spends reviewing the plan.")
+    parser.add_argument("--search-latency", type=float, default=1.5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measures the bytes per SSE event of a research run, with and without state patches.
+
+Researches a synthetic plan with scripted local models, serializes every
+event as `/run_sse` does, and passes it through a StatePatcher as
+`app.server` does for clients sending `X-State-Patches: 1`. Applying the
+patches in order must rebuild the state the full deltas carry, which is
+checked at the end.
+
+    python -m benchmarks.bench_sse --nodes 12 --facts-per-node 30 --passes 2
+    python -m benchmarks.bench_sse --nodes 12 --facts-per-node 30 --passes 2 --sequential
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types as genai_types
+
+from app.models.fake import FakeLlm
+from app.models.replay import wrap_models
+from app.utils.state_patch import PATCHED_KEYS, StatePatcher, apply_patch
+
+from .bench_pipeline import use_fresh_stores
+from .synthetic import SyntheticResponder, make_search_backend
+
+
+def sizes(values: list[int]) -> str:
+    return f"{sum(values) / 2**20:>10.2f} {statistics.mean(values) / 2**10:>10.1f} {max(values) / 2**10:>10.1f}"
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.sub_agents.research_pipeline.agent import (
+        parallel_research_stage,
+        research_pipeline,
+    )
+
+    if args.sequential:
+        # As when every parallel worker fails: the refinement loop researches
+        # the nodes one pass at a time, writing the brief back at each step.
+        research_pipeline.sub_agents.remove(parallel_research_stage)
+    responder = SyntheticResponder(args.nodes, max(args.facts_per_node // args.passes, 1), args.passes)
+    # Named like a Gemini model, as built-in tools check the model name.
+    model = FakeLlm(model="gemini-synthetic", respond=responder)
+    wrap_models(research_pipeline, lambda _: model)
+    use_fresh_stores(make_search_backend(responder.plan))
+    runner = InMemoryRunner(agent=research_pipeline, app_name="bench")
+    session = await runner.session_service.create_session(
+        app_name="bench",
+        user_id="bench",
+        state={"research_subject": "Synthetic subject", "research_plan": responder.plan.model_dump()},
+    )
+
+    patcher = StatePatcher()
+    full_sizes, patched_sizes = [], []
+    full_state: dict = {}
+    patched_state: dict = {}
+    content = genai_types.Content(role="user", parts=[genai_types.Part(text="Proceed.")])
+    async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=content):
+        message = f"data: {event.model_dump_json(exclude_none=True, by_alias=True)}".encode()
+        patched = patcher.patch_sse(message)
+        full_sizes.append(len(message) + 2)
+        patched_sizes.append(len(patched) + 2)
+        # Full deltas replace whole keys; patches apply to what was sent before.
+        delta = json.loads(message[6:]).get("actions", {}).get("stateDelta", {})
+        full_state.update({key: value for key, value in delta.items() if key in PATCHED_KEYS})
+        if state_patch := json.loads(patched[6:]).get("actions", {}).get("statePatch"):
+            apply_patch(patched_state, state_patch["ops"])
+    if patched_state != full_state:
+        raise SystemExit("Applying the patches does not rebuild the state.")
+
+    print(f"{len(full_sizes)} events, {patcher.seq} patches")
+    print(f"{'':<10} {'total MB':>10} {'mean KB':>10} {'max KB':>10}")
+    print(f"{'full':<10} {sizes(full_sizes)}")
+    print(f"{'patched':<10} {sizes(patched_sizes)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=12)
+    parser.add_argument("--facts-per-node", type=int, default=30)
+    parser.add_argument("--passes", type=int, default=2, help="Research passes per node.")
+    parser.add_argument("--sequential", action="store_true", help="Research in the refinement loop only.")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
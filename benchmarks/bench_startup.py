@@ -0,0 +1,87 @@
+"""Measures cold-start import time, with no credentials and no network.
+
+Each module is imported in a fresh interpreter whose environment has no
+Google Cloud project, no application default credentials and no gcloud
+configuration, and whose sockets refuse to connect. An import that resolves
+credentials or reaches the network therefore fails instead of being timed.
+
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --module app --module app.agent
+
+`import app` should not build the agent graph; `app.agent` builds it, which
+is dominated by importing ADK itself: compare it with the `google.adk.agents`
+row.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs in the child interpreter: refuses network access, then times the import.
+_CHILD = """
+import socket, sys, time
+
+def refuse(*args, **kwargs):
+    raise OSError("network access during import")
+
+socket.socket.connect = socket.socket.connect_ex = refuse
+socket.create_connection = socket.getaddrinfo = refuse
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+# Variables that would let google.auth find credentials or a project.
+_CREDENTIAL_VARIABLES = (
+    "GOOGLE_APPLICATION_CREDENTIALS",
+    "GOOGLE_CLOUD_PROJECT",
+    "GOOGLE_API_KEY",
+    "GEMINI_API_KEY",
+    "CLOUDSDK_CORE_PROJECT",
+    "CLOUDSDK_CONFIG",
+)
+
+
+def isolated_env(home: str) -> dict[str, str]:
+    """The current environment without credentials, with an empty home directory."""
+    env = {key: value for key, value in os.environ.items() if key not in _CREDENTIAL_VARIABLES}
+    env["HOME"] = home
+    env["CLOUDSDK_CONFIG"] = os.path.join(home, "gcloud")
+    # Without it google.auth probes the GCE metadata server.
+    env["NO_GCE_CHECK"] = "True"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_import(module: str, env: dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, module], env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed without credentials or network:\n{result.stderr}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="Module to import; repeat for each module.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    modules = args.module or ["app", "app.config", "google.adk.agents", "app.agent"]
+
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as home:
+        env = isolated_env(home)
+        # A first import compiles the bytecode; it is not timed.
+        for module in modules:
+            time_import(module, env)
+        print(f"{'module':<18} {'mean s':>8} {'min s':>8}")
+        for module in modules:
+            seconds = [time_import(module, env) for _ in range(args.repeat)]
+            print(f"{module:<18} {statistics.mean(seconds):>8.3f} {min(seconds):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Synthetic plans, briefs, research updates and model answers of configurable
+size for benchmarks."""
+
+import json
+import random
+import re
+from collections import Counter
+from typing import Literal
+
+from google.adk.models import LlmRequest
+
+from app.schemas.brief import (
+    DocumentaryBrief,
+    FactPoint,
+    Feedback,
+    KnowledgeNode,
+    NodeUpdate,
+    SearchQuery,
+    TopSource,
+)
+from app.schemas.narrative import KnowledgeNodePlan, NarrativePlan
+from app.tools.search_cache import LocalSearchBackend
+
+Category = Literal["Key Event", "Key Figure", "Quirky Anecdote", "Technical Detail", "World-Building"]
+Axis = Literal["chronological", "thematic", "key_figures_and_entities"]
+CATEGORIES: list[Category] = ["Key Event", "Key Figure", "Quirky Anecdote", "Technical Detail", "World-Building"]
+AXES: list[Axis] = ["chronological", "thematic", "key_figures_and_entities"]
+# Descriptions are drawn from this vocabulary so unrelated facts share few
+# words, as real ones do.
+WORDS = [f"w{n}" for n in range(5000)]
+
+
+def make_fact(rng: random.Random, node: int, n: int, entities: int = 200) -> FactPoint:
+    return FactPoint(
+        fact_id=f"fp_{node}_{n}",
+        description=f"Fact {n} of node {node}: " + " ".join(rng.choices(WORDS, k=12)) + ".",
+        category=rng.choice(CATEGORIES),
+        narrative_significance=rng.randint(1, 10),
+        visual_suggestion="Archival footage",
+        related_entities=[f"Entity {rng.randrange(entities)}" for _ in range(3)],
+        source_url=f"https://example.com/{node}/{rng.randrange(50)}",
+    )
+
+
+def make_sources(rng: random.Random, node: int, count: int) -> list[TopSource]:
+    return [
+        TopSource(url=f"https://example.com/{node}/{n}", title=f"Source {n}", rationale="Primary source")
+        for n in rng.sample(range(count * 2), count)
+    ]
+
+
+def make_brief(nodes: int, facts_per_node: int, seed: int = 0, entities: int | None = None) -> DocumentaryBrief:
+    """
+    Builds a brief with `nodes` nodes holding `facts_per_node` facts each.
+
+    Facts draw their related entities from `entities` names, one per ten facts
+    by default, so entity frequencies stay realistic as the brief grows.
+    """
+    rng = random.Random(seed)
+    entities = entities or max(200, nodes * facts_per_node // 10)
+    return DocumentaryBrief(
+        reference_id=f"synthetic-{seed}",
+        subject="Synthetic subject",
+        narrative_summary="A synthetic brief for benchmarks.",
+        knowledge_nodes=[
+            KnowledgeNode(
+                node_title=f"Node {i}",
+                rationale="Synthetic node",
+                axis=AXES[i % len(AXES)],
+                top_sources=make_sources(rng, i, min(facts_per_node, 20)),
+                fact_points=[make_fact(rng, i, n, entities) for n in range(facts_per_node)],
+            )
+            for i in range(nodes)
+        ],
+    )
+
+
+def make_updates(
+    brief: DocumentaryBrief, count: int, facts_per_update: int, duplicate_ratio: float = 0.3, seed: int = 1
+) -> list[NodeUpdate]:
+    """Builds NodeUpdates where `duplicate_ratio` of the facts already exist in the brief."""
+    rng = random.Random(seed)
+    updates = []
+    for u in range(count):
+        node_pos = rng.randrange(len(brief.knowledge_nodes))
+        node = brief.knowledge_nodes[node_pos]
+        facts = []
+        for n in range(facts_per_update):
+            if node.fact_points and rng.random() < duplicate_ratio:
+                facts.append(rng.choice(node.fact_points).model_copy())
+            else:
+                facts.append(make_fact(rng, node_pos, 10**6 + u * facts_per_update + n))
+        updates.append(
+            NodeUpdate(
+                node_title=node.node_title,
+                top_sources=make_sources(rng, node_pos, 3),
+                fact_points=facts,
+            )
+        )
+    return updates
+
+
+def paraphrase(rng: random.Random, fact: FactPoint, edits: int = 2) -> FactPoint:
+    """Returns a copy of the fact with `edits` words of its description replaced."""
+    words = fact.description.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return fact.model_copy(
+        update={
+            "fact_id": f"{fact.fact_id}_p{rng.randrange(10**6)}",
+            "description": " ".join(words),
+            "narrative_significance": rng.randint(1, 10),
+            "related_entities": [*fact.related_entities[1:], f"Entity {rng.randrange(200)}"],
+        }
+    )
+
+
+def make_plan(nodes: int, queries_per_node: int = 4, shared_queries: int = 1, seed: int = 0) -> NarrativePlan:
+    """
+    Builds a plan with `nodes` nodes. The first `shared_queries` queries of
+    every node are asked by other nodes too, as in real plans.
+    """
+    rng = random.Random(seed)
+    shared = [f"Synthetic subject {word}" for word in rng.sample(WORDS, max(shared_queries * 3, 1))]
+    return NarrativePlan(
+        narrative_summary="A synthetic plan for benchmarks.",
+        knowledge_nodes=[
+            KnowledgeNodePlan(
+                node_title=f"Node {i}",
+                rationale="Synthetic node",
+                axis=AXES[i % len(AXES)],
+                search_queries=[
+                    *rng.sample(shared, min(shared_queries, len(shared))),
+                    *(f"Node {i} query {n}" for n in range(queries_per_node - shared_queries)),
+                ],
+            )
+            for i in range(nodes)
+        ],
+    )
+
+
+def make_search_backend(plan: NarrativePlan, sources_per_query: int = 3) -> LocalSearchBackend:
+    """A local search backend answering every query of the plan."""
+    backend = LocalSearchBackend()
+    for node in plan.knowledge_nodes:
+        for query in node.search_queries:
+            backend.add(
+                query,
+                f"Summary of the results for '{query}'.",
+                {"grounding_chunks": [
+                    {"web": {"uri": f"https://example.com/search/{abs(hash(query)) % 10**6}/{n}", "title": f"Result {n}"}}
+                    for n in range(sources_per_query)
+                ]},
+            )
+    return backend
+
+
+class SyntheticResponder:
+    """
+    Answers the agents' model calls with synthetic data, for FakeLlm: a plan
+    of `nodes` nodes, `facts_per_pass` new facts per research pass, and
+    evaluations failing a node until it has had `passes_per_node` passes.
+    """
+    def __init__(self, nodes: int, facts_per_pass: int, passes_per_node: int = 1, seed: int = 0):
+        self.plan = make_plan(nodes, seed=seed)
+        self.facts_per_pass = facts_per_pass
+        self.passes_per_node = passes_per_node
+        self._rng = random.Random(seed)
+        self._facts: Counter[str] = Counter()
+        self._evaluations: Counter[str] = Counter()
+
+    def __call__(self, llm_request: LlmRequest) -> str:
+        instruction = llm_request.config.system_instruction if llm_request.config else ""
+        instruction = instruction if isinstance(instruction, str) else ""
+        # The TARGET NODE block comes last, after the schema examples.
+        titles = re.findall(r'"node_title": "([^"]+)"', instruction)
+        title = titles[-1] if titles else ""
+        if "TARGET NODE" in instruction and "Story Editor" in instruction:
+            return self._evaluate(title)
+        if "TARGET NODE" in instruction:
+            return self._research(title)
+        if "research plan" in instruction:
+            return self.plan.model_dump_json()
+        if "EdgeAnnotations" in instruction:
+            return json.dumps({"annotations": []})
+        return "Synthetic subject"
+
+    def _research(self, title: str) -> str:
+        node = int(title.rsplit(" ", 1)[-1]) if title[-1:].isdigit() else 0
+        start = self._facts[title]
+        self._facts[title] += self.facts_per_pass
+        return NodeUpdate(
+            node_title=title,
+            top_sources=make_sources(self._rng, node, 3),
+            fact_points=[make_fact(self._rng, node, start + n) for n in range(self.facts_per_pass)],
+        ).model_dump_json()
+
+    def _evaluate(self, title: str) -> str:
+        self._evaluations[title] += 1
+        if self._evaluations[title] >= self.passes_per_node:
+            return Feedback(grade="pass", comment="Saturated.").model_dump_json()
+        return Feedback(
+            grade="fail",
+            comment="Needs more anecdotes.",
+            follow_up_queries=[SearchQuery(search_query=f"{title} anecdotes {self._evaluations[title]}")],
+        ).model_dump_json()
@@ -2,6 +2,7 @@ import { useState, useRef, useCallback, useEffect } from "react";
 import { v4 as uuidv4 } from 'uuid';
 import { WelcomeScreen } from "@/components/WelcomeScreen";
 import { ChatMessagesView } from "@/components/ChatMessagesView";
+import { applyJsonPatch, type JsonPatchOp } from "@/utils";
 
 // Update DisplayData to be a string type
 type DisplayData = string | null;
@@ -18,7 +19,13 @@ interface AgentMessage {
   role: string;
 }
 
+interface StatePatch {
+  seq: number;
+  ops: JsonPatchOp[];
+}
+
 interface AgentResponse {
+  id: string;
   content: AgentMessage;
   usageMetadata: {
     candidatesTokenCount: number;
@@ -31,6 +38,8 @@ interface AgentResponse {
       research_plan?: string;
       final_report_with_citations?: boolean;
     };
+    // Sent instead of the large stateDelta keys when requested with X-State-Patches.
+    statePatch?: StatePatch;
   };
 }
 
@@ -52,6 +61,15 @@ export default function App() {
   const [isCheckingBackend, setIsCheckingBackend] = useState(true);
   const currentAgentRef = useRef('');
   const accumulatedTextRef = useRef("");
+  // Session state rebuilt from the state patches of the current stream.
+  const sessionStateRef = useRef<Record<string, any>>({});
+  const stateSeqRef = useRef(0);
+  // Patches received while the state is resynced, with their event's id;
+  // null when no resync is running.
+  const pendingPatchesRef = useRef<{ eventId: string; patch: StatePatch }[] | null>(null);
+  // Counts streams, so a resync finishing after a new stream started is dropped.
+  const streamRef = useRef(0);
+  const sessionUrlRef = useRef<string | null>(null);
   const scrollAreaRef = useRef<HTMLDivElement>(null);
 
   const retryWithBackoff = async (
@@ -117,6 +135,70 @@ export default function App() {
     }
   };
 
+  // Replaces the patched state with the session's full state, after a
+  // missed or failed patch. Patches received meanwhile are queued, and only
+  // those of events the fetched session does not hold yet are applied to it.
+  const resyncSessionState = async (eventId: string, patch: StatePatch) => {
+    pendingPatchesRef.current = [{ eventId, patch }];
+    const stream = streamRef.current;
+    try {
+      if (!sessionUrlRef.current) throw new Error('No session to resync.');
+      const response = await fetch(sessionUrlRef.current);
+      if (!response.ok) throw new Error(`${response.status} ${response.statusText}`);
+      const session = await response.json();
+      if (stream !== streamRef.current) return;
+      const persisted = new Set((session.events || []).map((event: { id: string }) => event.id));
+      const pending = pendingPatchesRef.current || [];
+      // The snapshot holds every patch up to the last one of a persisted event.
+      const snapshotSeq = Math.max(-1, ...pending.filter(({ eventId }) => persisted.has(eventId)).map(({ patch }) => patch.seq));
+      const state = session.state || {};
+      let seq = snapshotSeq + 1;
+      for (const { patch } of pending.sort((a, b) => a.patch.seq - b.patch.seq)) {
+        if (patch.seq <= snapshotSeq) continue;
+        applyJsonPatch(state, patch.ops);
+        seq = patch.seq + 1;
+      }
+      sessionStateRef.current = state;
+      stateSeqRef.current = seq;
+    } catch (error) {
+      // The next patch no longer matches the expected seq, and resyncs again.
+      console.error('Error resyncing the session state:', error);
+    } finally {
+      if (stream === streamRef.current) pendingPatchesRef.current = null;
+    }
+  };
+
+  // Returns the state keys an event changed with their new values, applying
+  // its statePatch to the state of the stream.
+  const changedState = (parsed: AgentResponse): Record<string, any> => {
+    const changed: Record<string, any> = { ...(parsed.actions?.stateDelta || {}) };
+    const statePatch = parsed.actions?.statePatch;
+    if (!statePatch) return changed;
+
+    if (pendingPatchesRef.current) {
+      pendingPatchesRef.current.push({ eventId: parsed.id, patch: statePatch });
+      return changed;
+    }
+    if (statePatch.seq !== stateSeqRef.current) {
+      console.warn(`[SSE STATE] Expected patch ${stateSeqRef.current}, got ${statePatch.seq}. Resyncing.`);
+      resyncSessionState(parsed.id, statePatch);
+      return changed;
+    }
+    try {
+      applyJsonPatch(sessionStateRef.current, statePatch.ops);
+    } catch (error) {
+      console.error('[SSE STATE] Could not apply patch, resyncing:', error);
+      resyncSessionState(parsed.id, statePatch);
+      return changed;
+    }
+    stateSeqRef.current = statePatch.seq + 1;
+    for (const op of statePatch.ops) {
+      const key = op.path.split('/')[1];
+      changed[key] = sessionStateRef.current[key];
+    }
+    return changed;
+  };
+
   // Function to extract text and metadata from SSE data
   const extractDataFromSSE = (data: string) => {
     try {
@@ -129,6 +211,7 @@ export default function App() {
       let functionCall = null;
       let functionResponse = null;
       let sources = null;
+      const stateDelta = changedState(parsed);
 
       // Check if content.parts exists and has text
       if (parsed.content && parsed.content.parts) {
@@ -155,21 +238,17 @@ export default function App() {
         console.log('[SSE EXTRACT] Agent:', agent); // DEBUG: Log agent
       }
 
-      if (
-        parsed.actions &&
-        parsed.actions.stateDelta &&
-        parsed.actions.stateDelta.final_report_with_citations
-      ) {
-        finalReportWithCitations = parsed.actions.stateDelta.final_report_with_citations;
+      if (stateDelta.final_report_with_citations) {
+        finalReportWithCitations = stateDelta.final_report_with_citations;
       }
 
       // Extract website count from research agents
       let sourceCount = 0;
       if ((parsed.author === 'section_researcher' || parsed.author === 'enhanced_search_executor')) {
         console.log('[SSE EXTRACT] Relevant agent for source count:', parsed.author); // DEBUG
-        if (parsed.actions?.stateDelta?.url_to_short_id) {
-          console.log('[SSE EXTRACT] url_to_short_id found:', parsed.actions.stateDelta.url_to_short_id); // DEBUG
-          sourceCount = Object.keys(parsed.actions.stateDelta.url_to_short_id).length;
+        if (stateDelta.url_to_short_id) {
+          console.log('[SSE EXTRACT] url_to_short_id found:', stateDelta.url_to_short_id); // DEBUG
+          sourceCount = Object.keys(stateDelta.url_to_short_id).length;
           console.log('[SSE EXTRACT] Calculated sourceCount:', sourceCount); // DEBUG
         } else {
           console.log('[SSE EXTRACT] url_to_short_id NOT found for agent:', parsed.author); // DEBUG
@@ -177,8 +256,8 @@ export default function App() {
       }
 
       // Extract sources if available
-      if (parsed.actions?.stateDelta?.sources) {
-        sources = parsed.actions.stateDelta.sources;
+      if (stateDelta.sources) {
+        sources = stateDelta.sources;
         console.log('[SSE EXTRACT] Sources found:', sources); // DEBUG
       }
 
@@ -197,7 +276,7 @@ export default function App() {
     switch (agentName) {
       case "plan_generator":
         return "Planning Research Strategy";
-      case "section_planner":
+      case "brief_initializer":
         return "Structuring Report Outline";
       case "section_researcher":
         return "Initial Web Research";
@@ -323,10 +402,18 @@ export default function App() {
 
       // Send the message with retry logic
       const sendMessage = async () => {
+        // Each stream starts from an empty state; its first patches add the
+        // whole values.
+        sessionStateRef.current = {};
+        stateSeqRef.current = 0;
+        pendingPatchesRef.current = null;
+        streamRef.current += 1;
+        sessionUrlRef.current = `/api/apps/${currentAppName}/users/${currentUserId}/sessions/${currentSessionId}`;
         const response = await fetch("/api/run_sse", {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
+            "X-State-Patches": "1",
           },
           body: JSON.stringify({
             appName: currentAppName,
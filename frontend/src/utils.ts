@@ -5,3 +5,38 @@ export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs));
 }
 
+
+export interface JsonPatchOp {
+  op: "add" | "remove" | "replace" | "copy";
+  path: string;
+  from?: string;
+  value?: any;
+}
+
+const resolvePointer = (doc: any, pointer: string): any =>
+  pointer
+    .split("/")
+    .slice(1)
+    .reduce((target, token) => target[token.replace(/~1/g, "/").replace(/~0/g, "~")], doc);
+
+// Applies JSON Patch (RFC 6902) operations to `doc` in place, as sent in an
+// event's actions.statePatch by the backend.
+export function applyJsonPatch(doc: Record<string, any>, ops: JsonPatchOp[]) {
+  for (const op of ops) {
+    const separator = op.path.lastIndexOf("/");
+    const target = resolvePointer(doc, op.path.substring(0, separator));
+    const key = op.path.substring(separator + 1).replace(/~1/g, "/").replace(/~0/g, "~");
+    const value = op.op === "copy" ? structuredClone(resolvePointer(doc, op.from!)) : op.value;
+    if (Array.isArray(target)) {
+      if (op.op === "remove") target.splice(Number(key), 1);
+      else if (key === "-") target.push(value);
+      else if (op.op === "replace") target[Number(key)] = value;
+      else target.splice(Number(key), 0, value);
+    } else if (op.op === "remove") {
+      delete target[key];
+    } else {
+      target[key] = value;
+    }
+  }
+  return doc;
+}
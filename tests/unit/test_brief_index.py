@@ -0,0 +1,28 @@
+import random
+
+from app.schemas.brief import DocumentaryBrief, NodeUpdate
+from app.utils.brief_index import get_brief_index
+from benchmarks.synthetic import make_brief, make_fact
+
+
+def test_index_survives_revalidation_from_state() -> None:
+    brief = make_brief(3, 20, seed=7)
+    index = get_brief_index(brief)
+
+    reloaded = DocumentaryBrief.model_validate(brief.model_dump())
+    assert get_brief_index(reloaded) is index
+    assert index.brief is reloaded
+    assert all(entry.node is reloaded.knowledge_nodes[entry.position] for entry in index.nodes.values())
+
+
+def test_edits_outside_the_index_are_noticed_at_the_same_length() -> None:
+    brief = make_brief(2, 10, seed=8)
+    index = get_brief_index(brief)
+    node = brief.knowledge_nodes[0]
+    replacement = make_fact(random.Random(0), 0, 10**6)
+    removed = node.fact_points[3]
+    node.fact_points[3] = replacement
+
+    result = index.merge(NodeUpdate(node_title=node.node_title, top_sources=[], fact_points=[removed, replacement]))
+    assert result is not None
+    assert result.added_facts == [removed]
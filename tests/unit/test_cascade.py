@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types as genai_types
+
+from app.models.cascade import (
+    BUDGET_EXHAUSTED,
+    CascadeLlm,
+    ModelBudget,
+    model_budget_exhausted,
+    use_model_budget,
+    valid_node_update,
+)
+from app.models.fake import FakeLlm
+
+VALID = json.dumps({"node_title": "Node", "top_sources": [], "fact_points": []})
+
+
+def tiers(cheap_answer: str) -> tuple[FakeLlm, FakeLlm]:
+    cheap = FakeLlm(model="fake-lite", respond=lambda request: cheap_answer, tokens_per_call=10)
+    strong = FakeLlm(model="fake-pro", respond=lambda request: VALID, tokens_per_call=100)
+    return cheap, strong
+
+
+def generate(model: CascadeLlm, budget: ModelBudget) -> list[LlmResponse]:
+    async def call() -> list[LlmResponse]:
+        use_model_budget(budget)
+        request = LlmRequest(contents=[genai_types.Content(role="user", parts=[genai_types.Part(text="go")])])
+        return [response async for response in model.generate_content_async(request)]
+
+    return asyncio.run(call())
+
+
+def test_a_valid_cheap_answer_is_not_escalated() -> None:
+    cheap, strong = tiers(VALID)
+    budget = ModelBudget(max_seconds=60, max_tokens=1000)
+    generate(CascadeLlm(model=cheap.model, tiers=[cheap, strong], validator=valid_node_update), budget)
+    assert (cheap.calls, strong.calls) == (1, 0)
+    assert budget.tokens == 10
+
+
+def test_a_rejected_answer_is_escalated() -> None:
+    cheap, strong = tiers("Sorry, no JSON.")
+    budget = ModelBudget(max_seconds=60, max_tokens=1000)
+    responses = generate(CascadeLlm(model=cheap.model, tiers=[cheap, strong], validator=valid_node_update), budget)
+    assert (cheap.calls, strong.calls) == (1, 1)
+    assert responses[-1].content is not None and responses[-1].content.parts is not None
+    assert responses[-1].content.parts[0].text == VALID
+    assert budget.tiers["fake-lite"].rejected == 1
+
+
+def test_no_escalation_once_the_budget_runs_out_mid_call() -> None:
+    cheap, strong = tiers("Sorry, no JSON.")
+    budget = ModelBudget(max_seconds=60, max_tokens=10)
+    cascade = CascadeLlm(model=cheap.model, tiers=[cheap, strong], validator=valid_node_update)
+    responses = generate(cascade, budget)
+    assert (cheap.calls, strong.calls) == (1, 0)
+    assert responses[-1].content is not None and responses[-1].content.parts is not None
+    assert responses[-1].content.parts[0].text == "Sorry, no JSON."
+
+
+def test_calls_are_refused_once_the_budget_is_spent() -> None:
+    cheap, strong = tiers(VALID)
+    budget = ModelBudget(max_seconds=60, max_tokens=0)
+    responses = generate(CascadeLlm(model=cheap.model, tiers=[cheap, strong], validator=valid_node_update), budget)
+    assert (cheap.calls, strong.calls) == (0, 0)
+    assert [response.error_code for response in responses] == [BUDGET_EXHAUSTED]
+    assert budget.refused == 1
+    assert model_budget_exhausted({"model_usage": budget.as_dict()})
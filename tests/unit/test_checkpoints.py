@@ -0,0 +1,58 @@
+import asyncio
+import time
+from collections.abc import Iterator
+
+import pytest
+from google.adk.sessions import Session
+
+from app.utils.checkpoints import (
+    CHECKPOINT_KEY,
+    CheckpointStore,
+    finish_checkpoint,
+    resume_checkpoint,
+    save_checkpoint,
+    set_checkpoint_store,
+)
+from benchmarks.synthetic import make_brief
+
+
+@pytest.fixture
+def store() -> Iterator[CheckpointStore]:
+    store = CheckpointStore(":memory:", ttl_seconds=3600)
+    set_checkpoint_store(store)
+    yield store
+    set_checkpoint_store(None)
+
+
+def session(session_id: str) -> Session:
+    return Session(id=session_id, app_name="app", user_id="user", state={CHECKPOINT_KEY: "run"})
+
+
+def test_a_session_resumes_its_own_checkpoint(store: CheckpointStore) -> None:
+    brief = make_brief(2, 3)
+    asyncio.run(save_checkpoint(session("a"), brief))
+    checkpoint = asyncio.run(resume_checkpoint("run", "a"))
+    assert checkpoint is not None
+    assert checkpoint.brief.reference_id == brief.reference_id
+
+
+def test_concurrent_sessions_keep_separate_checkpoints(store: CheckpointStore) -> None:
+    asyncio.run(save_checkpoint(session("a"), make_brief(2, 3, seed=1)))
+    asyncio.run(save_checkpoint(session("b"), make_brief(2, 3, seed=2)))
+    assert len(store) == 2
+    # A live run of another session is not resumed.
+    assert asyncio.run(resume_checkpoint("run", "c")) is None
+
+
+def test_an_abandoned_checkpoint_is_claimed_once(store: CheckpointStore) -> None:
+    asyncio.run(save_checkpoint(session("a"), make_brief(2, 3)))
+    store._conn.execute("UPDATE run_checkpoints SET saved_at = ?", (time.time() - 3000,))
+    assert asyncio.run(resume_checkpoint("run", "b")) is not None
+    assert asyncio.run(resume_checkpoint("run", "c")) is None
+
+
+def test_a_finished_run_is_not_resumed(store: CheckpointStore) -> None:
+    asyncio.run(save_checkpoint(session("a"), make_brief(2, 3)))
+    asyncio.run(finish_checkpoint(session("a")))
+    assert asyncio.run(resume_checkpoint("run", "a")) is None
+    assert len(store) == 0
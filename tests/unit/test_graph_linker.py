@@ -0,0 +1,41 @@
+from app.schemas.brief import DocumentaryBrief, FactPoint, KnowledgeNode
+from app.utils.graph_linker import link_facts
+from benchmarks.synthetic import Axis, Category
+
+
+def fact(fact_id: str, category: Category, entities: list[str]) -> FactPoint:
+    return FactPoint(
+        fact_id=fact_id,
+        description=f"Fact {fact_id}",
+        category=category,
+        narrative_significance=5,
+        visual_suggestion="Footage",
+        related_entities=entities,
+        source_url="https://example.com",
+    )
+
+
+def node(title: str, axis: Axis, facts: list[FactPoint]) -> KnowledgeNode:
+    return KnowledgeNode(node_title=title, rationale="Rationale", axis=axis, fact_points=facts)
+
+
+def test_facts_are_linked_by_entity_or_by_category_and_axis() -> None:
+    brief = DocumentaryBrief(
+        reference_id="brief",
+        subject="Subject",
+        narrative_summary="Summary",
+        knowledge_nodes=[
+            node("One", "thematic", [
+                fact("a", "Key Event", ["Apple"]),
+                fact("b", "Key Event", []),
+                fact("c", "Quirky Anecdote", []),
+            ]),
+            node("Two", "chronological", [fact("d", "Technical Detail", ["apple"])]),
+        ],
+    )
+    link_facts(brief)
+    related = {f.fact_id: f.related_fact_ids for n in brief.knowledge_nodes for f in n.fact_points}
+    # A shared entity, then the same category and axis in the same node.
+    assert related["a"] == ["d", "b"]
+    assert related["b"] == ["a"]
+    assert related["c"] == []
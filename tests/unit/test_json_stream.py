@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+
+from app.utils.json_stream import JsonObjectExtractor, iter_json_objects, parse_first
+
+
+class Update(BaseModel):
+    title: str
+    facts: list[str]
+
+
+def test_prose_around_the_json_is_ignored() -> None:
+    text = 'Here is the update you asked for: {"title": "A", "facts": ["x"]} Let me know if it helps.'
+    assert parse_first(Update, text) == Update(title="A", facts=["x"])
+
+
+def test_code_fences_are_ignored() -> None:
+    text = 'Update:\n```json\n{\n  "title": "A",\n  "facts": []\n}\n```\n'
+    assert parse_first(Update, text) == Update(title="A", facts=[])
+
+
+def test_braces_and_escaped_quotes_inside_strings_do_not_end_the_object() -> None:
+    text = r'{"title": "The \"}\" {brace", "facts": ["a \\", "{", "}}"]} trailing }'
+    assert list(iter_json_objects(text)) == [text[:-len(" trailing }")]]
+    assert parse_first(Update, text) == Update(title='The "}" {brace', facts=["a \\", "{", "}}"])
+
+
+def test_an_object_split_across_chunks_is_completed_by_the_last_chunk() -> None:
+    text = 'Result: {"title": "A \\"quoted\\" {x}", "facts": ["1", "2"]} done'
+    extractor = JsonObjectExtractor()
+    completed = [extractor.feed(char) for char in text]
+    # The object is handed out as soon as its closing brace arrives.
+    assert completed.index(['{"title": "A \\"quoted\\" {x}", "facts": ["1", "2"]}']) == text.rindex("}")
+    assert [found for objects in completed for found in objects] == list(iter_json_objects(text))
+    assert parse_first(Update, [text[:10], text[10:31], text[31:]]) == Update(title='A "quoted" {x}', facts=["1", "2"])
+
+
+def test_the_first_object_that_validates_is_returned() -> None:
+    text = 'Draft: {"title": "A"} Final: {"title": "B", "facts": ["y"]} Also: {"title": "C", "facts": []}'
+    assert parse_first(Update, text) == Update(title="B", facts=["y"])
+    assert parse_first(Update, 'Nothing to see {"title": 1} here') is None
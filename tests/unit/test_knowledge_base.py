@@ -0,0 +1,87 @@
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+
+from app.config import config
+from app.schemas.brief import DocumentaryBrief, FactPoint, KnowledgeNode, ResearchStatus
+from app.utils.knowledge_base import KnowledgeBase, seed_brief, set_knowledge_base
+
+DESCRIPTIONS = [
+    "The Macintosh launch was announced during the Super Bowl.",
+    "Ridley Scott directed the 1984 commercial for the Macintosh launch.",
+    "The Macintosh launch priced the computer at 2,495 dollars.",
+    "Engineers signed the inside of the case before the Macintosh launch.",
+    "Sales slowed within a year of the Macintosh launch.",
+]
+
+
+def make_brief(subject: str, title: str, facts: int = 0, entity: str = "Apple") -> DocumentaryBrief:
+    return DocumentaryBrief(
+        reference_id=f"{subject}-{title}",
+        subject=subject,
+        narrative_summary="Summary",
+        knowledge_nodes=[KnowledgeNode(
+            node_title=title,
+            rationale="Rationale",
+            axis="thematic",
+            fact_points=[
+                FactPoint(
+                    fact_id=f"f{n}",
+                    description=DESCRIPTIONS[n],
+                    category="Key Event",
+                    narrative_significance=5,
+                    visual_suggestion="Footage",
+                    related_entities=[entity],
+                    source_url=f"https://example.com/{n}",
+                )
+                for n in range(facts)
+            ],
+        )],
+    )
+
+
+@pytest.fixture
+def knowledge_base(monkeypatch: pytest.MonkeyPatch) -> Iterator[KnowledgeBase]:
+    monkeypatch.setattr(config, "knowledge_base_enabled", True)
+    monkeypatch.setattr(config, "knowledge_base_min_facts", 3)
+    knowledge_base = KnowledgeBase(":memory:")
+    knowledge_base.add_brief(make_brief("Apple Computer", "The Macintosh launch", facts=5))
+    set_knowledge_base(knowledge_base)
+    yield knowledge_base
+    set_knowledge_base(None)
+
+
+def test_nodes_are_only_seeded_by_default(knowledge_base: KnowledgeBase) -> None:
+    brief = make_brief("Apple Computer", "The Macintosh launch")
+    stats = asyncio.run(seed_brief(brief, {}))
+    assert stats["facts_seeded"] == 5
+    assert stats["nodes_skipped"] == 0
+    # Seeding alone avoids no search or model call.
+    assert "searches_avoided" not in stats
+    assert brief.knowledge_nodes[0].research_status == ResearchStatus.PENDING
+
+
+def test_facts_of_unrelated_subjects_sharing_a_title_word_are_not_seeded(knowledge_base: KnowledgeBase) -> None:
+    unrelated = make_brief("Saturn V rocket", "The Launch")
+    assert asyncio.run(seed_brief(unrelated, {}))["facts_seeded"] == 0
+    assert not unrelated.knowledge_nodes[0].fact_points
+
+    same_subject = make_brief("Apple Computer", "The Launch")
+    assert asyncio.run(seed_brief(same_subject, {}))["facts_seeded"] == 5
+
+
+def test_skipping_requires_subject_or_entity_agreement(
+    knowledge_base: KnowledgeBase, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(config, "knowledge_base_skip_nodes", True)
+    # Same title words, another subject, no entity in the title: not seeded.
+    unrelated = make_brief("Cold War propaganda", "The Macintosh launch")
+    assert asyncio.run(seed_brief(unrelated, {}))["facts_seeded"] == 0
+
+    same_subject = make_brief("Apple Computer", "The Macintosh launch")
+    assert asyncio.run(seed_brief(same_subject, {"The Macintosh launch": ["q1", "q2"]}))["searches_avoided"] == 2
+    assert same_subject.knowledge_nodes[0].research_status == ResearchStatus.SATURATED
+
+    named_entity = make_brief("Personal computers", "Apple and the Macintosh launch")
+    assert asyncio.run(seed_brief(named_entity, {}))["nodes_skipped"] == 1
@@ -0,0 +1,27 @@
+from app.utils.near_duplicates import NearDuplicateIndex, minhash
+
+FIRST = "The Saturn V rocket launched Apollo 11 from Kennedy Space Center in July 1969"
+SECOND = "Apollo 11 lifted off on a Saturn V from Kennedy Space Center on 16 July 1969"
+
+
+def test_every_wording_of_a_key_is_matched() -> None:
+    index = NearDuplicateIndex()
+    index.add("fact", minhash(FIRST))
+    index.add("fact", minhash(SECOND))
+    assert len(index) == 1
+    assert index.find(minhash(FIRST), 0.9) == "fact"
+    assert index.find(minhash(SECOND), 0.9) == "fact"
+
+
+def test_removing_a_re_signed_key_empties_all_its_buckets() -> None:
+    index = NearDuplicateIndex()
+    index.add("fact", minhash(FIRST))
+    index.add("fact", minhash(SECOND))
+    index.add("other", minhash(FIRST + " carrying three astronauts"))
+    index.remove("fact")
+    assert index.find(minhash(FIRST), 0.0) == "other"
+    index.remove("other")
+    assert len(index) == 0
+    assert index.find(minhash(FIRST), 0.0) is None
+    assert index.find(minhash(SECOND), 0.0) is None
+    assert not index._buckets
@@ -0,0 +1,106 @@
+import asyncio
+from collections.abc import AsyncGenerator, Iterator
+from typing import Any
+
+import pytest
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types as genai_types
+
+from app.config import config
+from app.models.fake import FakeLlm
+from app.models.replay import models_wrapped
+from app.schemas.narrative import NarrativePlan
+from app.sub_agents.research_pipeline.agent import research_pipeline
+from app.tools.search_cache import SearchCache, set_search_backend
+from app.utils.checkpoints import CheckpointStore, set_checkpoint_store
+from app.utils.knowledge_base import set_knowledge_base
+from benchmarks.synthetic import SyntheticResponder, make_search_backend
+
+
+class SearchingLlm(FakeLlm):
+    """Runs one planned search of the target node before answering, as researchers do."""
+    queries: dict[str, list[str]]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        searched = any(
+            part.function_response for content in llm_request.contents for part in content.parts or []
+        )
+        instruction = llm_request.config.system_instruction if llm_request.config else ""
+        title = next((title for title in self.queries if f'"node_title": "{title}"' in str(instruction)), None)
+        if "google_search" in llm_request.tools_dict and not searched and title is not None:
+            call = genai_types.FunctionCall(name="google_search", args={"query": self.queries[title][-1]})
+            yield LlmResponse(content=genai_types.Content(role="model", parts=[genai_types.Part(function_call=call)]))
+            return
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+@pytest.fixture
+def responder(monkeypatch: pytest.MonkeyPatch) -> Iterator[SyntheticResponder]:
+    monkeypatch.setattr(config, "knowledge_base_enabled", False)
+    responder = SyntheticResponder(nodes=3, facts_per_pass=2)
+    set_search_backend(make_search_backend(responder.plan), SearchCache(":memory:", 60, 100))
+    set_checkpoint_store(CheckpointStore(":memory:", 60))
+    yield responder
+    set_search_backend(None)
+    set_checkpoint_store(None)
+    set_knowledge_base(None)
+
+
+def run_pipeline(model: FakeLlm, plan: NarrativePlan) -> dict[str, Any]:
+    async def run() -> dict[str, Any]:
+        runner = InMemoryRunner(agent=research_pipeline, app_name="test")
+        session = await runner.session_service.create_session(
+            app_name="test", user_id="user", state={"research_plan": plan.model_dump()}
+        )
+        message = genai_types.Content(role="user", parts=[genai_types.Part(text="Proceed.")])
+        async for _ in runner.run_async(user_id="user", session_id=session.id, new_message=message):
+            pass
+        finished = await runner.session_service.get_session(app_name="test", user_id="user", session_id=session.id)
+        assert finished is not None
+        return finished.state
+
+    with models_wrapped(research_pipeline, lambda _: model):
+        return asyncio.run(run())
+
+
+def test_sources_found_by_parallel_workers_reach_the_session(
+    responder: SyntheticResponder, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Sources must come from the workers' own searches.
+    monkeypatch.setattr(config, "prefetch_search_queries", False)
+    queries = {node.node_title: node.search_queries for node in responder.plan.knowledge_nodes}
+    state = run_pipeline(SearchingLlm(model="gemini-synthetic", respond=responder, queries=queries), responder.plan)
+    assert state.get("final_documentary_brief")
+    # Three results per query, one query per node.
+    assert len(state["sources"]) == len(state["url_to_short_id"]) == 9
+    assert sorted(state["sources"]) == [f"src-{n}" for n in range(1, 10)]
+
+
+def test_prefetched_sources_are_registered_with_their_short_ids(responder: SyntheticResponder) -> None:
+    instructions: list[str] = []
+
+    def respond(llm_request: LlmRequest) -> str:
+        instructions.append(str(llm_request.config.system_instruction if llm_request.config else ""))
+        return responder(llm_request)
+
+    state = run_pipeline(FakeLlm(model="gemini-synthetic", respond=respond), responder.plan)
+    queries = {query for node in responder.plan.knowledge_nodes for query in node.search_queries}
+    # Three results per unique planned query, none searched by the model.
+    assert len(state["sources"]) == 3 * len(queries)
+    assert any('"short_id": "src-1"' in instruction for instruction in instructions)
+
+
+def test_passes_settled_by_the_saturation_gate_keep_their_yield(
+    responder: SyntheticResponder, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The evaluator fails every first pass, and the gate saturates every second.
+    monkeypatch.setattr(config, "saturation_min_significant_facts", 100)
+    responder.passes_per_node = 3
+    state = run_pipeline(FakeLlm(model="gemini-synthetic", respond=responder), responder.plan)
+    titles = [node.node_title for node in responder.plan.knowledge_nodes]
+    assert state["research_schedule"]["passes"] == {title: [2, 2] for title in titles}
+    assert state["evaluation_stats"] == {"evaluated": 3, "skipped": 3}
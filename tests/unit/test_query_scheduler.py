@@ -0,0 +1,32 @@
+import asyncio
+from typing import Any
+
+from app.tools.query_scheduler import QueryScheduler
+
+
+def test_each_node_waits_for_its_own_queries_only() -> None:
+    release = asyncio.Event()
+    searched: list[str] = []
+
+    async def search(query: str) -> dict[str, Any]:
+        searched.append(query)
+        if query == "slow":
+            await release.wait()
+        return {"query": query}
+
+    async def run() -> None:
+        scheduled = QueryScheduler(search, max_concurrency=4).start({
+            "One": ["Apollo 11 landing", "apollo 11 landing?"],
+            "Two": ["slow", "Apollo 11 landing"],
+        })
+        one = await asyncio.wait_for(scheduled.results_for("One"), timeout=1)
+        assert one == [{"query": "Apollo 11 landing"}]
+        release.set()
+        assert await scheduled.wait() == {
+            "One": one,
+            "Two": [{"query": "slow"}, {"query": "Apollo 11 landing"}],
+        }
+        assert scheduled.stats.as_dict() == {"requested": 4, "unique": 2, "failed": 0, "dedup_ratio": 0.5}
+
+    asyncio.run(run())
+    assert searched == ["Apollo 11 landing", "slow"]
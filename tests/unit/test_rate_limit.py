@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+import pytest
+from google.genai import errors as genai_errors
+
+from app.config import config
+from app.models.fake import FakeEndpoint
+from app.utils.rate_limit import RateLimiter, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "rate_limit_backoff", 0.001)
+    monkeypatch.setattr(config, "rate_limit_burst", 10)
+    monkeypatch.setattr(config, "hedge_enabled", True)
+
+
+def call_all(limiter: RateLimiter, attempts: list[Callable[[], Awaitable[str]]]) -> list[str | BaseException]:
+    async def run() -> list[str | BaseException]:
+        return await asyncio.gather(*(limiter.call(attempt) for attempt in attempts), return_exceptions=True)
+
+    return asyncio.run(run())
+
+
+def test_throttled_calls_halve_the_rate_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "rate_limit_max_retries", 0)
+    endpoint = FakeEndpoint(quota_rps=1, latency=0)
+    limiter = RateLimiter("model", rate=10)
+
+    results = call_all(limiter, [endpoint.call] * 3)
+    assert sum(isinstance(result, genai_errors.ClientError) for result in results) == 2
+    assert endpoint.stats.throttled == limiter.stats.throttled == 2
+    # Both 429s answered calls paced at the old rate: one decrease only, and
+    # the successful call may then add its increase.
+    assert limiter.rate == pytest.approx(5, abs=config.rate_limit_increase / 5)
+    assert limiter.bucket.burst == 5
+
+
+def test_retries_stop_at_the_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "rate_limit_max_retries", 2)
+    endpoint = FakeEndpoint(quota_rps=0, latency=0)
+    limiter = RateLimiter("model", rate=10)
+
+    (result,) = call_all(limiter, [endpoint.call])
+    assert isinstance(result, genai_errors.ClientError)
+    assert endpoint.stats.calls == 3
+    assert (limiter.stats.retries, limiter.stats.failures) == (2, 1)
+
+
+def test_server_errors_are_retried_until_they_succeed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "rate_limit_max_retries", 5)
+    endpoint = FakeEndpoint(quota_rps=100, latency=0, error_ratio=0.5, seed=3)
+    limiter = RateLimiter("model", rate=100)
+
+    assert call_all(limiter, [endpoint.call] * 10) == ["ok"] * 10
+    assert limiter.stats.retries == endpoint.stats.errors > 0
+
+
+def test_slow_calls_are_hedged_within_the_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "hedge_budget", 0.5)
+    slow = FakeEndpoint(quota_rps=100, slow_ratio=1, slow_latency=0.5)
+    fast = FakeEndpoint(quota_rps=100, latency=0.01)
+    limiter = RateLimiter("model", rate=100)
+    limiter._latencies.extend([0.02] * config.hedge_min_samples)
+    attempts = iter([slow.call, fast.call, slow.call, fast.call])
+
+    def attempt() -> Awaitable[str]:
+        return next(attempts)()
+
+    started = time.monotonic()
+    assert call_all(limiter, [attempt]) == ["ok"]
+    assert time.monotonic() - started < 0.4
+    assert (limiter.stats.hedges, limiter.stats.hedge_wins) == (1, 1)
+
+    # A second hedge would exceed half of the two calls made.
+    assert call_all(limiter, [attempt]) == ["ok"]
+    assert (limiter.stats.hedges, limiter.stats.hedge_wins) == (1, 1)
+    assert fast.stats.calls == 1
+
+
+def test_the_token_bucket_paces_calls_at_its_rate() -> None:
+    bucket = TokenBucket(rate=20, burst=1)
+
+    async def acquire_all() -> float:
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire_all()) >= 4 / 20 - 0.01
+    assert not bucket.try_acquire()
@@ -0,0 +1,29 @@
+from google.adk.agents import LlmAgent, SequentialAgent
+
+from app.models.cascade import CascadeLlm
+from app.models.fake import FakeLlm
+from app.models.replay import Recording, models_wrapped, replay_models
+
+
+def fake(model: str) -> FakeLlm:
+    return FakeLlm(model=model, respond=lambda request: "{}")
+
+
+def test_models_are_restored_when_the_block_exits() -> None:
+    cheap, strong = fake("fake-lite"), fake("fake-pro")
+    cascade = CascadeLlm(model=cheap.model, tiers=[cheap, strong])
+    researcher = LlmAgent(name="researcher", model=cascade)
+    planner = LlmAgent(name="planner", model="gemini-2.5-flash")
+    root = SequentialAgent(name="root", sub_agents=[researcher, planner])
+
+    replacement = fake("gemini-synthetic")
+    with models_wrapped(root, lambda _: replacement):
+        assert cascade.tiers == [replacement, replacement]
+        assert planner.model is replacement
+    assert cascade.tiers == [cheap, strong]
+    assert planner.model == "gemini-2.5-flash"
+
+    with replay_models(root, Recording()) as player:
+        assert player.hits == player.misses == 0
+        assert researcher.canonical_model is cascade
+    assert cascade.tiers == [cheap, strong]
@@ -0,0 +1,22 @@
+from app.config import config
+from app.utils.research_scheduler import RESEARCH_SCHEDULE_KEY, ResearchSchedule
+
+
+def test_each_session_keeps_its_own_loop_cap() -> None:
+    small, large = ResearchSchedule(budget_seconds=0), ResearchSchedule(budget_seconds=0)
+    small.start_loop(open_nodes=1)
+    large.start_loop(open_nodes=10)
+    assert small.max_loop_passes == config.max_passes_per_node
+    assert large.max_loop_passes == 10 * config.max_passes_per_node
+
+    small.loop_passes = config.max_passes_per_node
+    assert small.loop_exhausted()
+    assert not large.loop_exhausted()
+
+
+def test_the_loop_cap_round_trips_through_state() -> None:
+    schedule = ResearchSchedule(budget_seconds=0)
+    schedule.start_loop(open_nodes=2)
+    schedule.loop_passes = 1
+    restored = ResearchSchedule.from_state({RESEARCH_SCHEDULE_KEY: schedule.as_dict()})
+    assert (restored.loop_passes, restored.max_loop_passes) == (1, 2 * config.max_passes_per_node)
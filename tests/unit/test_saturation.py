@@ -0,0 +1,19 @@
+from app.schemas.brief import KnowledgeNode, ResearchStatus
+from app.utils.brief_index import MergeResult
+from app.utils.saturation import research_delta, saturation_verdict
+
+
+def empty_pass(node: KnowledgeNode, previous: dict | None = None) -> dict:
+    return research_delta(MergeResult(node=node, added_sources=[], added_facts=[]), previous)
+
+
+def test_a_node_without_facts_stalls_after_two_empty_passes() -> None:
+    node = KnowledgeNode(node_title="Node", rationale="Rationale", axis="thematic")
+    first = empty_pass(node)
+    assert saturation_verdict(first) is None
+    second = empty_pass(node, first)
+    assert saturation_verdict(second) == ResearchStatus.STALLED
+
+    # An empty pass on another node does not count.
+    other = KnowledgeNode(node_title="Other", rationale="Rationale", axis="thematic")
+    assert saturation_verdict(empty_pass(other, second)) is None
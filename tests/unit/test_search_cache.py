@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.tools import search_cache
+from app.tools.search_cache import LocalSearchBackend, SearchCache, google_search
+
+
+@pytest.fixture
+def backend(tmp_path: Path) -> Iterator[LocalSearchBackend]:
+    fixtures = tmp_path / "fixtures.json"
+    fixtures.write_text(json.dumps({
+        "Apollo 11 landing": {
+            "summary": "Apollo 11 landed on July 20, 1969.",
+            "grounding_metadata": {"grounding_chunks": [{"web": {"uri": "https://nasa.gov/apollo11"}}]},
+        },
+    }))
+    backend = LocalSearchBackend(str(fixtures))
+    search_cache.set_search_backend(backend, SearchCache(":memory:", ttl_seconds=60, max_entries=10))
+    yield backend
+    search_cache.set_search_backend(None)
+
+
+def test_local_backend_serves_fixtures_by_normalized_query(backend: LocalSearchBackend) -> None:
+    result = asyncio.run(google_search("  apollo 11   LANDING "))
+    assert result["summary"] == "Apollo 11 landed on July 20, 1969."
+    assert result["grounding_metadata"]["grounding_chunks"][0]["web"]["uri"] == "https://nasa.gov/apollo11"
+
+
+def test_repeated_queries_hit_the_cache(backend: LocalSearchBackend) -> None:
+    asyncio.run(google_search("Apollo 11 landing"))
+    asyncio.run(google_search("apollo 11 landing"))
+    asyncio.run(google_search("Apollo 11 landing?"))
+    assert backend.calls == 1
+    assert search_cache.get_search_cache().stats.hits == 2
+
+
+def test_concurrent_identical_queries_share_one_search(backend: LocalSearchBackend) -> None:
+    async def search_twice() -> tuple[dict[str, Any], dict[str, Any]]:
+        return await asyncio.gather(google_search("Apollo 11 landing"), google_search("Apollo 11 landing"))
+
+    first, second = asyncio.run(search_twice())
+    assert first == second
+    assert backend.calls == 1
+
+
+def test_empty_results_are_not_cached(backend: LocalSearchBackend) -> None:
+    assert asyncio.run(google_search("unknown query"))["summary"] == ""
+    asyncio.run(google_search("unknown query"))
+    assert backend.calls == 2
+    assert len(search_cache.get_search_cache()) == 0
+
+
+def test_entries_expire_after_the_ttl() -> None:
+    cache = SearchCache(":memory:", ttl_seconds=60, max_entries=10)
+    cache.put("query", {"summary": "result"})
+    cache._conn.execute("UPDATE search_results SET created_at = ?", (time.time() - 120,))
+    assert cache.get("query") is None
+    assert cache.stats.expired == 1
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    cache = SearchCache(":memory:", ttl_seconds=60, max_entries=2)
+    cache.put("first", {"summary": "1"})
+    time.sleep(0.01)
+    cache.put("second", {"summary": "2"})
+    time.sleep(0.01)
+    cache.get("first")
+    time.sleep(0.01)
+    cache.put("third", {"summary": "3"})
+    assert cache.get("second") is None
+    assert cache.get("first") == {"summary": "1"}
+    assert cache.stats.evictions == 1
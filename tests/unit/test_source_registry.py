@@ -0,0 +1,35 @@
+from urllib.parse import quote
+
+from google.adk.sessions import Session
+
+from app.utils.source_registry import canonical_url, get_source_registry
+
+
+def redirect(url: str) -> str:
+    return f"https://www.google.com/url?q={quote(url, safe='')}"
+
+
+def test_variants_of_a_page_share_a_canonical_url() -> None:
+    page = "https://example.com/article?b=2&a=1"
+    for url in (
+        "http://www.example.com:80/article/?a=1&b=2&utm_source=x#top",
+        redirect(redirect(redirect("HTTPS://Example.com/article?a=1&b=2"))),
+    ):
+        assert canonical_url(url) == canonical_url(page) == "https://example.com/article?a=1&b=2"
+
+
+def test_redirects_past_the_limit_are_not_followed() -> None:
+    too_deep = redirect(redirect(redirect(redirect("https://example.com/article"))))
+    assert canonical_url(too_deep) == f"https://google.com/url?q={quote('https://example.com/article', safe='')}"
+
+
+def test_a_page_is_registered_once_with_deduplicated_claims() -> None:
+    session = Session(id="s", app_name="app", user_id="user", state={})
+    registry = get_source_registry(session)
+    short_id = registry.register("https://example.com/a?utm_source=x", "A", "example.com")
+    assert registry.register("http://www.example.com/a/", "A", "example.com") == short_id
+    registry.add_claim(short_id, "Claim", 0.4)
+    registry.add_claim(short_id, "Claim", 0.9)
+    assert registry.sources[short_id]["supported_claims"] == [{"text_segment": "Claim", "confidence": 0.9}]
+    session.state.update(registry.state_delta())
+    assert get_source_registry(session) is registry
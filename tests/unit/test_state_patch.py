@@ -0,0 +1,66 @@
+import copy
+from typing import Any
+
+import pytest
+
+from app.utils.state_patch import StatePatcher, apply_patch, json_patch
+
+CASES = {
+    "nested dicts": (
+        {"brief": {"subject": "Apollo", "node": {"status": "pending", "facts": 1}}},
+        {"brief": {"subject": "Apollo", "node": {"status": "active", "facts": 2, "sources": {}}}},
+    ),
+    "lists": (
+        {"nodes": [{"title": "A", "facts": ["a"]}, {"title": "B", "facts": []}], "empty": []},
+        {"nodes": [{"title": "A", "facts": ["a", "b", "c"]}, {"title": "B", "facts": ["d"]}], "empty": [1, 2]},
+    ),
+    "shrinking lists": (
+        {"nodes": [1, 2, 3, 4], "other": [[1, 2], [3]]},
+        {"nodes": [1, 5], "other": [[1]]},
+    ),
+    "key removal": (
+        {"sources": {"src-1": {"url": "a"}, "src-2": {"url": "b"}}, "stale": True},
+        {"sources": {"src-2": {"url": "b"}}},
+    ),
+    "escaped keys": (
+        {"url_to_short_id": {"https://example.com/a~b": "src-1"}},
+        {"url_to_short_id": {"https://example.com/a~b": "src-3", "https://example.com/c/d~1": "src-2"}},
+    ),
+    "changed types": (
+        {"flag": True, "value": {"a": 1}, "items": [1]},
+        {"flag": 1, "value": [1], "items": {"a": 1}},
+    ),
+}
+
+
+@pytest.mark.parametrize(("old", "new"), CASES.values(), ids=CASES.keys())
+def test_patches_turn_the_old_value_into_the_new_one(old: dict[str, Any], new: dict[str, Any]) -> None:
+    ops = json_patch(old, new)
+    assert apply_patch(copy.deepcopy(old), ops) == new
+    assert json_patch(new, copy.deepcopy(new)) == []
+
+
+def test_keys_with_tildes_and_slashes_are_escaped() -> None:
+    ops = json_patch({"m": {"a/b": 1}}, {"m": {"a/b": 2, "c~d": 3}})
+    assert ops == [
+        {"op": "replace", "path": "/m/a~1b", "value": 2},
+        {"op": "add", "path": "/m/c~0d", "value": 3},
+    ]
+
+
+def test_a_stream_of_patches_rebuilds_the_state() -> None:
+    patcher = StatePatcher()
+    brief = {"knowledge_nodes": [{"node_title": "A", "fact_points": []}]}
+    states: list[dict[str, Any]] = [
+        {"documentary_brief": copy.deepcopy(brief)},
+        {"documentary_brief": {"knowledge_nodes": [{"node_title": "A", "fact_points": [{"id": "f1"}]}]}},
+        {"final_documentary_brief": {"knowledge_nodes": [{"node_title": "A", "fact_points": [{"id": "f1"}]}], "links": []}},
+    ]
+    client: dict[str, Any] = {}
+    for seq, delta in enumerate(states):
+        event = patcher.patch_event({"actions": {"stateDelta": copy.deepcopy(delta)}})
+        assert event["actions"]["stateDelta"] == {}
+        assert event["actions"]["statePatch"]["seq"] == seq
+        apply_patch(client, event["actions"]["statePatch"]["ops"])
+        for key, value in delta.items():
+            assert client[key] == value
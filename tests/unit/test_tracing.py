@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from opentelemetry.sdk.trace import TracerProvider
+
+from app.utils.tracing import (
+    JsonlSpanExporter,
+    RecordProcessor,
+    instrument,
+    read_records,
+    summarize,
+)
+
+
+def test_jsonl_records_round_trip_into_the_summary(tmp_path: Path) -> None:
+    path = str(tmp_path / "trace.jsonl")
+    provider = TracerProvider()
+    provider.add_span_processor(RecordProcessor([JsonlSpanExporter(path)]))
+    tracer = provider.get_tracer("test")
+    with tracer.start_as_current_span("agent_run [researcher]"):
+        with tracer.start_as_current_span("search Apollo 11") as span:
+            span.set_attribute("cache_hit", True)
+        with tracer.start_as_current_span("callback save_plan") as span:
+            span.set_attribute("state_delta_bytes", 2048)
+    provider.shutdown()
+
+    records = read_records(path)
+    assert [(record.kind, record.name) for record in records] == [
+        ("search", "Apollo 11"), ("callback", "save_plan"), ("agent", "researcher"),
+    ]
+    assert records[0].attributes == {"cache_hit": True}
+    rows = {(row.kind, row.name): row for row in summarize(records)}
+    assert rows[("agent", "researcher")].searches == 1
+    assert rows[("callback", "save_plan")].state_delta_bytes == 2048
+
+
+def test_instrumenting_twice_wraps_callbacks_once() -> None:
+    def save_plan(callback_context: CallbackContext) -> None:
+        pass
+
+    agent = LlmAgent(name="planner", model="gemini-2.5-flash", after_agent_callback=save_plan)
+    instrument(agent)
+    callbacks = agent.after_agent_callback
+    instrument(agent)
+    assert agent.after_agent_callback == callbacks
+    assert isinstance(callbacks, list) and len(callbacks) == 2
+    assert getattr(callbacks[0], "__wrapped__", None) is save_plan